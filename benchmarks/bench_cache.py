@@ -0,0 +1,25 @@
+"""CacheManager.load/save with every dynamic dict of the workload cached."""
+import shutil
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from dynamic_alias.cache import CacheManager
+
+
+def bench_cache_load(benchmark, workload):
+    def load():
+        cache = CacheManager(workload.cache_file, True)
+        cache.load()
+        return cache
+
+    assert benchmark(load).get('nodes0')
+
+
+def bench_cache_save(benchmark, workload, tmp_path):
+    cache_file = str(tmp_path / 'dya.json')
+    shutil.copy(workload.cache_file, cache_file)
+    cache = CacheManager(cache_file, True)
+    cache.load()
+    benchmark(cache.save)
@@ -0,0 +1,41 @@
+"""CompletionEngine.get_completions from a fresh engine (no memo), over cached sources."""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from dynamic_alias.completer import CompletionEngine
+from generator import source_name
+
+
+class _Document:
+    def __init__(self, text):
+        self.text_before_cursor = text
+
+
+def _cases(workload):
+    last = workload.commands - 1
+    deepest = workload.deepest
+    return {
+        # Every top-level alias
+        'empty': "",
+        'alias_prefix': "cmd1",
+        # Every row of a dynamic dict, then a narrowed prefix
+        'source_values': f"cmd{last} ",
+        'source_prefix': f"cmd{last} {source_name(last)}-1",
+        # Args and subcommands after the longest matched path
+        'deep_scope': " ".join(deepest[:-2]) + " ",
+    }
+
+
+@pytest.mark.parametrize('case', ['empty', 'alias_prefix', 'source_values', 'source_prefix', 'deep_scope'])
+def bench_get_completions(benchmark, workload, resolver, executor, case):
+    document = _Document(_cases(workload)[case])
+
+    def setup():
+        return (CompletionEngine(resolver, executor),), {}
+
+    def complete(engine):
+        return list(engine.get_completions(document, None))
+
+    completions = benchmark.pedantic(complete, setup=setup, rounds=20, warmup_rounds=1)
+    assert completions
@@ -0,0 +1,38 @@
+"""
+ConfigLoader.load: full YAML parse (streaming load_all, and the legacy per-document
+parse it replaced, for comparison), and restore from the config snapshot.
+"""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from dynamic_alias.config import ConfigLoader
+
+
+class LegacyConfigLoader(ConfigLoader):
+    """Parsing as it was before the streaming loader: split on '---', pure Python per document."""
+    def _parse_documents(self, content: str):
+        import yaml
+        return [yaml.safe_load(doc_str) for doc_str in content.split('---') if doc_str.strip()]
+
+
+@pytest.mark.parametrize('loader_class', [ConfigLoader, LegacyConfigLoader], ids=['load_all', 'legacy'])
+def bench_config_parse(benchmark, workload, loader_class):
+    def load():
+        loader = loader_class(workload.config_file)
+        loader.load()
+        return loader
+
+    assert len(benchmark(load).commands) == workload.commands
+
+
+def bench_config_snapshot(benchmark, workload, tmp_path):
+    snapshot_file = str(tmp_path / 'dya.snapshot')
+    ConfigLoader(workload.config_file).load(snapshot_file)
+
+    def load():
+        loader = ConfigLoader(workload.config_file)
+        loader.load(snapshot_file)
+        return loader
+
+    assert benchmark(load).from_snapshot
@@ -0,0 +1,20 @@
+"""CommandExecutor.find_command and render_command (what execute runs), over cached sources."""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+
+def bench_find_command_deepest(benchmark, workload, executor):
+    # Last command, through its deepest subcommand with every arg: the longest walk
+    result = benchmark(executor.find_command, workload.deepest)
+    assert result is not None
+
+
+def bench_find_command_miss(benchmark, executor):
+    assert benchmark(executor.find_command, ['no-such-alias', 'x']) is None
+
+
+def bench_render_command(benchmark, workload, executor):
+    chain, variables, _, remaining = executor.find_command(workload.deepest)
+    rendered = benchmark(executor.render_command, chain, variables, remaining)
+    assert rendered.startswith('echo ssh 10.')
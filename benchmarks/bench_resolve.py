@@ -0,0 +1,33 @@
+"""DataResolver: running the stand-in source script, and refreshing sources concurrently."""
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from generator import SOURCES, build
+
+# Per-source delay for the refresh benchmark; all sources together should take about one delay
+REFRESH_DELAY = 0.2
+
+
+def bench_resolve_cold(benchmark, workload, loader):
+    # Cache disabled: every round runs the script, parses its JSON and maps the rows
+    def setup():
+        return (DataResolver(loader, CacheManager(workload.cache_file, False)),), {}
+
+    data = benchmark.pedantic(lambda resolver: resolver.resolve_one('nodes0'), setup=setup, rounds=5)
+    assert len(data) == workload.rows
+
+
+def bench_refresh_concurrent(benchmark, tmp_path):
+    slow = build(str(tmp_path), commands=5, depth=0, args=0, rows=100, delay=REFRESH_DELAY, warm_cache=False)
+    loader = ConfigLoader(slow.config_file)
+    loader.load()
+
+    def setup():
+        return (DataResolver(loader, CacheManager(slow.cache_file, False)),), {}
+
+    counts = benchmark.pedantic(lambda resolver: resolver.refresh(list(loader.dynamic_dicts)), setup=setup, rounds=3)
+    assert counts == {f'nodes{j}': 100 for j in range(SOURCES)}
@@ -0,0 +1,73 @@
+"""
+Benchmark suite (pytest-benchmark), separate from the functional tests:
+
+    pip install pytest-benchmark
+    python -m pytest benchmarks                          # runs and saves to benchmarks/.benchmarks
+    python -m pytest benchmarks --benchmark-compare      # against the last saved run
+    python -m pytest benchmarks --benchmark-compare=0003 --benchmark-compare-fail=median:10%
+    BENCH_SCALES=small python -m pytest benchmarks       # subset of the scales below
+
+Every run is saved (named after the commit), so results can be compared across
+commits on the same machine. Without pytest-benchmark the bench_* modules are skipped.
+"""
+import os
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(current_dir, '..', 'src'))
+
+from generator import build
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+
+STORAGE = os.path.join(current_dir, '.benchmarks')
+# name: (commands, depth, args, rows)
+SCALES = {
+    'small': (20, 1, 2, 100),
+    'medium': (200, 3, 4, 2000),
+    'large': (1000, 5, 6, 20000),
+}
+ACTIVE_SCALES = [s for s in os.environ.get('BENCH_SCALES', ','.join(SCALES)).split(',') if s in SCALES]
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    # Only when the benchmarks are the session (benchmarks/pytest.ini), not for a run of the whole tree
+    if config.pluginmanager.hasplugin('benchmark') and config.inipath and os.path.dirname(str(config.inipath)) == current_dir:
+        if not config.option.benchmark_autosave:
+            from pytest_benchmark.utils import get_tag
+            # Same as --benchmark-autosave: <storage>/<machine>/NNNN_<commit>_<time>.json
+            config.option.benchmark_autosave = get_tag()
+        if config.option.benchmark_storage == 'file://./.benchmarks':
+            config.option.benchmark_storage = f'file://{STORAGE}'
+
+
+@pytest.fixture(scope='session', params=ACTIVE_SCALES)
+def workload(request, tmp_path_factory):
+    commands, depth, args, rows = SCALES[request.param]
+    return build(str(tmp_path_factory.mktemp(request.param)), commands, depth, args, rows)
+
+
+@pytest.fixture(scope='session')
+def loader(workload):
+    loader = ConfigLoader(workload.config_file)
+    loader.load()
+    return loader
+
+
+@pytest.fixture
+def resolver(workload, loader):
+    cache = CacheManager(workload.cache_file, True)
+    cache.load()
+    resolver = DataResolver(loader, cache)
+    yield resolver
+    resolver.shutdown()
+
+
+@pytest.fixture
+def executor(resolver):
+    return CommandExecutor(resolver, direct_exec=True)
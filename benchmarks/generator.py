@@ -0,0 +1,143 @@
+"""
+Synthetic workloads for the benchmarks: a config of `commands` commands, each with
+a chain of subcommands `depth` levels deep and `args` optional args per node, plus
+dynamic dicts whose command is a local script printing `rows` JSON rows after
+`delay` seconds (a stand-in for aws/kubectl/curl).
+
+Usage: python benchmarks/generator.py <directory> [commands] [depth] [args] [rows] [delay]
+writes dya.yaml (and the source script) there, for manual runs with --dya-config.
+"""
+import os
+import sys
+import json
+import time
+from typing import List, NamedTuple
+
+# Dynamic dicts in a workload; commands use them in turn
+SOURCES = 3
+STATIC_ROWS = 20
+
+SOURCE_SCRIPT = """\
+import sys, json, time
+rows, delay, prefix = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3]
+time.sleep(delay)
+json.dump([{"name": f"{prefix}-{i}", "ip": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+            "region": ("us-east-1", "eu-west-1", "sa-east-1")[i % 3]} for i in range(rows)], sys.stdout)
+"""
+
+
+class Workload(NamedTuple):
+    config_file: str
+    cache_file: str
+    commands: int
+    depth: int
+    args: int
+    rows: int
+
+    @property
+    def deepest(self) -> List[str]:
+        """Invocation of the last command through its deepest subcommand, every arg given."""
+        i = self.commands - 1
+        words = [f"cmd{i}", f"{source_name(i)}-{self.rows - 1}"]
+        for level in range(self.depth + 1):
+            if level:
+                words.append(f"sub{level}")
+            for k in range(self.args):
+                words += [f"--opt{level}-{k}", f"value{k}"]
+        return words
+
+
+def source_name(i: int) -> str:
+    return f"nodes{i % SOURCES}"
+
+
+def source_rows(rows: int, prefix: str) -> list:
+    """What the source script prints, for pre-filling a cache without running it."""
+    return [{"name": f"{prefix}-{i}", "ip": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+             "region": ("us-east-1", "eu-west-1", "sa-east-1")[i % 3]} for i in range(rows)]
+
+
+def _node(level: int, args: int, indent: str) -> str:
+    lines = []
+    if args:
+        lines.append(f"{indent}args:")
+        for k in range(args):
+            lines.append(f"{indent}  - alias: --opt{level}-{k} ${{v{level}_{k}}}")
+            lines.append(f"{indent}    command: --opt{level}-{k} ${{v{level}_{k}}}")
+    return "\n".join(lines)
+
+
+def generate_config(commands: int, depth: int, args: int, rows: int, delay: float, script: str) -> str:
+    docs = [
+        "config:\n  history-size: 100\n",
+        "type: dict\nname: envs\ndata:\n" + "".join(
+            f"  - name: env{i}\n    url: env{i}.internal\n" for i in range(STATIC_ROWS)),
+    ]
+    for j in range(SOURCES):
+        docs.append(
+            f"type: dynamic_dict\nname: nodes{j}\n"
+            f"command: {sys.executable} {script} {rows} {delay} nodes{j}\n"
+            f"cache-ttl: 86400\nmapping:\n  name: name\n  ip: ip\n  region: region\n"
+        )
+    for i in range(commands):
+        source = source_name(i)
+        lines = [
+            "type: command",
+            f"name: Command {i}",
+            f"alias: cmd{i} $${{{source}.name}}",
+            f"command: echo ssh $${{{source}.ip}} -p {i}",
+            f"helper: |\n  Runs command {i} on a node.\n  Usage: cmd{i} <node>",
+        ]
+        body = _node(0, args, "")
+        if body:
+            lines.append(body)
+        indent = ""
+        for level in range(1, depth + 1):
+            lines.append(f"{indent}sub:")
+            lines.append(f"{indent}  - alias: sub{level}")
+            lines.append(f"{indent}    command: --level {level}")
+            indent += "    "
+            body = _node(level, args, indent)
+            if body:
+                lines.append(body)
+        docs.append("\n".join(lines) + "\n")
+    return "".join(f"---\n{doc}" for doc in docs)
+
+
+def build(directory: str, commands: int = 100, depth: int = 2, args: int = 3, rows: int = 500,
+          delay: float = 0.0, warm_cache: bool = True) -> Workload:
+    """Writes the config, source script and (with warm_cache) a cache holding every source's rows."""
+    os.makedirs(directory, exist_ok=True)
+    script = os.path.join(directory, "source.py")
+    with open(script, "w", encoding="utf-8") as f:
+        f.write(SOURCE_SCRIPT)
+
+    config_file = os.path.join(directory, "dya.yaml")
+    with open(config_file, "w", encoding="utf-8") as f:
+        f.write(generate_config(commands, depth, args, rows, delay, script))
+
+    cache_file = os.path.join(directory, "dya.json")
+    if warm_cache:
+        now = int(time.time())
+        cache = {f"nodes{j}": {"timestamp": now, "data": source_rows(rows, f"nodes{j}")} for j in range(SOURCES)}
+        cache["_history"] = [f"cmd{i} {source_name(i)}-{i % max(rows, 1)}" for i in range(min(commands, 100))]
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    return Workload(config_file, cache_file, commands, depth, args, rows)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python benchmarks/generator.py <directory> [commands] [depth] [args] [rows] [delay]")
+        sys.exit(1)
+    numbers = [float(v) for v in sys.argv[2:7]]
+    names = ("commands", "depth", "args", "rows", "delay")
+    options = {name: (value if name == "delay" else int(value)) for name, value in zip(names, numbers)}
+    workload = build(sys.argv[1], **options)
+    print(f"config: {workload.config_file}")
+    print(f"cache:  {workload.cache_file}")
+    print(f"try:    dya --dya-config {workload.config_file} --dya-cache {workload.cache_file} {' '.join(workload.deepest)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
+import os
 import re
 from setuptools import setup
+from setuptools.command.build_py import build_py
 
 def get_config_value(section, key, default):
     try:
@@ -30,13 +32,30 @@ def get_config_value(section, key, default):
 
 CUSTOM_SHORTCUT = get_config_value("custom-build", "shortcut", "dya")
 CUSTOM_NAME = get_config_value("custom-build", "name", "DYNAMIC ALIAS")
+VERSION = get_config_value("project", "version", "0.0.0")
+
+class build_py_with_info(build_py):
+    """Bakes the custom build values into the built package, so constants.py doesn't
+    have to find and scan pyproject.toml on every start. The source tree is left alone."""
+
+    def run(self):
+        super().run()
+        if self.dry_run:
+            return
+        target = os.path.join(self.build_lib, "dynamic_alias", "_build_info.py")
+        with open(target, "w", encoding="utf-8") as f:
+            f.write("# Generated by setup.py from pyproject.toml, do not edit\n")
+            f.write(f"CUSTOM_SHORTCUT = {CUSTOM_SHORTCUT!r}\n")
+            f.write(f"CUSTOM_NAME = {CUSTOM_NAME!r}\n")
+            f.write(f"VERSION = {VERSION!r}\n")
 
 # Setup entry points based on parsed config
 
 setup(
+    cmdclass={"build_py": build_py_with_info},
     entry_points={
         "console_scripts": [
             f"{CUSTOM_SHORTCUT} = dynamic_alias.main:main",
         ],
     },
-)
\ No newline at end of file
+)
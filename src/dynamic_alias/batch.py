@@ -0,0 +1,119 @@
+import sys
+import json
+import time
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, TextIO
+from .executor import CommandExecutor
+
+
+class BatchRunner:
+    """
+    Runs many alias invocations against a single loaded config/resolver.
+    Each input line is one invocation; each result is reported as one JSON line.
+    """
+    def __init__(self, executor: CommandExecutor, parallel: int = 1, output: TextIO = None):
+        self.executor = executor
+        self.parallel = max(1, parallel)
+        self.output = output or sys.stdout
+
+    def read_lines(self, source: str) -> List[str]:
+        if source == '-':
+            return sys.stdin.read().splitlines()
+        with open(source, 'r', encoding='utf-8-sig') as f:
+            return f.read().splitlines()
+
+    def prepare(self, line_no: int, text: str) -> Dict[str, Any]:
+        """Matches and renders one line. Resolution happens here, sequentially, before any execution."""
+        record: Dict[str, Any] = {'line': line_no, 'input': text, 'command': None}
+        try:
+            parts = shlex.split(text)
+        except ValueError:
+            record['error'] = "Invalid quotes"
+            return record
+
+        result = self.executor.find_command(parts)
+        if not result:
+            record['error'] = "Command not found"
+            return record
+
+        chain, variables, is_help, remaining = result
+        if is_help:
+            record['error'] = "Help is not available in batch mode"
+            return record
+
+        if self.executor.is_strict_violation(chain, remaining):
+            record['error'] = f"Strict mode enabled. Unknown arguments: {' '.join(remaining)}"
+            return record
+
+        record['command'] = self.executor.render_command(chain, variables, remaining)
+        record['timeout'] = self.executor.get_timeout(chain)
+        # For the journal, dropped before the record is emitted
+        record['chain'] = chain
+        return record
+
+    def run_one(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        timeout = record.pop('timeout', 0)
+        chain = record.pop('chain', None)
+        if record.get('command') is None:
+            record.update({'exit_code': None, 'duration': 0.0})
+            return record
+
+        # If timeout is 0, pass None to subprocess.run (means no timeout)
+        effective_timeout = timeout if timeout > 0 else None
+        start = time.perf_counter()
+        try:
+            argv = self.executor.build_argv(record['command']) if self.executor.direct_exec else None
+            runs = []
+
+            def run() -> int:
+                runs.append(subprocess.run(argv or record['command'], shell=argv is None, capture_output=True, text=True, timeout=effective_timeout))
+                return runs[-1].returncode
+
+            # Parallel lines share this process's child rusage, so only sequential runs get cpu/rss
+            self.executor._measured(chain, record['command'], run, children=self.parallel == 1)
+            completed = runs[-1]
+            record['exit_code'] = completed.returncode
+            record['stdout'] = completed.stdout
+            record['stderr'] = completed.stderr
+        except subprocess.TimeoutExpired:
+            record['exit_code'] = None
+            record['error'] = f"Command timed out after {timeout}s"
+        except Exception as e:
+            record['exit_code'] = None
+            record['error'] = f"Execution error: {e}"
+        record['duration'] = round(time.perf_counter() - start, 6)
+        return record
+
+    def emit(self, record: Dict[str, Any]):
+        self.output.write(json.dumps(record) + "\n")
+        self.output.flush()
+
+    def run(self, lines: List[str]) -> int:
+        """Runs all lines and returns the number of failed invocations."""
+        records = []
+        for line_no, raw in enumerate(lines, start=1):
+            text = raw.strip()
+            if not text or text.startswith('#'):
+                continue
+            records.append(self.prepare(line_no, text))
+
+        # Persist whatever was resolved while matching, once for the whole batch
+        self.executor.resolver.cache.save()
+
+        failures = 0
+        if self.parallel == 1:
+            results = map(self.run_one, records)
+        else:
+            pool = ThreadPoolExecutor(max_workers=self.parallel)
+            results = pool.map(self.run_one, records)
+
+        for record in results:
+            if record.get('exit_code') != 0:
+                failures += 1
+            self.emit(record)
+
+        if self.parallel != 1:
+            pool.shutdown()
+        return failures
@@ -1,20 +1,27 @@
 import os
 import json
+import threading
 from typing import Dict, List, Any, Optional
+from . import tracing
 
 class CacheManager:
     def __init__(self, cache_file: str, enabled: bool):
         self.cache_file = cache_file
         self.enabled = enabled
         self.cache: Dict[str, List[Dict[str, Any]]] = {}
+        # Background resolution threads may set/save while the shell is running
+        self._lock = threading.RLock()
+        # Moves whenever history, usage counts or frecency change (completion memo key)
+        self.usage_version = 0
 
     def load(self):
         if not self.enabled:
             return
         if os.path.exists(self.cache_file):
             try:
-                with open(self.cache_file, 'r') as f:
+                with tracing.span('cache.load'), open(self.cache_file, 'r') as f:
                     self.cache = json.load(f)
+                self.usage_version += 1
             except Exception as e:
                 print(f"Warning: Failed to load cache: {e}")
 
@@ -22,12 +29,14 @@ class CacheManager:
         if not self.enabled:
             return
         try:
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
+            with self._lock, tracing.span('cache.save'):
+                content = json.dumps(self.cache, indent=2)
+                with open(self.cache_file, 'w') as f:
+                    f.write(content)
         except Exception as e:
             print(f"Warning: Failed to save cache: {e}")
 
-    def get(self, key: str, ttl: int = 300) -> Optional[List[Dict[str, Any]]]:
+    def get(self, key: str, ttl: Optional[int] = 300) -> Optional[List[Dict[str, Any]]]:
         if not self.enabled:
             return None
         
@@ -44,7 +53,8 @@ class CacheManager:
             
         import time
         current_time = int(time.time())
-        if current_time - timestamp > ttl:
+        # ttl=None returns the entry even past its expiry
+        if ttl is not None and current_time - timestamp > ttl:
             return None # Expired
             
         return data
@@ -52,31 +62,132 @@ class CacheManager:
     def set(self, key: str, value: List[Dict[str, Any]]):
         if self.enabled:
             import time
-            self.cache[key] = {
+            with self._lock:
+                self.cache[key] = {
+                    'timestamp': int(time.time()),
+                    'data': value
+                }
+
+    def delete(self, key: str):
+        if self.enabled:
+            with self._lock:
+                self.cache.pop(key, None)
+
+    def get_output(self, key: str, ttl: int) -> Optional[Dict[str, Any]]:
+        """Captured result of a command run (stdout, stderr, exit_code, timestamp) if younger than ttl."""
+        if not self.enabled:
+            return None
+        outputs = self.cache.get('_output')
+        entry = outputs.get(key) if isinstance(outputs, dict) else None
+        if not isinstance(entry, dict):
+            return None
+
+        import time
+        if int(time.time()) - entry.get('timestamp', 0) > ttl:
+            return None
+        return entry
+
+    def set_output(self, key: str, stdout: str, stderr: str, exit_code: int, max_bytes: int):
+        """Stores a command result, dropping the oldest results to keep all of them under max_bytes."""
+        if not self.enabled:
+            return
+
+        import time
+        size = len(stdout.encode()) + len(stderr.encode())
+        with self._lock:
+            outputs = self.cache.get('_output')
+            if not isinstance(outputs, dict):
+                outputs = self.cache['_output'] = {}
+            outputs.pop(key, None)
+            if size > max_bytes:
+                return
+            outputs[key] = {
                 'timestamp': int(time.time()),
-                'data': value
+                'stdout': stdout,
+                'stderr': stderr,
+                'exit_code': exit_code,
+                'size': size,
             }
 
+            total = sum(entry.get('size', 0) for entry in outputs.values())
+            for old_key in sorted(outputs, key=lambda k: outputs[k].get('timestamp', 0)):
+                if total <= max_bytes:
+                    break
+                if old_key != key:
+                    total -= outputs.pop(old_key).get('size', 0)
+
     def add_history(self, command: str, limit: int = 20):
         if not self.enabled:
             return
 
-        if '_history' not in self.cache:
-            self.cache['_history'] = []
+        with self._lock:
+            if '_history' not in self.cache:
+                self.cache['_history'] = []
+                
+            history = self.cache['_history']
             
-        history = self.cache['_history']
-        
-        # Rule 1.2.20: Append and shift
-        # Only add if distinct from last command ?? Rules don't specify uniqueness, but standard shell usually does.
-        # Rules say: "appended and shifted only if exceeds history-size"
-        
-        history.append(command)
-        
-        if len(history) > limit:
-            history[:] = history[-limit:]
+            # Rule 1.2.20: Append and shift
+            # Only add if distinct from last command ?? Rules don't specify uniqueness, but standard shell usually does.
+            # Rules say: "appended and shifted only if exceeds history-size"
             
-        self.cache['_history'] = history
+            history.append(command)
+            self.usage_version += 1
+            
+            if len(history) > limit:
+                history[:] = history[-limit:]
+                
+            self.cache['_history'] = history
         
+    def record_usage(self, sources: List[str]):
+        """Counts one use of each source, used to rank startup prefetch."""
+        if not self.enabled or not sources:
+            return
+
+        import time
+        with self._lock:
+            usage = self.cache.get('_usage')
+            if not isinstance(usage, dict):
+                usage = self.cache['_usage'] = {}
+            now = int(time.time())
+            for name in sources:
+                entry = usage.get(name) if isinstance(usage.get(name), dict) else {}
+                usage[name] = {'count': int(entry.get('count', 0)) + 1, 'last': now}
+            self.usage_version += 1
+
+    def record_values(self, bindings: List[tuple]):
+        """Counts one use of each (key, value) pair in the user variable frecency store."""
+        if not self.enabled or not bindings:
+            return
+
+        import time
+        from .frecency import record
+        with self._lock:
+            store = self.cache.get('_frecency')
+            if not isinstance(store, dict):
+                store = self.cache['_frecency'] = {}
+            now = int(time.time())
+            for key, value in bindings:
+                record(store, key, value, now)
+            self.usage_version += 1
+
+    def get_values(self, key: str) -> List[str]:
+        """Values used for a user variable key, highest frecency first."""
+        if not self.enabled:
+            return []
+        store = self.cache.get('_frecency')
+        if not isinstance(store, dict):
+            return []
+
+        import time
+        from .frecency import ranked
+        return ranked(store, key, int(time.time()))
+
+    def get_usage(self) -> Dict[str, Dict[str, int]]:
+        if not self.enabled:
+            return {}
+        usage = self.cache.get('_usage')
+        return usage if isinstance(usage, dict) else {}
+
     def get_history(self) -> List[str]:
         if not self.enabled:
             return []
@@ -0,0 +1,193 @@
+"""
+Thin client for the resident daemon (see daemon.py).
+Imported before anything else on the one-shot path, so it must stay cheap:
+standard library only, no config, YAML or prompt_toolkit.
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import stat
+import fnmatch
+import socket
+import struct
+import tempfile
+from typing import Any, Dict, List, Optional
+from .constants import CUSTOM_SHORTCUT
+
+# Set to 1 to route one-shot invocations through the daemon
+DAEMON_ENV = f"{CUSTOM_SHORTCUT.upper()}_DAEMON"
+# How long a freshly spawned daemon gets to load config and start listening
+SPAWN_WAIT = 3.0
+REQUEST_TIMEOUT = 30.0
+# Client variables always sent to the daemon, on top of those the config asks for
+BASE_ENV = ('PATH', 'HOME', 'USER', 'LOGNAME', 'SHELL', 'TERM', 'TZ', 'TMPDIR', 'LANG', 'LC_*')
+
+
+def daemon_enabled() -> bool:
+    return os.environ.get(DAEMON_ENV, '') not in ('', '0') and hasattr(socket, 'AF_UNIX')
+
+
+def runtime_dir() -> str:
+    """
+    Private directory for the daemon sockets: a 0700 directory owned by this user, in
+    $XDG_RUNTIME_DIR or else in /tmp. Raises PermissionError when someone else got there first.
+    """
+    uid = os.getuid()
+    base = os.environ.get('XDG_RUNTIME_DIR')
+    path = os.path.join(base, CUSTOM_SHORTCUT) if base else os.path.join(tempfile.gettempdir(), f"{CUSTOM_SHORTCUT}-{uid}")
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != uid or st.st_mode & 0o077:
+        raise PermissionError(f"{path} must be a directory owned by uid {uid} with mode 0700")
+    return path
+
+
+def socket_path(config_file: str, cache_file: str) -> str:
+    """One daemon per user and config/cache pair, in the user's private runtime_dir()."""
+    key = f"{os.path.abspath(config_file)}\0{os.path.abspath(cache_file)}"
+    name = f"{CUSTOM_SHORTCUT}-{zlib.crc32(key.encode()):08x}.sock"
+    return os.path.join(runtime_dir(), name)
+
+
+def peer_uid(sock: socket.socket) -> Optional[int]:
+    """Uid of the process at the other end of a Unix socket; None where SO_PEERCRED isn't available."""
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _, uid, _ = struct.unpack('3i', creds)
+    return uid
+
+
+def filter_env(env: Dict[str, str], patterns: List[str]) -> Dict[str, str]:
+    """The variables named by patterns (fnmatch, e.g. AWS_*) or BASE_ENV."""
+    patterns = list(BASE_ENV) + list(patterns)
+    return {k: v for k, v in env.items() if any(fnmatch.fnmatchcase(k, p) for p in patterns)}
+
+
+def request(path: str, payload: Dict[str, Any], timeout: float = REQUEST_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """Sends one JSON request line and reads one JSON response line; None if no daemon answers."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            # Never hand the environment to a listener run by another user
+            uid = peer_uid(sock)
+            if uid is not None and uid != os.getuid():
+                return None
+            sock.sendall(json.dumps(payload).encode() + b'\n')
+            chunks = []
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                if chunk.endswith(b'\n'):
+                    break
+        return json.loads(b''.join(chunks))
+    except (OSError, ValueError):
+        return None
+
+
+def spawn_detached(module: str, *args: str):
+    """Starts `python -m <module> args...` in its own session, detached from this terminal."""
+    import subprocess
+    env = dict(os.environ)
+    # Works from a source checkout (dya_dev.py) as well as from an installed package
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (package_root, env.get('PYTHONPATH')) if p)
+    subprocess.Popen(
+        [sys.executable, '-m', module, *args],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, close_fds=True, env=env,
+    )
+
+
+def spawn_daemon(config_file: str, cache_file: str):
+    spawn_detached('dynamic_alias.daemon', config_file, cache_file)
+
+
+def run_client(args: List[str], config_file: str, cache_file: str, spawn: bool = True) -> Optional[int]:
+    """
+    Resolves a one-shot invocation through the daemon and runs the command here.
+    Returns an exit code, execs in place of this process, or returns None when the
+    daemon is unavailable and the caller should run the normal in-process path.
+    """
+    try:
+        path = socket_path(config_file, cache_file)
+    except OSError:
+        return None
+    # The daemon says which variables it needs, so the rest of the environment stays here
+    hello = request(path, {'op': 'env'})
+    if hello is None and spawn:
+        spawn_daemon(config_file, cache_file)
+        deadline = time.monotonic() + SPAWN_WAIT
+        while hello is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+            hello = request(path, {'op': 'env'})
+    if hello is None or hello.get('status') != 'ok':
+        return None
+
+    payload = {
+        'op': 'resolve',
+        'argv': args,
+        'env': filter_env(dict(os.environ), hello.get('env', [])),
+        'cwd': os.getcwd(),
+        'tty': sys.stdout.isatty(),
+    }
+    response = request(path, payload)
+    if response is None or response.get('status') == 'fallback':
+        return None
+
+    sys.stdout.write(response.get('output', ''))
+    sys.stdout.flush()
+    command = response.get('command')
+    if command is None:
+        return response.get('exit', 0)
+    return run_command(command, response.get('argv'), response.get('timeout', 0), response.get('journal'))
+
+
+def run_command(command: str, argv: Optional[List[str]], timeout: int,
+                journal: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Same rules as CommandExecutor.execute in one-shot mode. journal ({path, size, alias, timing},
+    sent by the daemon) records the run like CommandExecutor.journal does.
+    """
+    recorder = None
+    if journal:
+        from .journal import Journal, Measurement
+        recorder = Journal(journal['path'], journal['size'])
+
+    if timeout <= 0 and not (journal and journal.get('timing')):
+        if recorder is not None:
+            # Nothing comes back after exec: the run is counted, without timing
+            recorder.record(journal['alias'], command)
+        if argv:
+            os.execvp(argv[0], argv)
+        os.execv('/bin/sh', ['/bin/sh', '-c', command])
+
+    import subprocess
+    from contextlib import nullcontext
+    measurement = Measurement() if recorder is not None else nullcontext()
+    exit_code, timed_out = None, False
+    try:
+        with measurement:
+            if argv:
+                exit_code = subprocess.run(argv, timeout=timeout or None).returncode
+            else:
+                exit_code = subprocess.run(command, shell=True, timeout=timeout or None).returncode
+        return exit_code
+    except subprocess.TimeoutExpired:
+        timed_out = True
+        print(f"\nError: Command timed out after {timeout}s")
+        return 1
+    except KeyboardInterrupt:
+        print("\nOperation cancelled.")
+        return 130
+    finally:
+        if recorder is not None:
+            recorder.record(journal['alias'], command, measurement, exit_code, timed_out)
@@ -0,0 +1,184 @@
+"""
+Completion endpoint for the login shell: `dya __complete <words...>` prints the
+candidates for the last word, one per line as `value<TAB>description`.
+Answers only from cached data; sources that are missing or past their cache-ttl
+are refreshed by a detached process, so a Tab never waits on a dynamic source.
+"""
+import os
+import sys
+import shlex
+import time
+from typing import List, Optional, Tuple
+from .constants import CUSTOM_SHORTCUT
+from .client import spawn_detached
+
+# Hidden first argument that turns an invocation into a completion request
+COMPLETE_COMMAND = '__complete'
+# A refresh lock older than this is left over from a crashed refresh
+REFRESH_LOCK_AGE = 60
+
+BASH_SCRIPT = """\
+_{name}_complete() {{
+    local IFS=$'\\n'
+    COMPREPLY=($({name} {command} -- "${{COMP_WORDS[@]:1:COMP_CWORD}}" 2>/dev/null | cut -f1))
+}}
+complete -o default -F _{name}_complete {name}
+"""
+
+ZSH_SCRIPT = """\
+#compdef {name}
+_{name}() {{
+    local -a candidates
+    local line
+    for line in "${{(@f)$({name} {command} -- "${{(@)words[2,CURRENT]}}" 2>/dev/null)}}"; do
+        [[ -n $line ]] && candidates+=("${{${{line%%$'\\t'*}}//:/\\\\:}}:${{line#*$'\\t'}}")
+    done
+    _describe '{name}' candidates
+}}
+compdef _{name} {name}
+"""
+
+FISH_SCRIPT = """\
+function __{name}_complete
+    set -l tokens (commandline -opc)
+    {name} {command} -- $tokens[2..-1] (commandline -ct | string collect) 2>/dev/null
+end
+complete -c {name} -f -a '(__{name}_complete)'
+"""
+
+SHELL_SCRIPTS = {'bash': BASH_SCRIPT, 'zsh': ZSH_SCRIPT, 'fish': FISH_SCRIPT}
+
+
+def completion_script(shell: str) -> Optional[str]:
+    """Shell code that registers `dya` completion, None for an unsupported shell."""
+    template = SHELL_SCRIPTS.get(shell)
+    if template is None:
+        return None
+    return template.format(name=CUSTOM_SHORTCUT, command=COMPLETE_COMMAND)
+
+
+def words_to_text(words: List[str]) -> str:
+    """Rebuilds the text before the cursor from shell words; the last word is the one being completed."""
+    if not words:
+        return ''
+    consumed = ' '.join(shlex.quote(word) for word in words[:-1])
+    current = shlex.quote(words[-1]) if words[-1] else ''
+    return f"{consumed} {current}" if consumed else current
+
+
+def complete(engine, words: List[str]) -> List[Tuple[str, str]]:
+    """(value, description) pairs for the last word. Sentinels and placeholders are dropped."""
+    class _Document:
+        text_before_cursor = words_to_text(words)
+
+    results = []
+    for completion in engine.get_completions(_Document, None):
+        if not completion.text:
+            continue
+        results.append((completion.text, completion.display_meta or ''))
+    return results
+
+
+def _acquire_refresh_lock(path: str) -> bool:
+    for _ in range(2):
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(path).st_mtime < REFRESH_LOCK_AGE:
+                    return False
+                os.unlink(path)
+            except OSError:
+                pass
+        except OSError:
+            return False
+    return False
+
+
+def request_refresh(config_file: str, cache_file: str, sources: List[str]):
+    """Refreshes sources in a detached process, unless a refresh is already running."""
+    lock = cache_file + '.refresh'
+    if not sources or not _acquire_refresh_lock(lock):
+        return
+    try:
+        spawn_detached('dynamic_alias.complete', config_file, cache_file, *sorted(sources))
+    except OSError:
+        os.unlink(lock)
+
+
+def run_complete(words: List[str], config_file: str, cache_file: str) -> int:
+    """Entry point for `dya __complete`; never runs a dynamic source."""
+    if words and words[0] == '--':
+        words = words[1:]
+    if not os.path.exists(config_file):
+        return 0
+
+    from .config import ConfigLoader
+    from .cache import CacheManager
+    from .resolver import DataResolver
+    from .executor import CommandExecutor
+    from .completer import CompletionEngine
+    from .snapshot import snapshot_path
+
+    loader = ConfigLoader(config_file)
+    loader.load(snapshot_path(cache_file))
+    cache = CacheManager(cache_file, True)
+    cache.load()
+    resolver = DataResolver(loader, cache)
+    engine = CompletionEngine(resolver, CommandExecutor(resolver), cache_only=True)
+
+    lines = [f"{value}\t{meta}" for value, meta in complete(engine, words)]
+    if lines:
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    if engine.stale_sources and loader.global_config.completion_refresh:
+        request_refresh(config_file, cache_file, sorted(engine.stale_sources))
+    return 0
+
+
+def refresh(config_file: str, cache_file: str, sources: List[str]):
+    """Runs stale sources and stores them in the cache file (the detached refresh process)."""
+    from .config import ConfigLoader
+    from .cache import CacheManager
+    from .resolver import DataResolver
+    from .snapshot import snapshot_path
+
+    try:
+        loader = ConfigLoader(config_file)
+        loader.load(snapshot_path(cache_file))
+        cache = CacheManager(cache_file, True)
+        cache.load()
+        resolver = DataResolver(loader, cache)
+
+        fresh = {}
+        for name in sources:
+            if name in loader.dynamic_dicts and not resolver.is_resolved(name):
+                data = resolver._execute_dynamic_source(loader.dynamic_dicts[name])
+                # A failed source keeps its old entry, the next Tab tries again
+                if data is not None:
+                    fresh[name] = data
+
+        if fresh:
+            # Re-read right before writing, so entries saved meanwhile by other runs survive
+            cache.load()
+            for name, data in fresh.items():
+                cache.set(name, data)
+            cache.save()
+    finally:
+        try:
+            os.unlink(cache_file + '.refresh')
+        except OSError:
+            pass
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python -m dynamic_alias.complete <config file> <cache file> [source...]")
+        sys.exit(1)
+    refresh(sys.argv[1], sys.argv[2], sys.argv[3:])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,236 +1,500 @@
 import re
 import shlex
-from prompt_toolkit.completion import Completer, Completion
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from .resolver import DataResolver
-from .executor import CommandExecutor
+from .executor import CommandExecutor, USER_VAR_PATTERN, user_value_key
+from . import tracing
 
-class DynamicAliasCompleter(Completer):
-    def __init__(self, resolver: DataResolver, executor: CommandExecutor):
+APP_VAR_PATTERN = re.compile(r'\$\$\{(\w+)\.(\w+)\}')
+# Characters that change how shlex tokenizes, so the last token can't just be extended
+SPLIT_SENSITIVE = set(' \t\n"\'\\')
+# Completion lists remembered for repeated menu opens (Tab, backspace and retype)
+MEMO_SIZE = 64
+# Past values offered for a ${var}, after every other candidate
+USER_VALUE_SUGGESTIONS = 10
+
+
+class _ParseState(NamedTuple):
+    """Where the consumed tokens (all but the one being typed) landed in the command tree."""
+    part_idx: int
+    matched_cmd_node: object
+    scope: list
+    used_args_in_scope: frozenset
+
+
+class _Candidate(NamedTuple):
+    text: str
+    display: Optional[str] = None
+    # Always offered, regardless of the typed prefix (e.g. user variable placeholders)
+    always: bool = False
+    # Placeholder shown while a source is loading, never reused between keystrokes
+    pending: bool = False
+    # Dynamic values of $${source.key}, expanded per prefix through the source's ValueIndex
+    source: Optional[str] = None
+    key: Optional[str] = None
+    meta: Optional[str] = None
+    # Cut at USER_VALUE_SUGGESTIONS: values past the cap may match a longer prefix,
+    # so the list is rebuilt on the next keystroke instead of narrowed
+    capped: bool = False
+
+
+class CompletionItem(NamedTuple):
+    """Plain completion, same fields as prompt_toolkit's Completion."""
+    text: str
+    start_position: int = 0
+    display: Optional[str] = None
+    display_meta: Optional[str] = None
+
+
+class CompletionEngine:
+    """
+    Completion logic without prompt_toolkit, so the shell completion endpoint
+    (complete.py) doesn't pay for importing it. The interactive shell uses
+    DynamicAliasCompleter, which yields prompt_toolkit Completions instead.
+    """
+    def __init__(self, resolver: DataResolver, executor: CommandExecutor, non_blocking: bool = False,
+                 cache_only: bool = False):
         self.resolver = resolver
         self.executor = executor
+        # Non-blocking: never run a source inline, fetch it in background and show a placeholder
+        self.non_blocking = non_blocking
+        # Cache-only (shell completion endpoint): never run a source, answer from cached data,
+        # even expired, and collect the sources that need a refresh in stale_sources
+        self.cache_only = cache_only
+        self.stale_sources: set = set()
+        # Called with (source, text_before_cursor) once a background fetch finishes
+        self.on_source_ready = None
 
-    def get_completions(self, document, complete_event):
-        text = document.text_before_cursor
-        try:
-            parts = shlex.split(text)
-        except:
-            return
-
-        if not parts:
-            parts = ['']
-        
-        elif text.endswith(' '):
-            parts.append('')
-        
+        # Incremental state from the previous keystroke. Each is swapped as one tuple,
+        # since ThreadedCompleter may run overlapping requests.
+        self._last_split: Optional[Tuple[str, List[str]]] = None
+        self._last_walk: Optional[Tuple[Tuple, _ParseState]] = None
+        self._last_result: Optional[Tuple[Tuple, str, List[_Candidate]]] = None
+        self._recent: Tuple[Tuple, Dict[str, int]] = ((), {})
+
+        # LRU of finished completion lists, keyed by tree position, prefix and data version
+        self._memo: "OrderedDict[Tuple, List[Any]]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def _split(self, text: str) -> Optional[List[str]]:
+        """shlex.split with a fast path when the user only appended plain characters to the last token."""
+        last_text, last_parts = self._last_split or (None, None)
+        if (last_parts is not None and text.startswith(last_text) and len(text) > len(last_text)
+                and not last_text.endswith('\\ ')
+                and not any(ch in SPLIT_SENSITIVE for ch in text[len(last_text):])):
+            parts = last_parts[:-1] + [last_parts[-1] + text[len(last_text):]]
+        else:
+            try:
+                parts = shlex.split(text)
+            except ValueError:
+                return None
+
+            if not parts:
+                parts = ['']
+            elif text.endswith(' '):
+                parts.append('')
+
+        self._last_split = (text, parts)
+        return parts
+
+    def _parse_state(self, parts: List[str]) -> Tuple[Tuple, _ParseState]:
+        # Consumed tokens only change when a word is completed, so reuse the last walk if possible
+        state_key = (tuple(parts[:-1]), self.resolver.version)
+        last_walk = self._last_walk
+        if last_walk is not None and last_walk[0] == state_key:
+            return last_walk
+
+        self._last_walk = (state_key, self._walk(parts))
+        return self._last_walk
+
+    def _lookup(self, source: str) -> Optional[List[Dict[str, Any]]]:
+        """Data for matching typed words against a source without running it; None when there is none yet."""
+        if self.resolver.is_resolved(source):
+            return self.resolver.resolve_one(source)
+        if self.cache_only:
+            self.stale_sources.add(source)
+            return self.resolver.resolve_cached(source)
+        self.resolver.resolve_in_background(source)
+        return None
+
+    def _match(self, alias_parts: List[str], input_parts: List[str]) -> bool:
+        # Blocking mode (tests, default) may resolve sources inline; the others only look them up
+        lookup = self._lookup if self.cache_only or self.non_blocking else None
+        return self.executor._match_alias_parts(alias_parts, input_parts, lookup)[0]
+
+    def _walk(self, parts: List[str]) -> _ParseState:
         # Parse context
         # We need to traverse the command tree consistent with the input
-        
+
         scope = self.resolver.config.commands
         used_args_in_scope = set() # Aliases of used args
-        
+
         # Cursor tracking
         part_idx = 0
-        
+
         matched_cmd_node = None # The last command/subcommand matched
-        pending_arg = None # If we are in the middle of an arg (alias match start but not full)
-        
+
         # We process all parts EXCEPT the last one (which is the one being completed)
         # However, to track context, we try to match as much as possible.
-        
+
         while part_idx < len(parts) - 1:
-            token = parts[part_idx]
             match_found = False
-            
+
             # 1. Try Commands/Subs in scope
-            start_parts_slice = parts[part_idx:] 
-            
             for cmd in scope:
                 cmd_parts = cmd.alias.split()
                 if part_idx + len(cmd_parts) <= len(parts) - 1:
-                     is_match, _, _ = self.executor._match_alias_parts(cmd_parts, parts[part_idx:part_idx+len(cmd_parts)])
+                     is_match = self._match(cmd_parts, parts[part_idx:part_idx+len(cmd_parts)])
                      if is_match:
                          matched_cmd_node = cmd
                          part_idx += len(cmd_parts)
                          scope = cmd.sub if hasattr(cmd, 'sub') else []
-                         used_args_in_scope = set() 
+                         used_args_in_scope = set()
                          match_found = True
                          break
-            
+
             if match_found:
                 continue
-                
+
             # 2. Try match ARGS in (matched_cmd_node) context
             if matched_cmd_node and hasattr(matched_cmd_node, 'args'):
                 for arg in matched_cmd_node.args:
                     if arg.alias in used_args_in_scope:
                         continue
-                    
+
                     arg_parts = arg.alias.split()
                     if part_idx + len(arg_parts) <= len(parts) - 1:
-                        is_match, _, _ = self.executor._match_alias_parts(arg_parts, parts[part_idx:part_idx+len(arg_parts)])
+                        is_match = self._match(arg_parts, parts[part_idx:part_idx+len(arg_parts)])
                         if is_match:
                              used_args_in_scope.add(arg.alias)
                              part_idx += len(arg_parts)
                              match_found = True
                              break
-            
+
             if match_found:
                 continue
 
             break
-            
+
+        return _ParseState(part_idx, matched_cmd_node, scope, frozenset(used_args_in_scope))
+
+    def _complete_app_var(self, source: str, key: str, text: str) -> List[_Candidate]:
+        if self.cache_only and not self.resolver.is_resolved(source):
+            self.stale_sources.add(source)
+            if self.resolver.resolve_cached(source) is None:
+                return []
+
+        if self.non_blocking and not self.resolver.is_resolved(source):
+            callback = None
+            if self.on_source_ready:
+                callback = lambda name: self.on_source_ready(name, text)
+            self.resolver.resolve_in_background(source, callback)
+            return [_Candidate('', f"loading {source}…", always=True, pending=True)]
+
+        # Values are looked up per prefix when yielding, see _expand_source
+        return [_Candidate('', always=True, source=source, key=key)]
+
+    def _user_values(self, alias: str, token: str, prefix: str) -> List[_Candidate]:
+        """Values previously bound to the ${var} token of this alias, by frecency."""
+        var_match = USER_VAR_PATTERN.match(token)
+        if not var_match:
+            return []
+        values = self.resolver.cache.get_values(user_value_key(alias, var_match.group(1)))
+        if not isinstance(values, list):
+            return []
+        candidates = []
+        for value in values:
+            text = shlex.quote(value)
+            if text.startswith(prefix):
+                if len(candidates) == USER_VALUE_SUGGESTIONS:
+                    candidates[-1] = candidates[-1]._replace(capped=True)
+                    break
+                candidates.append(_Candidate(text, meta=f"recent {token}"))
+        return candidates
+
+    def _lookahead(self, parts: List[str], state: _ParseState):
+        """
+        Starts background resolution of sources that the aliases still reachable from
+        the typed text reference, so their data is warm when their token is reached.
+        """
+        part_idx, matched_cmd_node, scope, used_args_in_scope = state
+        prefix = parts[-1]
+        remaining: List[List[str]] = []
+
+        if part_idx < len(parts) - 1:
+            # Inside a multi-token alias: everything after the consumed chunk is still ahead
+            consumed_chunk = parts[part_idx:len(parts)-1]
+            for cmd in scope:
+                cmd_parts = cmd.alias.split()
+                if len(consumed_chunk) < len(cmd_parts):
+                    is_match = self._match(cmd_parts[:len(consumed_chunk)], consumed_chunk)
+                    if is_match:
+                        remaining.append(cmd_parts[len(consumed_chunk) + 1:])
+        elif prefix or matched_cmd_node:
+            # An empty root prompt matches every command, too broad to speculate on
+            nodes = list(scope)
+            if matched_cmd_node and hasattr(matched_cmd_node, 'args'):
+                nodes.extend(arg for arg in matched_cmd_node.args if arg.alias not in used_args_in_scope)
+            for node in nodes:
+                node_parts = node.alias.split()
+                if node_parts and node_parts[0].startswith(prefix):
+                    remaining.append(node_parts[1:])
+
+        for tokens in remaining:
+            for token in tokens:
+                app_var_match = APP_VAR_PATTERN.match(token)
+                if app_var_match and not self.resolver.is_resolved(app_var_match.group(1)):
+                    self.resolver.resolve_in_background(app_var_match.group(1))
+
+    def _recent_values(self) -> Dict[str, int]:
+        """Tokens from command history, most recent first (rank 0), rebuilt only when history changes."""
+        history = self.resolver.cache.get_history()
+        if not isinstance(history, list):
+            history = []
+        stamp = (len(history), history[-1] if history else None)
+        if self._recent[0] == stamp:
+            return self._recent[1]
+
+        recent: Dict[str, int] = {}
+        for command in reversed(history):
+            for token in command.split():
+                recent.setdefault(token, len(recent))
+        self._recent = (stamp, recent)
+        return recent
+
+    def _completion(self, text: str, start_position: int = 0, display: Optional[str] = None,
+                    display_meta: Optional[str] = None):
+        return CompletionItem(text, start_position, display, display_meta)
+
+    def _expand_source(self, candidate: _Candidate, prefix: str) -> Iterator[Any]:
+        # Lazy load: only resolve this dict when needed
+        index = self.resolver.value_index(candidate.source, candidate.key)
+        global_config = self.resolver.config.global_config
+        limit = global_config.completion_limit
+        complete = True
+        if global_config.completion_fuzzy and prefix:
+            rows, total, complete = index.fuzzy(prefix, limit, global_config.completion_fuzzy_budget / 1000)
+        else:
+            rows, total = index.top(prefix, limit, self._recent_values())
+        for i in rows:
+            yield self._completion(index.values[i], start_position=-len(prefix), display_meta=index.metas[i] or None)
+        if total > len(rows) or not complete:
+            # Sentinel: selecting it inserts nothing, it only tells the list was capped
+            more = f"+{total - len(rows)} more"
+            if not complete:
+                # Fuzzy scan ran out of time budget, more matches may exist
+                more += ", keep typing"
+            yield self._completion('', start_position=0, display=more)
+
+    def _candidates(self, parts: List[str], state: _ParseState, text: str) -> List[_Candidate]:
+        part_idx, matched_cmd_node, scope, used_args_in_scope = state
+        prefix = parts[-1]
+        candidates: List[_Candidate] = []
+
         # End of consumption loop.
         # matched_cmd_node is the active command.
         # part_idx points to where we are completions.
-        
-        # Check if we are incomplete on a multi-token structure (Command or Arg)
-        
-        prefix = parts[-1]
-        
+
         # If part_idx is NOT at len(parts)-1, it means we stopped consuming before the end.
         # This implies we are "inside" a multi-token structure or invalid input.
-        
+
         if part_idx < len(parts) - 1:
-            # We have some tokens that didn't fully match a structure.
-            # e.g. `pg db1 -o` (and we are at `''`?)
-            # No, if `pg db1 -o `, parts=`['-o', '']`. part_idx matches `-o`.
-            # Wait, my loop condition `part_idx < len(parts) - 1`.
-            # If `parts` = `['...','-o', '']`.
-            # part_idx is at `-o`.
-            # If `-o` is start of arg `-o ${file}`.
-            
-            # Check for Partial Matches starting at part_idx
-            
-            # 1. Partial Arg?
+            # Consumed so far: `parts[part_idx:len(parts)-1]`
+            consumed_chunk = parts[part_idx:len(parts)-1]
+
+            # 1. Partial Arg? e.g. `pg db1 -o ` is inside arg `-o ${file}`
             if matched_cmd_node and hasattr(matched_cmd_node, 'args'):
                 for arg in matched_cmd_node.args:
                     if arg.alias in used_args_in_scope:
                         continue
                     arg_parts = arg.alias.split()
-                    # Check prefix match
-                    # We have `parts[part_idx : -1]` (Completed tokens after match)
-                    # And `parts[-1]` (Typing)
-                    
-                    # Consumed so far: `parts[part_idx:len(parts)-1]`
-                    consumed_chunk = parts[part_idx:len(parts)-1]
-                    
+
                     # Does this chunk match the start of arg_parts?
                     if len(consumed_chunk) < len(arg_parts):
-                        # Potential match
-                        is_match, _, _ = self.executor._match_alias_parts(arg_parts[:len(consumed_chunk)], consumed_chunk)
+                        is_match = self._match(arg_parts[:len(consumed_chunk)], consumed_chunk)
                         if is_match:
-                            # We are inside this arg.
-                            # What is the expected next token?
-                            next_token_idx = len(consumed_chunk)
-                            expected_token_alias = arg_parts[next_token_idx]
-                            
-                            # Suggestions
+                            # We are inside this arg. What is the expected next token?
+                            expected_token_alias = arg_parts[len(consumed_chunk)]
+
                             # If expected token is variable `${...}`, Do NOT yield (Rule 4.18)
                             # If expected token is static, yield it if matches prefix
                             if expected_token_alias.startswith('$${'):
-                                yield Completion(expected_token_alias, start_position=-len(prefix), display=expected_token_alias)
+                                candidates.append(_Candidate(expected_token_alias, expected_token_alias, always=True))
                             elif expected_token_alias.startswith('${'):
-                                # User rule: Args can autocomplete only flags, not user variables
-                                pass 
-                            else:
-                                if expected_token_alias.startswith(prefix):
-                                    yield Completion(expected_token_alias, start_position=-len(prefix))
-                            
-                            # If we matched a partial arg, we return (exclusive?)
-                            return
+                                # No placeholder for user variables, only values used before
+                                candidates.extend(self._user_values(arg.alias, expected_token_alias, prefix))
+                            elif expected_token_alias.startswith(prefix):
+                                candidates.append(_Candidate(expected_token_alias))
+
+                            # A partial arg match is exclusive
+                            return candidates
 
             # 2. Partial Command?
+            if not consumed_chunk:
+                return candidates
+
+            user_values: List[_Candidate] = []
             for cmd in scope:
                 cmd_parts = cmd.alias.split()
-                # Check prefix match
-                # Consumed so far: parts[part_idx:len(parts)-1]
-                consumed_chunk = parts[part_idx:len(parts)-1]
-                
-                if not consumed_chunk:
-                    continue
-                    
                 if len(consumed_chunk) < len(cmd_parts):
                     # Check if consumed chunk matches start of alias
-                    is_match, _, _ = self.executor._match_alias_parts(cmd_parts[:len(consumed_chunk)], consumed_chunk)
+                    is_match = self._match(cmd_parts[:len(consumed_chunk)], consumed_chunk)
                     if is_match:
                         # We are inside this command alias
-                        next_token_idx = len(consumed_chunk)
-                        expected_token_alias = cmd_parts[next_token_idx]
-                        
-                        # Suggestion logic
+                        expected_token_alias = cmd_parts[len(consumed_chunk)]
+
                         # Dynamic Var $${...}
-                        app_var_match = re.match(r'\$\$\{(\w+)\.(\w+)\}', expected_token_alias)
+                        app_var_match = APP_VAR_PATTERN.match(expected_token_alias)
                         if app_var_match:
                             source, key = app_var_match.group(1), app_var_match.group(2)
-                            # Lazy load: only resolve this dict when needed
-                            data = self.resolver.resolve_one(source)
-                            for item in data:
-                                val = str(item.get(key, ''))
-                                if val.startswith(prefix):
-                                    yield Completion(val, start_position=-len(prefix))
-                        
+                            candidates.extend(self._complete_app_var(source, key, text))
+
                         # User Var ${...}
                         elif expected_token_alias.startswith('${'):
-                             # Rule 4.20: Avoid user defined variables completion like ${sql_text}
-                             pass
-                             # yield Completion(expected_token_alias, start_position=-len(prefix), display=expected_token_alias)
-                             
+                             # Rule 4.20: no ${sql_text} placeholder, only values used before (ranked last)
+                             user_values.extend(self._user_values(cmd.alias, expected_token_alias, prefix))
+
                         # Static Text
-                        else:
-                            if expected_token_alias.startswith(prefix):
-                                yield Completion(expected_token_alias, start_position=-len(prefix))
-                        
-                        # If we found a partial command match, we should probably stop?
-                        # Or continue to find distinct aliases? 
-                        # Return to yield exclusive results for this alias path?
-                        # Yes, finding specific command path.
-                        # But wait, multiple commands might share prefix?
-                        # e.g. `s3 sync` and `s3 ls`.
-                        # If we typed `s3 `, we match both!
-                        # We should yield from ALL matches, not return immediately.
-                        # So don't return.
-                        pass
+                        elif expected_token_alias.startswith(prefix):
+                            candidates.append(_Candidate(expected_token_alias))
+
+                        # Multiple commands might share a prefix (e.g. `s3 sync` and `s3 ls`),
+                        # so keep yielding from ALL matches instead of returning.
+            return candidates + user_values
+
+        # part_idx == len(parts) - 1.
+        # Suggestions:
+        # 1. Subcommands of matched_cmd_node
+        # 2. Unused Args of matched_cmd_node
+
+        nodes = []
+
+        if matched_cmd_node:
+            # Subs
+            if hasattr(matched_cmd_node, 'sub'):
+                nodes.extend(matched_cmd_node.sub)
+
+            # Args (unused)
+            if hasattr(matched_cmd_node, 'args'):
+                for arg in matched_cmd_node.args:
+                    if arg.alias not in used_args_in_scope:
+                        nodes.append(arg)
         else:
-            # part_idx == len(parts) - 1.
-            
-            # Suggestions:
-            # 1. Subcommands of matched_cmd_node
-            # 2. Unused Args of matched_cmd_node
-            
-            candidates = []
-            
-            if matched_cmd_node:
-                # Subs
-                if hasattr(matched_cmd_node, 'sub'):
-                    candidates.extend(matched_cmd_node.sub)
-                
-                # Args (unused)
-                if hasattr(matched_cmd_node, 'args'):
-                    for arg in matched_cmd_node.args:
-                        if arg.alias not in used_args_in_scope:
-                            candidates.append(arg)
+            # Root commands
+            nodes.extend(self.resolver.config.commands)
+
+        user_values = []
+        for cand in nodes:
+            # First token of alias
+            head = cand.alias.split()[0]
+
+            # Handling dynamic vars $${...}
+            app_var_match = APP_VAR_PATTERN.match(head)
+            if app_var_match:
+                source, key = app_var_match.group(1), app_var_match.group(2)
+                candidates.extend(self._complete_app_var(source, key, text))
+            elif head.startswith('${'):
+                 # User var placeholder as start of command? Rare but possible.
+                 candidates.append(_Candidate(head, always=True))
+                 user_values.extend(self._user_values(cand.alias, head, prefix))
+            elif head.startswith(prefix):
+                candidates.append(_Candidate(head))
+
+        return candidates + user_values
+
+    def _memo_key(self, state_key: Tuple, prefix: str) -> Tuple:
+        # state_key carries the consumed tokens and resolver.version, which moves on every
+        # source refresh, so stale entries are never hit again and just age out of the LRU.
+        # Ranking also follows history and the user values' frecency: usage_version covers
+        # both, including a repeated command that leaves the history's length and tail as they were
+        global_config = self.resolver.config.global_config
+        cache = self.resolver.cache
+        history = cache.get_history()
+        history_stamp = (len(history), history[-1] if history else None) if isinstance(history, list) else None
+        return (state_key, prefix, history_stamp, cache.usage_version,
+                global_config.completion_limit, global_config.completion_fuzzy)
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        # Computed up front, so the span measures the work and not the menu consuming it
+        with tracing.span('complete'):
+            completions = self._complete(text)
+        yield from completions
+
+    def _complete(self, text: str) -> List[Any]:
+        parts = self._split(text)
+        if parts is None:
+            return []
+
+        state_key, state = self._parse_state(parts)
+        prefix = parts[-1]
+
+        memo_key = self._memo_key(state_key, prefix)
+        with self._memo_lock:
+            memoized = self._memo.get(memo_key)
+            if memoized is not None:
+                self._memo.move_to_end(memo_key)
+        if memoized is not None:
+            return memoized
+
+        # Candidates include recent user values, so a new use (usage_version) means a fresh list
+        result_key = (state_key, self.resolver.cache.usage_version)
+        last_result = self._last_result
+        if last_result is not None and last_result[0] == result_key and prefix.startswith(last_result[1]):
+            # Typing more of the same token only narrows the previous result
+            candidates = [c for c in last_result[2] if c.always or c.text.startswith(prefix)]
+        else:
+            candidates = self._candidates(parts, state, text)
+
+        if self.non_blocking:
+            self._lookahead(parts, state)
+
+        pending = any(c.pending for c in candidates)
+        if pending or any(c.capped for c in candidates):
+            self._last_result = None
+        else:
+            self._last_result = (result_key, prefix, candidates)
+
+        completions = []
+        for c in candidates:
+            if c.source is not None:
+                completions.extend(self._expand_source(c, prefix))
+            elif c.pending:
+                completions.append(self._completion(c.text, start_position=0, display=c.display))
+            elif c.display is not None:
+                completions.append(self._completion(c.text, start_position=-len(prefix), display=c.display))
+            elif c.meta is not None:
+                completions.append(self._completion(c.text, start_position=-len(prefix), display_meta=c.meta))
             else:
-                # Root commands
-                candidates.extend(self.resolver.config.commands)
-            
-            for cand in candidates:
-                # First token of alias
-                cand_parts = cand.alias.split()
-                head = cand_parts[0]
-                
-                # Handling dynamic vars $${...}
-                app_var_match = re.match(r'\$\$\{(\w+)\.(\w+)\}', head)
-                if app_var_match:
-                    source, key = app_var_match.group(1), app_var_match.group(2)
-                    # Lazy load: only resolve this dict when needed
-                    data = self.resolver.resolve_one(source)
-                    for item in data:
-                        val = str(item.get(key, ''))
-                        if val.startswith(prefix):
-                            yield Completion(val, start_position=-len(prefix))
-                elif head.startswith('${'):
-                     # User var placeholder as start of command? Rare but possible.
-                     yield Completion(head, start_position=-len(prefix))
-                else:
-                    if head.startswith(prefix):
-                        yield Completion(head, start_position=-len(prefix))
+                completions.append(self._completion(c.text, start_position=-len(prefix)))
+
+        # Placeholders for loading sources must be recomputed once the data arrives
+        if not pending:
+            with self._memo_lock:
+                self._memo[memo_key] = completions
+                while len(self._memo) > MEMO_SIZE:
+                    self._memo.popitem(last=False)
+
+        return completions
+
+
+def _build_completer():
+    from prompt_toolkit.completion import Completer, Completion
+
+    class DynamicAliasCompleter(CompletionEngine, Completer):
+        """CompletionEngine as a prompt_toolkit Completer, for the interactive shell."""
+        def _completion(self, text: str, start_position: int = 0, display: Optional[str] = None,
+                        display_meta: Optional[str] = None):
+            return Completion(text, start_position=start_position, display=display, display_meta=display_meta)
+
+    return DynamicAliasCompleter
+
+
+def __getattr__(name: str):
+    # prompt_toolkit is imported on first use of DynamicAliasCompleter only
+    if name == 'DynamicAliasCompleter':
+        cls = globals()['DynamicAliasCompleter'] = _build_completer()
+        return cls
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
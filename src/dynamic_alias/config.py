@@ -1,9 +1,30 @@
 import os
 import sys
-import yaml
+import glob
 import re
-from typing import Dict, List, Any
-from .models import DictConfig, DynamicDictConfig, CommandConfig, SubCommand, ArgConfig,  GlobalConfig, DEFAULT_TIMEOUT
+from typing import Dict, List, Any, Optional, Set
+from .models import DictConfig, DynamicDictConfig, CommandConfig, SubCommand, ArgConfig,  GlobalConfig, LazyList
+from . import snapshot
+from . import tracing
+
+
+def __getattr__(name: str):
+    # PyYAML is only imported once a file is actually parsed (not on snapshot hits)
+    if name == 'yaml':
+        import yaml
+        return yaml
+    if name == 'SafeLoader':
+        return _safe_loader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _safe_loader():
+    # libyaml-backed loader when PyYAML was built with it, pure Python otherwise
+    loader = globals().get('SafeLoader')
+    if loader is None:
+        import yaml
+        loader = globals()['SafeLoader'] = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    return loader
 
 class ConfigLoader:
     def __init__(self, config_file: str):
@@ -12,6 +33,15 @@ class ConfigLoader:
         self.dynamic_dicts: Dict[str, DynamicDictConfig] = {}
         self.commands: List[CommandConfig] = []
         self.global_config: GlobalConfig = GlobalConfig()
+        # True when the state came from a snapshot instead of parsing the YAML
+        self.from_snapshot = False
+        self.snapshot_file: Optional[str] = None
+        # Per-file parse results {path: (stamp, documents, env var names)} and the
+        # stamps of include directories, used by the snapshot and by reload()
+        self._documents: Dict[str, tuple] = {}
+        self._watch_dirs: Dict[str, List] = {}
+        # Built commands by source document, reused by reload() for unchanged files
+        self._command_cache: Dict[int, tuple] = {}
 
     def _substitute_env_vars(self, text: str) -> str:
         if not isinstance(text, str):
@@ -34,139 +64,314 @@ class ConfigLoader:
             processed.append(new_item)
         return processed
 
-    def load(self):
+    def _apply_global_config(self, cfg: Dict[str, Any]):
+        styles = self.global_config.styles.copy()
+        
+        if 'style-completion' in cfg:
+            styles['completion-menu.completion'] = cfg['style-completion']
+        if 'style-completion-current' in cfg:
+             styles['completion-menu.completion.current'] = cfg['style-completion-current']
+        if 'style-scrollbar-background' in cfg:
+             styles['scrollbar.background'] = cfg['style-scrollbar-background']
+        if 'style-scrollbar-button' in cfg:
+             styles['scrollbar.button'] = cfg['style-scrollbar-button']
+        
+        self.global_config.styles = styles
+        
+        if 'style-placeholder-color' in cfg:
+            self.global_config.placeholder_color = cfg['style-placeholder-color']
+        if 'style-placeholder-text' in cfg:
+            self.global_config.placeholder_text = cfg['style-placeholder-text']
+            
+        if 'history-size' in cfg:
+             # Rule 1.2.19: Max 1000
+             val = int(cfg['history-size'])
+             self.global_config.history_size = min(val, 1000)
+
+        if 'history-retain' in cfg:
+            self.global_config.history_retain = max(1, int(cfg['history-retain']))
+
+        if 'shell-coprocess' in cfg:
+            self.global_config.shell_coprocess = bool(cfg['shell-coprocess'])
+
+        if 'completion-limit' in cfg:
+            self.global_config.completion_limit = max(0, int(cfg['completion-limit']))
+
+        if 'completion-fuzzy' in cfg:
+            self.global_config.completion_fuzzy = bool(cfg['completion-fuzzy'])
+
+        if 'completion-fuzzy-budget' in cfg:
+            self.global_config.completion_fuzzy_budget = max(1, int(cfg['completion-fuzzy-budget']))
+
+        if 'completion-refresh' in cfg:
+            self.global_config.completion_refresh = bool(cfg['completion-refresh'])
+
+        if 'prefetch-max' in cfg:
+            self.global_config.prefetch_max = max(0, int(cfg['prefetch-max']))
+
+        if 'prefetch-concurrency' in cfg:
+            self.global_config.prefetch_concurrency = max(1, int(cfg['prefetch-concurrency']))
+
+        if 'prefetch-nice' in cfg:
+            self.global_config.prefetch_nice = min(19, max(0, int(cfg['prefetch-nice'])))
+
+        if 'daemon-idle-timeout' in cfg:
+            self.global_config.daemon_idle_timeout = max(0, int(cfg['daemon-idle-timeout']))
+
+        if 'daemon-env' in cfg:
+            value = cfg['daemon-env'] or []
+            self.global_config.daemon_env = [str(v) for v in (value if isinstance(value, list) else [value])]
+
+        if 'output-cache-size' in cfg:
+            self.global_config.output_cache_size = max(0, int(cfg['output-cache-size']))
+
+        if 'journal-size' in cfg:
+            self.global_config.journal_size = max(0, int(cfg['journal-size']))
+
+        if 'journal-timing' in cfg:
+            self.global_config.journal_timing = bool(cfg['journal-timing'])
+
+    def _state(self) -> Dict[str, Any]:
+        return {
+            'dicts': self.dicts,
+            'dynamic_dicts': self.dynamic_dicts,
+            'commands': self.commands,
+            'global_config': self.global_config,
+            '_watch_dirs': self._watch_dirs,
+        }
+
+    def load(self, snapshot_file: Optional[str] = None):
+        """
+        Parses the config file and the files it includes. With snapshot_file, a previous
+        load of the same, unchanged files (and env vars they substitute) is restored from
+        the snapshot instead, and otherwise only the files that changed are parsed again.
+        """
         if not os.path.exists(self.config_file):
             print(f"Error: Config file not found at {self.config_file}")
             sys.exit(1)
 
-        # Use utf-8-sig to handle BOM if present (e.g. VS Code on Windows)
-        with open(self.config_file, 'r', encoding='utf-8-sig') as f:
-            content = f.read()
-            docs = [doc for doc in content.split('---') if doc.strip()]
+        self.snapshot_file = snapshot_file
+        cached_documents: Dict[str, tuple] = {}
+        with tracing.span('config.load') as span:
+            if snapshot_file:
+                state, cached_documents = snapshot.load_snapshot(snapshot_file, self.config_file)
+                if state is not None:
+                    self.__dict__.update(state)
+                    self._documents = cached_documents
+                    self.from_snapshot = True
+                    if span is not None:
+                        span.args['snapshot'] = True
+                    return
+
+            self._parse_all(cached_documents)
+            self._save_snapshot()
+
+    def _parse_all(self, cached_documents: Dict[str, tuple]):
+        self._documents = {}
+        self._watch_dirs = {}
+        self._load_file(self.config_file, cached_documents)
+        self.dynamic_dicts = dict(sorted(self.dynamic_dicts.items(), key=lambda x: x[1].priority))
+
+    def _save_snapshot(self):
+        if not self.snapshot_file:
+            return
+        files = {path: entry[0] for path, entry in self._documents.items()}
+        # A file added to an include directory changes the directory's mtime
+        files.update(self._watch_dirs)
+        env_names = [name for entry in self._documents.values() for name in entry[2]]
+        snapshot.save_snapshot(
+            self.snapshot_file, self.config_file, files, snapshot.env_stamp(env_names),
+            self._state(), self._documents)
+
+    def changed(self) -> bool:
+        """True when a loaded config file or an include directory changed on disk."""
+        stamps = [(path, entry[0]) for path, entry in self._documents.items()]
+        stamps.extend(self._watch_dirs.items())
+        return not all(snapshot.file_unchanged(path, stamp) for path, stamp in stamps)
+
+    def reload(self) -> Set[str]:
+        """
+        Loads the config again, parsing only the files that changed and reusing the
+        commands built from unchanged ones. Returns the names of dicts and dynamic
+        dicts whose definition changed, was added or was removed.
+        """
+        old_sources = {**self.dicts, **self.dynamic_dicts}
+        cached_documents = self._documents
+
+        self.dicts = {}
+        self.dynamic_dicts = {}
+        self.commands = []
+        self.global_config = GlobalConfig()
+        self._parse_all(cached_documents)
+        self._save_snapshot()
 
+        # Drop commands whose documents are gone
+        live = {id(doc) for entry in self._documents.values() for doc in entry[1]}
+        self._command_cache = {key: value for key, value in self._command_cache.items() if key in live}
+
+        new_sources = {**self.dicts, **self.dynamic_dicts}
+        return {name for name in old_sources.keys() | new_sources.keys()
+                if old_sources.get(name) != new_sources.get(name)}
+
+    def _load_file(self, path: str, cached_documents: Dict[str, tuple]):
+        path = os.path.abspath(path)
+        if path in self._documents:
+            # Already loaded (included twice or an include cycle)
+            return
+
+        cached = cached_documents.get(path)
+        if cached is not None and snapshot.file_unchanged(path, cached[0]):
+            entry = cached
+        else:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            # Use utf-8-sig to handle BOM if present (e.g. VS Code on Windows)
+            content = raw.decode('utf-8-sig')
+            entry = (snapshot.file_stamp(path, raw), self._parse_documents(content), snapshot.env_names(content))
+        self._documents[path] = entry
+
+        for doc in entry[1]:
+            if isinstance(doc, dict) and 'include' in doc:
+                self._load_includes(path, doc['include'], cached_documents)
+            else:
+                self._apply_document(doc)
+
+    def _load_includes(self, path: str, patterns: Any, cached_documents: Dict[str, tuple]):
+        # Globs are relative to the including file, matches load in name order
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        base_dir = os.path.dirname(path)
+        for pattern in patterns or []:
+            pattern = os.path.join(base_dir, os.path.expanduser(str(pattern)))
+            matches = sorted(glob.glob(pattern))
+            if not matches and not glob.has_magic(pattern):
+                print(f"Warning: Included config file not found: {pattern}")
+            self._watch_dir(os.path.dirname(pattern))
+            for match in matches:
+                if os.path.isfile(match):
+                    self._load_file(match, cached_documents)
+
+    def _watch_dir(self, directory: str):
+        # The deepest directory without wildcards gets new entries when matches appear
+        while glob.has_magic(directory):
+            directory = os.path.dirname(directory)
+        if directory in self._watch_dirs:
+            return
+        try:
+            st = os.stat(directory)
+        except OSError:
+            return
+        self._watch_dirs[directory] = [st.st_mtime_ns, st.st_size, None]
+
+    def _parse_documents(self, content: str) -> List[Any]:
+        import yaml
+        try:
+            # One pass over the whole stream with the fastest available loader
+            return list(yaml.load_all(content, Loader=_safe_loader()))
+        except yaml.YAMLError:
+            # A broken document stops the stream: start over document by document,
+            # so the valid ones still load and each error is reported
+            return self._load_split(content)
+
+    def _load_split(self, content: str) -> List[Any]:
+        import yaml
+        # Per-document fallback: splits on '---', so it can't handle strings containing it
+        docs = [doc for doc in content.split('---') if doc.strip()]
+
+        parsed = []
         for doc_str in docs:
             try:
-                doc = yaml.safe_load(doc_str)
-                if not doc:
-                    continue
-                
-                if not isinstance(doc, dict):
-                    # Skip documents that aren't dictionaries (e.g. simple strings)
-                    continue
-                
-                # Check for explicit 'type'
-                doc_type = doc.get('type')
-                
-                # Check for 'config' root key (Declarative Metadata style)
-                if 'config' in doc:
-                    if isinstance(doc['config'], dict):
-                        # It's a config block
-                        cfg = doc['config']
-                        styles = self.global_config.styles.copy()
-                        
-                        if 'style-completion' in cfg:
-                            styles['completion-menu.completion'] = cfg['style-completion']
-                        if 'style-completion-current' in cfg:
-                             styles['completion-menu.completion.current'] = cfg['style-completion-current']
-                        if 'style-scrollbar-background' in cfg:
-                             styles['scrollbar.background'] = cfg['style-scrollbar-background']
-                        if 'style-scrollbar-button' in cfg:
-                             styles['scrollbar.button'] = cfg['style-scrollbar-button']
-                        
-                        self.global_config.styles = styles
-                        
-                        if 'style-placeholder-color' in cfg:
-                            self.global_config.placeholder_color = cfg['style-placeholder-color']
-                        if 'style-placeholder-text' in cfg:
-                            self.global_config.placeholder_text = cfg['style-placeholder-text']
-                            
-                        if 'history-size' in cfg:
-                             # Rule 1.2.19: Max 1000
-                             val = int(cfg['history-size'])
-                             self.global_config.history_size = min(val, 1000)
-                    else:
-                        pass # Valid key, but not a config dict (ignoring)
-                
-                # Rule 1.1.10: "inside type config"
-                elif doc_type == 'config':
-                    styles = self.global_config.styles.copy()
-                    
-                    if 'style-completion' in doc:
-                        styles['completion-menu.completion'] = doc['style-completion']
-                    if 'style-completion-current' in doc:
-                         styles['completion-menu.completion.current'] = doc['style-completion-current']
-                    if 'style-scrollbar-background' in doc:
-                         styles['scrollbar.background'] = doc['style-scrollbar-background']
-                    if 'style-scrollbar-button' in doc:
-                         styles['scrollbar.button'] = doc['style-scrollbar-button']
-                    
-                    self.global_config.styles = styles
-                    
-                    if 'style-placeholder-color' in doc:
-                        self.global_config.placeholder_color = doc['style-placeholder-color']
-                    if 'style-placeholder-text' in doc:
-                        self.global_config.placeholder_text = doc['style-placeholder-text']
-                        
-                    if 'history-size' in doc:
-                         # Rule 1.2.19: Max 1000
-                         val = int(doc['history-size'])
-                         self.global_config.history_size = min(val, 1000)
-                        
-                elif doc_type == 'dict':
-                    name = doc['name']
-                    data = self._process_data_structure(doc.get('data', []))
-                    self.dicts[name] = DictConfig(name=name, data=data)
-
-                elif doc_type == 'dynamic_dict':
-                    self.dynamic_dicts[doc['name']] = DynamicDictConfig(
-                        name=doc['name'],
-                        command=doc['command'],
-                        mapping=doc['mapping'],
-                        priority=doc.get('priority', 1),
-                        timeout=doc.get('timeout', 10), # Rule 3.9
-                        cache_ttl=doc.get('cache-ttl', 300) # Rule 1.2.2
-                    )
-
-                elif doc_type == 'command':
-                    self.commands.append(self._parse_command(doc))
-
+                parsed.append(yaml.load(doc_str, Loader=_safe_loader()))
             except yaml.YAMLError as e:
                 print(f"Error parsing YAML: {e}")
+        return parsed
 
-        self.dynamic_dicts = dict(sorted(self.dynamic_dicts.items(), key=lambda x: x[1].priority))
+    def _apply_document(self, doc: Any):
+        if not doc:
+            return
+        
+        if not isinstance(doc, dict):
+            # Skip documents that aren't dictionaries (e.g. simple strings)
+            return
+        
+        # Check for explicit 'type'
+        doc_type = doc.get('type')
+        
+        # Check for 'config' root key (Declarative Metadata style)
+        if 'config' in doc:
+            if isinstance(doc['config'], dict):
+                # It's a config block
+                self._apply_global_config(doc['config'])
+            else:
+                pass # Valid key, but not a config dict (ignoring)
+        
+        # Rule 1.1.10: "inside type config"
+        elif doc_type == 'config':
+            self._apply_global_config(doc)
+                
+        elif doc_type == 'dict':
+            name = doc['name']
+            data = self._process_data_structure(doc.get('data', []))
+            self.dicts[name] = DictConfig(name=name, data=data)
+
+        elif doc_type == 'dynamic_dict':
+            self.dynamic_dicts[doc['name']] = DynamicDictConfig(
+                name=doc['name'],
+                command=doc['command'],
+                mapping=doc['mapping'],
+                priority=doc.get('priority', 1),
+                timeout=doc.get('timeout', 10), # Rule 3.9
+                cache_ttl=doc.get('cache-ttl', 300) # Rule 1.2.2
+            )
+
+        elif doc_type == 'command':
+            cached = self._command_cache.get(id(doc))
+            if cached is None or cached[0] is not doc:
+                cached = (doc, self._parse_command(doc))
+                self._command_cache[id(doc)] = cached
+            self.commands.append(cached[1])
 
     def _parse_command(self, doc: Dict) -> CommandConfig:
-        subs = []
-        if 'sub' in doc:
-            subs = [self._parse_subcommand(s) for s in doc['sub']]
-        
+        # The subtree is only built once something walks into it (see LazyList)
         return CommandConfig(
             name=doc['name'],
             alias=doc['alias'],
             command=doc['command'],
             helper=doc.get('helper'),
-            sub=subs,
-            args=[self._parse_arg(a) for a in doc.get('args', [])],
+            sub=LazyList(_parse_subcommands, doc.get('sub') or []),
+            args=LazyList(_parse_args, doc.get('args') or []),
             timeout=doc.get('timeout', 0), # Rule 4.9
-            strict=doc.get('strict', False)
+            strict=doc.get('strict', False),
+            output_cache_ttl=max(0, int(doc.get('output-cache-ttl', 0)))
         )
 
-    def _parse_subcommand(self, doc: Dict) -> SubCommand:
+    @staticmethod
+    def _parse_subcommand(doc: Dict) -> SubCommand:
         subs = []
         if 'sub' in doc:
-            subs = [self._parse_subcommand(s) for s in doc['sub']]
+            subs = [ConfigLoader._parse_subcommand(s) for s in doc['sub']]
         
         return SubCommand(
             alias=doc['alias'],
             command=doc['command'],
             helper=doc.get('helper'),
             sub=subs,
-            args=[self._parse_arg(a) for a in doc.get('args', [])]
+            args=[ConfigLoader._parse_arg(a) for a in doc.get('args', [])]
         )
     
-    def _parse_arg(self, doc: Dict) -> ArgConfig:
+    @staticmethod
+    def _parse_arg(doc: Dict) -> ArgConfig:
         return ArgConfig(
             alias=doc['alias'],
             command=doc['command'],
             helper=doc.get('helper')
         )
+
+
+# Module level so that lazy subtrees can be pickled into the config snapshot
+def _parse_subcommands(docs: List[Dict]) -> List[SubCommand]:
+    return [ConfigLoader._parse_subcommand(s) for s in docs]
+
+
+def _parse_args(docs: List[Dict]) -> List[ArgConfig]:
+    return [ConfigLoader._parse_arg(a) for a in docs]
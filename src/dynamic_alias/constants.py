@@ -5,18 +5,26 @@ import sys
 DEFAULT_SHORTCUT = "dya"
 DEFAULT_NAME = "DYNAMIC ALIAS"
 
+DEFAULT_VERSION = "0.0.0"
+
+def _checkout_pyproject():
+    # Assuming src/dynamic_alias/constants.py, go up 3 levels
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    return os.path.join(base_dir, "pyproject.toml")
+
+def _pyproject_path():
+    toml_path = _checkout_pyproject()
+    if not os.path.exists(toml_path):
+        # Fallback: check current directory (common in dev/test)
+        cwd_toml = os.path.abspath("pyproject.toml")
+        if os.path.exists(cwd_toml):
+            toml_path = cwd_toml
+    return toml_path
+
 def get_config_from_toml():
     """Try to read from pyproject.toml"""
     try:
-        # Assuming src/dynamic_alias/constants.py, go up 3 levels
-        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        toml_path = os.path.join(base_dir, "pyproject.toml")
-        
-        if not os.path.exists(toml_path):
-            # Fallback: check current directory (common in dev/test)
-            cwd_toml = os.path.abspath("pyproject.toml")
-            if os.path.exists(cwd_toml):
-                toml_path = cwd_toml
+        toml_path = _pyproject_path()
         
         if os.path.exists(toml_path):
             with open(toml_path, "r", encoding="utf-8") as f:
@@ -53,4 +61,41 @@ def get_config_from_toml():
         pass
     return DEFAULT_SHORTCUT, DEFAULT_NAME
 
-CUSTOM_SHORTCUT, CUSTOM_NAME = get_config_from_toml()
+def get_version_from_toml():
+    """Version from the [project] section of pyproject.toml"""
+    try:
+        with open(_pyproject_path(), "r", encoding="utf-8") as f:
+            content = f.read()
+        import re
+        match = re.search(r'^\[project\][^\[]*?^version\s*=\s*["\']([^"\']+)["\']', content, re.MULTILINE | re.DOTALL)
+        if match:
+            return match.group(1)
+    except Exception:
+        pass
+    return DEFAULT_VERSION
+
+def get_config_from_metadata():
+    """(shortcut, version) of the installed distribution: its console script name and version"""
+    try:
+        from importlib import metadata
+        dist = metadata.distribution("dynamic_alias")
+    except Exception:
+        return None
+    shortcut = next((ep.name for ep in dist.entry_points
+                     if ep.group == "console_scripts" and ep.value.startswith("dynamic_alias.main")), DEFAULT_SHORTCUT)
+    return shortcut, dist.version
+
+try:
+    # Written by setup.py's build_py into the built package
+    from ._build_info import CUSTOM_SHORTCUT, CUSTOM_NAME, VERSION
+except ImportError:
+    _installed = None if os.path.exists(_checkout_pyproject()) else get_config_from_metadata()
+    if _installed is not None:
+        # Installed without a build step that writes _build_info; the name isn't part
+        # of the package metadata, so it still comes from [custom-build] when one is found
+        CUSTOM_SHORTCUT, VERSION = _installed
+        CUSTOM_NAME = get_config_from_toml()[1]
+    else:
+        # Running from a source checkout (dya_dev.py, tests)
+        CUSTOM_SHORTCUT, CUSTOM_NAME = get_config_from_toml()
+        VERSION = get_version_from_toml()
@@ -0,0 +1,226 @@
+import os
+import re
+import time
+import fcntl
+import uuid
+import shlex
+import signal
+import selectors
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+ENV_NAME_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+# Where the co-process shell gets our stdin/stdout/stderr; dash only redirects fds 0-9
+TERM_FDS = (7, 8, 9)
+
+
+class _ShellProcess:
+    """
+    The co-process, started with os.posix_spawn because subprocess can't move pass_fds to
+    other numbers: the terminal duplicates must be on fds the shell can close for each
+    command. Has the part of the subprocess.Popen interface that ShellCoprocess uses.
+    """
+    def __init__(self, shell: str):
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        # Non-inheritable copies above 9, so moving one into place can't overwrite another
+        sources = [fcntl.fcntl(fd, fcntl.F_DUPFD_CLOEXEC, 10) for fd in (stdin_r, stdout_w, stderr_w, 0, 1, 2)]
+        for fd in (stdin_r, stdout_w, stderr_w):
+            os.close(fd)
+        try:
+            actions = [(os.POSIX_SPAWN_DUP2, fd, target) for fd, target in zip(sources, (0, 1, 2) + TERM_FDS)]
+            self.pid = os.posix_spawn(shell, [shell], dict(os.environ), file_actions=actions)
+        finally:
+            for fd in sources:
+                os.close(fd)
+        self.stdin = os.fdopen(stdin_w, 'wb', buffering=0)
+        self.stdout = os.fdopen(stdout_r, 'rb', buffering=0)
+        self.stderr = os.fdopen(stderr_r, 'rb', buffering=0)
+        self.returncode: Optional[int] = None
+
+    def poll(self) -> Optional[int]:
+        if self.returncode is None:
+            try:
+                pid, status = os.waitpid(self.pid, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = self.pid, 0
+            if pid:
+                self.returncode = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        return self.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise subprocess.TimeoutExpired('shell co-process', timeout)
+            time.sleep(0.005)
+        return self.returncode
+
+    def kill(self):
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+
+class ShellCoprocess:
+    """
+    Long-lived /bin/sh that runs commands sent over its stdin.
+    Each command runs in a subshell, so `cd`/`exit`/variables don't leak between calls.
+    Completion is detected by a per-call sentinel that carries the exit status.
+    A crashed or hung co-process is killed and started again on the next call.
+    """
+    def __init__(self, shell: str = '/bin/sh'):
+        self.shell = shell
+        self.proc: Optional[_ShellProcess] = None
+        self.lock = threading.Lock()
+        self._env: Dict[str, str] = {}
+
+    def start(self):
+        # Commands in terminal mode talk to the user directly through TERM_FDS
+        self.proc = _ShellProcess(self.shell)
+        self._env = dict(os.environ)
+
+    def close(self):
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                self._kill_tree(self.proc.pid)
+            try:
+                self.proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                pass
+            for pipe in (self.proc.stdin, self.proc.stdout, self.proc.stderr):
+                try:
+                    pipe.close()
+                except Exception:
+                    pass
+            self.proc = None
+
+    def restart(self):
+        self.close()
+        self.start()
+
+    def is_alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def _children(self, pid: int) -> List[int]:
+        # Linux exposes direct children per task, elsewhere only the shell itself is killed
+        children = []
+        task_dir = f"/proc/{pid}/task"
+        try:
+            for tid in os.listdir(task_dir):
+                with open(os.path.join(task_dir, tid, "children")) as f:
+                    children.extend(int(c) for c in f.read().split())
+        except OSError:
+            pass
+        return children
+
+    def _kill_tree(self, pid: int):
+        for child in self._children(pid):
+            self._kill_tree(child)
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+    def _sync_env_script(self) -> str:
+        # Rule 3.8: environment is (re)imported before every execution
+        lines = []
+        current = os.environ
+        for key, value in current.items():
+            if self._env.get(key) != value and ENV_NAME_PATTERN.match(key):
+                lines.append(f"export {key}={shlex.quote(value)}")
+        for key in self._env:
+            if key not in current and ENV_NAME_PATTERN.match(key):
+                lines.append(f"unset {key}")
+        self._env = dict(current)
+        return "\n".join(lines)
+
+    def _build_script(self, command: str, sentinel: str, capture: bool) -> str:
+        if capture:
+            redirects = "</dev/null"
+        else:
+            stdin_fd, stdout_fd, stderr_fd = TERM_FDS
+            redirects = f"<&{stdin_fd} >&{stdout_fd} 2>&{stderr_fd}"
+        # The terminal duplicates stay with the co-process, commands only get them as 0/1/2
+        redirects += "".join(f" {fd}>&-" for fd in TERM_FDS)
+        env_script = self._sync_env_script()
+        # eval of a quoted string: an unbalanced quote, `)` or heredoc is a syntax error of
+        # this command only, and can't swallow the sentinel or end the co-process
+        return (
+            f"{env_script}\n"
+            f"( eval {shlex.quote(command)} ) {redirects}\n"
+            f"printf '\\n%s %d\\n' {sentinel} $?\n"
+            f"printf '\\n%s\\n' {sentinel} >&2\n"
+        )
+
+    def _read_until_sentinel(self, sentinel: str, timeout: Optional[float]) -> tuple:
+        out_marker = ("\n" + sentinel + " ").encode()
+        err_marker = ("\n" + sentinel + "\n").encode()
+        buffers = {self.proc.stdout: bytearray(), self.proc.stderr: bytearray()}
+        markers = {self.proc.stdout: out_marker, self.proc.stderr: err_marker}
+        done = {self.proc.stdout: False, self.proc.stderr: False}
+        deadline = time.monotonic() + timeout if timeout else None
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.proc.stdout, selectors.EVENT_READ)
+            selector.register(self.proc.stderr, selectors.EVENT_READ)
+            while not all(done.values()):
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(self.shell, timeout)
+                events = selector.select(remaining)
+                for key, _ in events:
+                    pipe = key.fileobj
+                    chunk = os.read(pipe.fileno(), 65536)
+                    if not chunk:
+                        raise RuntimeError("shell co-process exited unexpectedly")
+                    buffer = buffers[pipe]
+                    buffer.extend(chunk)
+                    # Only the tail can contain a marker that wasn't there before this chunk
+                    tail_start = max(0, len(buffer) - len(chunk) - len(markers[pipe]) - 16)
+                    if buffer.find(markers[pipe], tail_start) != -1 and buffer.endswith(b"\n"):
+                        # stdout marker line is "<sentinel> <status>\n"
+                        done[pipe] = True
+                        selector.unregister(pipe)
+
+        stdout = bytes(buffers[self.proc.stdout])
+        stderr = bytes(buffers[self.proc.stderr])
+        out_pos = stdout.rindex(out_marker)
+        returncode = int(stdout[out_pos + len(out_marker):].strip())
+        return returncode, stdout[:out_pos], stderr[:stderr.rindex(err_marker)]
+
+    def run(self, command: str, timeout: Optional[float] = None, capture: bool = True) -> subprocess.CompletedProcess:
+        """
+        Runs a command in the co-process.
+        capture=True returns stdout/stderr as text (stdin is /dev/null);
+        capture=False attaches the command to the user's terminal.
+        Raises subprocess.TimeoutExpired like subprocess.run does.
+        """
+        with self.lock:
+            if not self.is_alive():
+                self.restart()
+            sentinel = f"__DYA_{uuid.uuid4().hex}__"
+            try:
+                self.proc.stdin.write(self._build_script(command, sentinel, capture).encode())
+                returncode, stdout, stderr = self._read_until_sentinel(sentinel, timeout)
+            except subprocess.TimeoutExpired:
+                # Hung command: drop the whole co-process, next call starts a fresh one
+                self.close()
+                raise subprocess.TimeoutExpired(command, timeout)
+            except BaseException:
+                # Crash, broken pipe or Ctrl-C mid-command leaves the protocol out of sync
+                self.close()
+                raise
+
+        return subprocess.CompletedProcess(
+            command,
+            returncode,
+            stdout.decode(errors='replace') if capture else None,
+            stderr.decode(errors='replace') if capture else None,
+        )
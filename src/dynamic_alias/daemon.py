@@ -0,0 +1,225 @@
+"""
+Resident per-user daemon: keeps the loaded config, cache and resolver in memory and
+resolves one-shot invocations sent by the thin client (client.py). The client runs
+the resolved command itself, so it keeps its own terminal, environment and exit code.
+"""
+import os
+import io
+import sys
+import json
+import socket
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional
+from .config import ConfigLoader
+from .cache import CacheManager
+from .resolver import DataResolver
+from .executor import CommandExecutor, alias_path
+from .journal import journal_path
+from .snapshot import snapshot_path, env_stamp
+from .client import socket_path, peer_uid
+
+
+class _CapturedOutput(io.StringIO):
+    """Collects a request's output; reports the client's terminal so colors match."""
+    def __init__(self, tty: bool):
+        super().__init__()
+        self.tty = tty
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+class DyaDaemon:
+    def __init__(self, config_file: str, cache_file: str, socket_file: Optional[str] = None):
+        self.config_file = config_file
+        self.cache_file = cache_file
+        self.socket_file = socket_file or socket_path(config_file, cache_file)
+        self.running = False
+
+        self.loader = ConfigLoader(config_file)
+        self.loader.load(snapshot_path(cache_file))
+        self.cache = CacheManager(cache_file, True)
+        self.cache.load()
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.executor = CommandExecutor(self.resolver, direct_exec=True)
+        self._cache_stamp = self._stat(cache_file)
+        self._env = self._env_stamp()
+
+    @staticmethod
+    def _stat(path: str):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _env_names(self) -> List[str]:
+        # Env vars the config substitutes
+        return sorted({name for entry in self.loader._documents.values() for name in entry[2]})
+
+    def _env_stamp(self) -> Dict[str, Optional[str]]:
+        # Read from the requesting client's environment
+        return env_stamp(self._env_names())
+
+    def _refresh(self):
+        """Brings config and cache in line with disk and the client's environment."""
+        if self.loader.changed() or self._env_stamp() != self._env:
+            self.resolver.invalidate(self.loader.reload())
+            self._env = self._env_stamp()
+
+        cache_stamp = self._stat(self.cache_file)
+        if cache_stamp != self._cache_stamp:
+            # Written by another dya process (e.g. the interactive shell)
+            self.cache.load()
+            self._cache_stamp = cache_stamp
+
+        # Dynamic dicts go back through the in-memory cache, so cache-ttl still applies
+        for name in self.loader.dynamic_dicts:
+            self.resolver.resolved_data.pop(name, None)
+
+    def resolve(self, argv: List[str], tty: bool = False) -> Dict[str, Any]:
+        """Runs the one-shot path up to the point of executing the command."""
+        out = _CapturedOutput(tty)
+        response: Dict[str, Any] = {'status': 'ok', 'exit': 0}
+        with redirect_stdout(out):
+            if len(argv) == 1 and argv[0] in ('-h', '--help'):
+                self.executor.print_global_help()
+            else:
+                result = self.executor.find_command(argv)
+                if not result:
+                    print("Error: Command not found.")
+                else:
+                    cmd, variables, is_help, remaining = result
+                    if is_help:
+                        self.executor.print_help(cmd)
+                    elif self.executor.get_output_cache_ttl(cmd) > 0:
+                        # Output is captured and replayed in-process, the client can't exec it
+                        return {'status': 'fallback'}
+                    else:
+                        command = self.executor.prepare(cmd, variables, remaining)
+                        if command is not None:
+                            response['command'] = command
+                            response['argv'] = self.executor.build_argv(command)
+                            response['timeout'] = self.executor.get_timeout(cmd)
+                            global_config = self.loader.global_config
+                            if global_config.journal_size > 0:
+                                # The client runs the command, so it writes the journal entry
+                                response['journal'] = {
+                                    'path': journal_path(self.cache_file),
+                                    'size': global_config.journal_size * 1024,
+                                    'alias': alias_path(cmd),
+                                    'timing': global_config.journal_timing,
+                                }
+
+        # Captures any resolved dicts and usage stats
+        self.cache.save()
+        self._cache_stamp = self._stat(self.cache_file)
+        response['output'] = out.getvalue()
+        return response
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op')
+        if op == 'stop':
+            self.running = False
+            return {'status': 'ok'}
+        if op == 'env':
+            # Variables the client should send with its resolve request; sources get only these
+            if self.loader.changed():
+                self.resolver.invalidate(self.loader.reload())
+            return {'status': 'ok', 'env': self._env_names() + self.loader.global_config.daemon_env}
+        if op != 'resolve':
+            return {'status': 'fallback'}
+
+        # Requests are served one at a time, so the client's environment can be
+        # applied process-wide: sources and $${env.*} see what the client sees
+        os.environ.clear()
+        os.environ.update(request.get('env', {}))
+        try:
+            os.chdir(request.get('cwd') or '/')
+        except OSError:
+            pass
+        self._refresh()
+        return self.resolve(request.get('argv', []), bool(request.get('tty')))
+
+    def _peer_allowed(self, conn: socket.socket) -> bool:
+        # Linux: only the daemon's own user may talk to it (the socket is 0600 in a 0700 dir as well)
+        uid = peer_uid(conn)
+        return uid is None or uid == os.getuid()
+
+    def _serve_connection(self, conn: socket.socket):
+        with conn:
+            conn.settimeout(10)
+            if not self._peer_allowed(conn):
+                return
+            data = b''
+            while not data.endswith(b'\n'):
+                chunk = conn.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+            try:
+                response = self.handle(json.loads(data))
+            except Exception as e:
+                # Anything unexpected: let the client run the normal in-process path
+                response = {'status': 'fallback', 'error': str(e)}
+            try:
+                conn.sendall(json.dumps(response).encode() + b'\n')
+            except OSError:
+                # Client gave up (or refused us) before reading the answer
+                pass
+
+    def serve(self):
+        """Accepts requests until stopped or idle for daemon-idle-timeout seconds."""
+        idle_timeout = self.loader.global_config.daemon_idle_timeout
+        try:
+            os.unlink(self.socket_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Not ours to replace: clients won't talk to it either (see client.request)
+            print(f"Error: Can't take over {self.socket_file}: {e}")
+            return
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            server.bind(self.socket_file)
+        finally:
+            os.umask(old_umask)
+        server.listen(16)
+        server.settimeout(idle_timeout if idle_timeout > 0 else None)
+        self.running = True
+        try:
+            while self.running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                self._serve_connection(conn)
+                # Idle timeout re-reads config in case it changed while serving
+                idle_timeout = self.loader.global_config.daemon_idle_timeout
+                server.settimeout(idle_timeout if idle_timeout > 0 else None)
+        finally:
+            server.close()
+            try:
+                os.unlink(self.socket_file)
+            except FileNotFoundError:
+                pass
+            self.resolver.shutdown()
+            self.cache.save()
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python -m dynamic_alias.daemon <config file> <cache file>")
+        sys.exit(1)
+    try:
+        daemon = DyaDaemon(sys.argv[1], sys.argv[2])
+    except PermissionError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    daemon.serve()
+
+
+if __name__ == "__main__":
+    main()
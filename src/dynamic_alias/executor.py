@@ -1,18 +1,99 @@
+import os
 import re
+import sys
+import shutil
 import subprocess
 import shlex
-from typing import Dict, List, Any, Optional, Union
-from prompt_toolkit.shortcuts import print_formatted_text
-from prompt_toolkit.formatted_text import HTML
+from typing import Callable, Dict, List, Any, Optional, Union
 from .models import CommandConfig, SubCommand, ArgConfig
 from .resolver import DataResolver
 from .constants import CUSTOM_NAME
+from . import tracing
+from .journal import Journal, Measurement
+
+# ANSI codes for the markup tags used in this module's messages
+MARKUP_CODES = {'b': '1', 'red': '31', 'green': '32', 'yellow': '33', 'cyan': '36', 'gray': '90'}
+MARKUP_TAG = re.compile(r'<(/?)(\w+)>')
+# ${var} but not $${source.key}
+USER_VAR_PATTERN = re.compile(r'(?<!\$)\$\{(\w+)\}')
+
+
+def user_value_key(alias: str, var: str) -> str:
+    """Frecency store key for values of ${var} in the node with this alias."""
+    return f"{alias}\0{var}"
+
+
+def alias_path(command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]]) -> str:
+    """The matched nodes' aliases, e.g. 'complex ${arg1} sub1 deep': one journal entry per alias, whatever its values."""
+    return " ".join(node.alias for node in command_chain)
+
+
+class HTML(str):
+    """
+    Message markup (prompt_toolkit HTML subset). Only turned into a prompt_toolkit HTML
+    object when prompt_toolkit is already loaded, so one-shot runs never import it.
+    """
+
+
+def escape_markup(text) -> str:
+    """User text (commands, names) put into an HTML message, shown as is rather than read as tags."""
+    return str(text).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+def _render_markup(markup: str, color: bool) -> str:
+    stack = []
+
+    def replace(match):
+        closing, tag = match.group(1), match.group(2)
+        if tag not in MARKUP_CODES:
+            return ''
+        if closing:
+            if tag in stack:
+                stack.remove(tag)
+        else:
+            stack.append(tag)
+        if not color:
+            return ''
+        return '\033[0m' + ''.join(f'\033[{MARKUP_CODES[t]}m' for t in stack)
+
+    text = MARKUP_TAG.sub(replace, markup)
+    return text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"').replace('&amp;', '&')
+
+
+def print_formatted_text(*values, **kwargs):
+    if 'prompt_toolkit' in sys.modules and sys.stdout is sys.__stdout__:
+        # Interactive shell: prompt_toolkit is loaded anyway and knows the terminal best
+        from prompt_toolkit.shortcuts import print_formatted_text as pt_print_formatted_text
+        from prompt_toolkit.formatted_text import HTML as PtHTML
+        values = [PtHTML(str(v)) if isinstance(v, HTML) else v for v in values]
+        return pt_print_formatted_text(*values, **kwargs)
+
+    color = sys.stdout.isatty() and 'NO_COLOR' not in os.environ
+    print(*(_render_markup(v, color) if isinstance(v, HTML) else v for v in values))
+
+# Characters that require /bin/sh to interpret the rendered command
+SHELL_METACHARACTERS = set('|&;<>()$`\\"\'*?[]#~!{}\n')
+# Builtins have no executable on PATH, they only exist inside a shell
+SHELL_BUILTINS = {'cd', 'export', 'source', '.', 'alias', 'unalias', 'unset', 'set', 'exit', 'eval', 'exec', 'ulimit', 'umask', 'read', 'wait', 'trap', 'shift', 'command', 'builtin', 'type'}
 
 class CommandExecutor:
-    def __init__(self, data_resolver: DataResolver):
+    def __init__(self, data_resolver: DataResolver, direct_exec: bool = False, replace_process: bool = False):
         self.resolver = data_resolver
+        # Run commands without metacharacters via argv instead of /bin/sh
+        self.direct_exec = direct_exec
+        # One-shot mode: replace the current process with the command (POSIX only)
+        self.replace_process = replace_process and os.name == 'posix'
+        # Optional ShellCoprocess (interactive mode) used for commands that need a shell
+        self.coprocess = None
+        # Replay output of commands with output-cache-ttl; off with --dya-no-cache (results are still stored)
+        self.use_output_cache = True
+        # Execution journal (journal.py), set up by main when journal-size > 0
+        self.journal: Optional[Journal] = None
 
-    def _match_alias_parts(self, alias_parts: List[str], input_parts: List[str]) -> tuple[bool, Dict[str, Any], bool]:
+    def _match_alias_parts(self, alias_parts: List[str], input_parts: List[str],
+                           lookup: Optional[Callable[[str], Optional[List[Dict[str, Any]]]]] = None) -> tuple[bool, Dict[str, Any], bool]:
+        # lookup replaces resolver.resolve_one for $${source.key} tokens (completion must not run
+        # sources); when it returns None the source has no data yet and any word is accepted unverified.
         # Rule 1.3.5: Allow partial match if help is requested. 
         # We don't strictly enforce length check here if we find a help flag.
         
@@ -31,7 +112,13 @@ class CommandExecutor:
                 source_name = app_var_match.group(1) 
                 key_name = app_var_match.group(2)    
                 
-                data_list = self.resolver.resolve_one(source_name)
+                if lookup is not None:
+                    data_list = lookup(source_name)
+                    if data_list is None:
+                        variables[source_name] = {key_name: user_token}
+                        continue
+                else:
+                    data_list = self.resolver.resolve_one(source_name)
                 if not data_list:
                     return False, {}, False
                 
@@ -73,10 +160,11 @@ class CommandExecutor:
         return True, variables, False
 
     def find_command(self, args: List[str]) -> Optional[tuple[List[Union[CommandConfig, SubCommand, ArgConfig]], Dict[str, Any], bool, List[str]]]:
-        for cmd in self.resolver.config.commands:
-            chain, variables, is_help, remaining = self._try_match(cmd, args)
-            if chain:
-                return chain, variables, is_help, remaining
+        with tracing.span('match'):
+            for cmd in self.resolver.config.commands:
+                chain, variables, is_help, remaining = self._try_match(cmd, args)
+                if chain:
+                    return chain, variables, is_help, remaining
         return None
 
     def _try_match(self, command_obj: Union[CommandConfig, SubCommand], args: List[str]) -> tuple[List[Union[CommandConfig, SubCommand, ArgConfig]], Dict, bool, List[str]]:
@@ -131,31 +219,27 @@ class CommandExecutor:
         # Success match
         return current_chain, variables, False, remaining_args
 
-    def execute(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], variables: Dict[str, Any], remaining_args: List[str] = None):
-        
+    def is_strict_violation(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], remaining_args: List[str]) -> bool:
+        # Strict applies to the root COMMAND definition (SubCommand does not define strict).
+        root_cmd = command_chain[0]
+        is_strict = isinstance(root_cmd, CommandConfig) and root_cmd.strict
+        return bool(is_strict and remaining_args)
+
+    def get_timeout(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]]) -> int:
+        if command_chain and hasattr(command_chain[0], 'timeout'):
+            return command_chain[0].timeout
+        return 0
+
+    def get_output_cache_ttl(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]]) -> int:
+        if command_chain and hasattr(command_chain[0], 'output_cache_ttl'):
+            return command_chain[0].output_cache_ttl
+        return 0
+
+    def render_command(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], variables: Dict[str, Any], remaining_args: List[str] = None) -> str:
+        """Builds the final shell command from the matched chain and its variables."""
         if remaining_args is None:
             remaining_args = []
 
-        # Strict mode check
-        root_cmd = command_chain[0]
-        # Only check strict if it's a CommandConfig (SubCommand doesn't define strict, it inherits logic or handled by root?)
-        # Models say CommandConfig has strict. SubCommand does not.
-        # But SubCommand is part of the chain.
-        # Rule says "strict: Default false... when strict true, it will be rejected".
-        # Strict applies to the COMMAND definition.
-        # If I am executing a subcommand, does the strictness of the parent apply?
-        # Usually strict sets the policy for the alias.
-        # If I reached a subcommand, effectively I matched alias -> sub -> sub.
-        # The strictness should probably check the root command config.
-        
-        is_strict = False
-        if isinstance(root_cmd, CommandConfig):
-            is_strict = root_cmd.strict
-            
-        if is_strict and remaining_args:
-             print_formatted_text(HTML(f"<b><red>Error:</red></b> Strict mode enabled. Unknown arguments: {' '.join(remaining_args)}"))
-             return
-
         full_template = " ".join([obj.command for obj in command_chain])
         
         def app_var_replace(match):
@@ -180,29 +264,236 @@ class CommandExecutor:
             # Quote arguments to preserve spaces during shell concatenation
             quoted_extras = " ".join(shlex.quote(arg) for arg in remaining_args)
             cmd_resolved += " " + quoted_extras
+
+        return cmd_resolved
+
+    def build_argv(self, cmd_resolved: str) -> Optional[List[str]]:
+        """Returns the argv for a command that needs no shell, or None if /bin/sh is required."""
+        if any(ch in SHELL_METACHARACTERS for ch in cmd_resolved):
+            return None
+        argv = cmd_resolved.split()
+        if not argv or '=' in argv[0] or argv[0] in SHELL_BUILTINS:
+            return None
+        # Unknown executables go through the shell so the user gets its usual error
+        if shutil.which(argv[0]) is None:
+            return None
+        return argv
+
+    def _journal_timing(self) -> bool:
+        # journal-timing trades exec-replace for a measured child run
+        return self.journal is not None and self.resolver.config.global_config.journal_timing
+
+    def _exec_replace(self, cmd_resolved: str, argv: Optional[List[str]]):
+        # Nothing after exec runs, so persist state and flush output first
+        self.resolver.cache.save()
+        tracing.instant('exec')
+        tracing.finish()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        if argv:
+            os.execvp(argv[0], argv)
+        else:
+            os.execv('/bin/sh', ['/bin/sh', '-c', cmd_resolved])
+
+    def prepare(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], variables: Dict[str, Any], remaining_args: List[str] = None) -> Optional[str]:
+        """
+        Everything before running: strict check, rendering, usage stats and the
+        'Running:' header. Returns the command, or None when it must not run.
+        """
+        if remaining_args is None:
+            remaining_args = []
+
+        # Strict mode check
+        if self.is_strict_violation(command_chain, remaining_args):
+             print_formatted_text(HTML(f"<b><red>Error:</red></b> Strict mode enabled. Unknown arguments: {escape_markup(' '.join(remaining_args))}"))
+             return None
+
+        cmd_resolved = self.render_command(command_chain, variables, remaining_args)
+
+        # Per-source usage stats drive the interactive startup prefetch
+        self.resolver.record_usage(variables)
+        # Values typed for ${var} come back as completions next time
+        self.resolver.record_user_values([
+            (user_value_key(node.alias, var), variables[var])
+            for node in command_chain for var in USER_VAR_PATTERN.findall(node.alias)
+            if isinstance(variables.get(var), str)
+        ])
         
-        print_formatted_text(HTML(f"<b><green>Running:</green></b> {cmd_resolved}"))
+        print_formatted_text(HTML(f"<b><green>Running:</green></b> {escape_markup(cmd_resolved)}"))
         print("-" * 30)
+        return cmd_resolved
+
+    @staticmethod
+    def _output_key(cmd_resolved: str) -> str:
+        # Same command in another directory is another result (ls, git status...).
+        # Environment variables the command reads itself (AWS_PROFILE...) aren't part of it.
+        return f"{os.getcwd()}\0{cmd_resolved}"
+
+    def _replay_output(self, cmd_resolved: str, ttl: int) -> Optional[int]:
+        """Prints a stored result and returns its exit code; None when there is none to replay."""
+        if not self.use_output_cache:
+            return None
+        entry = self.resolver.cache.get_output(self._output_key(cmd_resolved), ttl)
+        if entry is None:
+            return None
+
+        import time
+        sys.stdout.write(entry.get('stdout', ''))
+        sys.stdout.flush()
+        sys.stderr.write(entry.get('stderr', ''))
+        sys.stderr.flush()
+        age = int(time.time()) - entry.get('timestamp', 0)
+        print_formatted_text(HTML(f"<gray>(cached output from {age}s ago)</gray>"))
+        return entry.get('exit_code', 0)
+
+    def _run_captured(self, cmd_resolved: str, argv: Optional[List[str]], timeout: Optional[int]):
+        """Runs the command with its output shown as it arrives and captured for the output cache."""
+        import codecs
+        import threading
+        process = subprocess.Popen(argv if argv else cmd_resolved, shell=not argv,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        captured = {}
+
+        def tee(pipe, stream, name):
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            parts = []
+            for chunk in iter(lambda: pipe.read1(65536), b''):
+                text = decoder.decode(chunk)
+                parts.append(text)
+                stream.write(text)
+                stream.flush()
+            parts.append(decoder.decode(b'', final=True))
+            captured[name] = ''.join(parts)
+
+        readers = [threading.Thread(target=tee, args=(process.stdout, sys.stdout, 'stdout'), daemon=True),
+                   threading.Thread(target=tee, args=(process.stderr, sys.stderr, 'stderr'), daemon=True)]
+        for reader in readers:
+            reader.start()
+        try:
+            exit_code = process.wait(timeout=timeout)
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        for reader in readers:
+            reader.join()
+
+        # Failures aren't replayed: the next run should try again
+        if exit_code == 0:
+            max_bytes = self.resolver.config.global_config.output_cache_size * 1024
+            self.resolver.cache.set_output(self._output_key(cmd_resolved), captured.get('stdout', ''),
+                                           captured.get('stderr', ''), exit_code, max_bytes)
+        return exit_code
+
+    def _measured(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], cmd_resolved: str,
+                  run: Callable[[], Optional[int]], children: bool = True) -> Optional[int]:
+        """Calls run (which returns the exit code) and journals wall time, exit code and child rusage."""
+        if self.journal is None:
+            return run()
+        measurement = Measurement(children)
+        exit_code, timed_out = None, False
+        try:
+            with measurement:
+                exit_code = run()
+        except subprocess.TimeoutExpired:
+            timed_out = True
+            raise
+        finally:
+            self.journal.record(alias_path(command_chain), cmd_resolved, measurement,
+                                exit_code if isinstance(exit_code, int) else None, timed_out)
+        return exit_code
+
+    def record_job(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], job):
+        """Journals a finished background job (jobs.py): wall time, exit code and timeout."""
+        if self.journal is None:
+            return
+        # No cpu/rss: other children (the user's foreground commands) are reaped meanwhile
+        measurement = Measurement(children=False)
+        measurement.start = job.start_time
+        measurement.wall = job.elapsed()
+        self.journal.record(alias_path(command_chain), job.command, measurement,
+                            None if job.timed_out else job.returncode, job.timed_out)
+
+    def execute(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], variables: Dict[str, Any], remaining_args: List[str] = None) -> Optional[int]:
+        """Runs the command; returns its exit code (1 on timeout or error, 130 on Ctrl+C), None if it didn't run."""
+        with tracing.span('execute', alias=command_chain[0].alias if command_chain else ''):
+            return self._execute(command_chain, variables, remaining_args)
+
+    def _execute(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]], variables: Dict[str, Any], remaining_args: List[str] = None) -> Optional[int]:
+        cmd_resolved = self.prepare(command_chain, variables, remaining_args)
+        if cmd_resolved is None:
+            return None
         
         try:
-            timeout = 0
-            if command_chain and hasattr(command_chain[0], 'timeout'):
-                timeout = command_chain[0].timeout
+            timeout = self.get_timeout(command_chain)
             
             # If timeout is 0, pass None to subprocess.run (means no timeout)
             effective_timeout = timeout if timeout > 0 else None
-                
-            subprocess.run(cmd_resolved, shell=True, timeout=effective_timeout)
+
+            argv = self.build_argv(cmd_resolved) if self.direct_exec else None
+
+            output_cache_ttl = self.get_output_cache_ttl(command_chain)
+            if output_cache_ttl > 0:
+                # Query aliases: replay a recent result, or run and capture (never exec-replaced)
+                exit_code = self._replay_output(cmd_resolved, output_cache_ttl)
+                if exit_code is None:
+                    exit_code = self._measured(command_chain, cmd_resolved,
+                                               lambda: self._run_captured(cmd_resolved, argv, effective_timeout))
+                self.resolver.cache.save()
+                return exit_code
+
+            if self.replace_process and effective_timeout is None and not self._journal_timing():
+                if self.journal is not None:
+                    # Nothing comes back after exec: the run is counted, without timing
+                    self.journal.record(alias_path(command_chain), cmd_resolved)
+                # No timeout to supervise: hand the process over to the command
+                self._exec_replace(cmd_resolved, argv)
+
+            if argv:
+                exit_code = self._measured(command_chain, cmd_resolved,
+                                           lambda: subprocess.run(argv, timeout=effective_timeout).returncode)
+            elif self.coprocess is not None:
+                # The co-process shell reaps the command, so there is no child rusage
+                exit_code = self._measured(command_chain, cmd_resolved,
+                                           lambda: self.coprocess.run(cmd_resolved, timeout=effective_timeout, capture=False).returncode,
+                                           children=False)
+            else:
+                exit_code = self._measured(command_chain, cmd_resolved,
+                                           lambda: subprocess.run(cmd_resolved, shell=True, timeout=effective_timeout).returncode)
             
             # Save valid cache state (dynamic dicts)
             self.resolver.cache.save()
+            return exit_code
 
         except KeyboardInterrupt:
             print("\nOperation cancelled.")
+            return 130
         except subprocess.TimeoutExpired:
             print(f"\nError: Command timed out after {timeout}s")
+            return 1
         except Exception as e:
             print(f"Execution error: {e}")
+            return 1
+
+    def refresh_sources(self, names: List[str]) -> bool:
+        """Force-refetches dynamic dicts (all of them when names is empty) and reports each one; False if any failed."""
+        dynamic_dicts = self.resolver.config.dynamic_dicts
+        unknown = [name for name in names if name not in dynamic_dicts]
+        if unknown:
+            print_formatted_text(HTML(f"<b><red>Error:</red></b> Unknown dynamic dict: {escape_markup(', '.join(unknown))}"))
+            return False
+
+        import time
+        start = time.monotonic()
+        counts = self.resolver.refresh(names or list(dynamic_dicts))
+        elapsed = time.monotonic() - start
+        for name, count in counts.items():
+            if count is None:
+                print_formatted_text(HTML(f"<b><red>Failed:</red></b> {escape_markup(name)} (cached data kept)"))
+            else:
+                print_formatted_text(HTML(f"<b><green>Refreshed:</green></b> {escape_markup(name)} ({count} item{'s' if count != 1 else ''})"))
+        print_formatted_text(HTML(f"<gray>{len(counts)} source(s) in {elapsed:.2f}s</gray>"))
+        return None not in counts.values()
 
     def print_help(self, command_chain: List[Union[CommandConfig, SubCommand, ArgConfig]]):
         """Prints helper text for the matched command chain."""
@@ -212,7 +503,7 @@ class CommandExecutor:
         for obj in command_chain:
             if obj.helper:
                 found_help = True
-                print_formatted_text(HTML(f"<b><yellow>Command:</yellow></b> {obj.alias}"))
+                print_formatted_text(HTML(f"<b><yellow>Command:</yellow></b> {escape_markup(obj.alias)}"))
                 print(obj.helper.strip())
                 print("-" * 20)
         
@@ -221,7 +512,7 @@ class CommandExecutor:
 
     def print_global_help(self):
         """Prints global helper text listing available dycts and commands."""
-        print_formatted_text(HTML(f"\n<b><cyan>{CUSTOM_NAME} Helper</cyan></b>\n"))
+        print_formatted_text(HTML(f"\n<b><cyan>{escape_markup(CUSTOM_NAME)} Helper</cyan></b>\n"))
 
         if self.resolver.config.dicts:
             print_formatted_text(HTML("<b><yellow>Dicts (Static):</yellow></b>"))
@@ -238,7 +529,7 @@ class CommandExecutor:
         if self.resolver.config.commands:
             print_formatted_text(HTML("<b><yellow>Commands:</yellow></b>"))
             for cmd in self.resolver.config.commands:
-                print_formatted_text(HTML(f"  <b>{cmd.name}</b> (alias: {cmd.alias})"))
+                print_formatted_text(HTML(f"  <b>{escape_markup(cmd.name)}</b> (alias: {escape_markup(cmd.alias)})"))
                 if cmd.helper:
                     for line in cmd.helper.strip().split('\n'):
                         print(f"    {line}")
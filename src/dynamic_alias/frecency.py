@@ -0,0 +1,52 @@
+"""
+Frecency store for values bound to user variables (${var}), offered as completions.
+Operates on a plain dict so CacheManager can persist it as JSON:
+
+    {key: {'last': ts, 'values': {value: [score, ts]}}}
+
+A score is the number of uses, halved every HALF_LIFE seconds of not being used.
+Both levels are bounded, so lookups cost the same however long history gets.
+"""
+import math
+from typing import Dict, List
+
+# Seconds after which an unused value's score is halved
+HALF_LIFE = 7 * 24 * 3600
+# Values kept per variable and variables kept overall, lowest score / least recent dropped first
+MAX_VALUES = 30
+MAX_KEYS = 200
+# Longer values (SQL text, messages...) aren't worth completing
+MAX_VALUE_LENGTH = 200
+
+
+def decayed(score: float, last: int, now: int) -> float:
+    return score * math.pow(0.5, max(now - last, 0) / HALF_LIFE)
+
+
+def record(store: Dict, key: str, value: str, now: int):
+    """Counts one use of value for key, trimming the store back to its bounds."""
+    if not value or len(value) > MAX_VALUE_LENGTH:
+        return
+    entry = store.get(key)
+    if not isinstance(entry, dict) or not isinstance(entry.get('values'), dict):
+        entry = store[key] = {'last': now, 'values': {}}
+    values = entry['values']
+    score, last = values.get(value) or (0.0, now)
+    values[value] = [decayed(score, last, now) + 1.0, now]
+    entry['last'] = now
+
+    if len(values) > MAX_VALUES:
+        for stale in sorted(values, key=lambda v: decayed(values[v][0], values[v][1], now))[:len(values) - MAX_VALUES]:
+            del values[stale]
+    if len(store) > MAX_KEYS:
+        for stale in sorted(store, key=lambda k: store[k].get('last', 0))[:len(store) - MAX_KEYS]:
+            del store[stale]
+
+
+def ranked(store: Dict, key: str, now: int) -> List[str]:
+    """Values recorded for key, highest frecency first."""
+    entry = store.get(key)
+    if not isinstance(entry, dict) or not isinstance(entry.get('values'), dict):
+        return []
+    values = entry['values']
+    return sorted(values, key=lambda v: decayed(values[v][0], values[v][1], now), reverse=True)
@@ -0,0 +1,264 @@
+"""
+Long-term command history, kept in its own file next to the cache file
+(~/.dya.json -> ~/.dya.history) so one-shot runs never load it.
+Commands are deduplicated in memory and carry a use count and first/last
+use timestamps. Prefix and substring search (`--dya-history`) go through an
+in-memory index built on first query; Ctrl+R in the shell is prompt_toolkit's
+own search over the loaded list.
+
+The file is a log, one JSON line per use: [command, count, first, last]. The
+last line for a command wins. Adding appends one line, so concurrent shells
+merge by reading what the others appended; the log is rewritten (compacted)
+once it holds far more lines than commands.
+
+The cache file's `_history` list (history-size entries) stays the recent
+window used for completion ranking and prefetch.
+"""
+import os
+import json
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Optional
+
+# Compact the log when it has this many more lines than twice its unique commands
+COMPACT_SLACK = 1000
+# Sorts after any character a command can contain, closing a prefix range
+PREFIX_RANGE_END = '\U0010ffff'
+
+
+class HistoryEntry(NamedTuple):
+    command: str
+    count: int
+    first: int
+    last: int
+
+
+def history_path(cache_file: str) -> str:
+    """History lives next to the cache file: ~/.dya.json -> ~/.dya.history"""
+    return os.path.splitext(cache_file)[0] + '.history'
+
+
+def _record(command: str, meta: List[int]) -> bytes:
+    return (json.dumps([command, *meta], separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class HistoryStore:
+    def __init__(self, path: str, retain: int = 10000):
+        self.path = path
+        self.retain = retain
+        # Oldest to newest; a repeated command moves to the end
+        self._entries: Dict[str, List[int]] = {}
+        # Log read so far: file identity, bytes consumed, lines applied
+        self._file = None
+        self._offset = 0
+        self._lines = 0
+        # Seeded entries aren't in the log yet; the next add writes them all
+        self._unsaved = False
+        self._version = 0
+        self._index_version = -1
+        self._newest_first: List[str] = []
+        self._corpus = ''
+        self._offsets: List[int] = []
+        self._sorted: List[str] = []
+        self._sorted_rows: List[int] = []
+        # ThreadedHistory loads off the UI thread while the prompt may already be adding
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self):
+        with self._lock:
+            self._entries = {}
+            self._file = None
+            self._offset = 0
+            self._lines = 0
+            self._catch_up()
+            self._version += 1
+
+    def _catch_up(self):
+        """Applies lines appended since the last read (other shells); all of them again if the file was replaced."""
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if (st.st_dev, st.st_ino) != self._file or st.st_size < self._offset:
+                    # Compacted by another shell, or first read
+                    self._entries = {}
+                    self._file = (st.st_dev, st.st_ino)
+                    self._offset = 0
+                    self._lines = 0
+                if st.st_size == self._offset:
+                    return
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Warning: Failed to load history: {e}")
+            return
+
+        if self._offset == 0 and data.startswith(b'{'):
+            # Format 1: one JSON object with every entry, rewritten on each add
+            self._load_legacy(data)
+            return
+        # Only whole lines: another shell may be halfway through appending one
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            self._apply(line)
+        self._offset += end
+        self._trim()
+        self._version += 1
+
+    def _apply(self, line: bytes):
+        try:
+            command, count, first, last = json.loads(line)
+            meta = [int(count), int(first), int(last)]
+        except (ValueError, TypeError):
+            return
+        if isinstance(command, str):
+            self._entries.pop(command, None)
+            self._entries[command] = meta
+            self._lines += 1
+
+    def _load_legacy(self, data: bytes):
+        try:
+            legacy = json.loads(data)
+            for command, count, first, last in legacy.get('entries', []):
+                self._entries[command] = [int(count), int(first), int(last)]
+        except (ValueError, TypeError, AttributeError) as e:
+            print(f"Warning: Failed to load history: {e}")
+        # Consumed as a whole; the next add rewrites it as a log
+        self._offset += len(data)
+        self._unsaved = True
+        self._version += 1
+
+    def seed(self, commands: List[str]):
+        """Imports an older plain list (oldest first), only into an empty store."""
+        with self._lock:
+            if self._entries or not commands:
+                return
+            for command in commands:
+                if isinstance(command, str) and command:
+                    self._touch(command, 0)
+            self._unsaved = True
+            self._version += 1
+
+    def save(self):
+        """Rewrites the log with one line per command (compaction)."""
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'wb') as f:
+                f.writelines(_record(command, meta) for command, meta in self._entries.items())
+                st = os.fstat(f.fileno())
+            os.replace(tmp, self.path)
+            self._file = (st.st_dev, st.st_ino)
+            self._offset = st.st_size
+            self._lines = len(self._entries)
+            self._unsaved = False
+        except OSError as e:
+            print(f"Warning: Failed to save history: {e}")
+
+    def _append(self, command: str):
+        try:
+            # One O_APPEND write per use: concurrent shells don't interleave lines
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, _record(command, self._entries[command]))
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Warning: Failed to save history: {e}")
+        # The offset stays put: the next catch-up reads this line back in file order,
+        # after anything another shell appended first
+
+    def _touch(self, command: str, now: int):
+        meta = self._entries.pop(command, None)
+        if meta is None:
+            meta = [0, now, now]
+        meta[0] += 1
+        meta[2] = now
+        self._entries[command] = meta
+
+    def _trim(self):
+        excess = len(self._entries) - self.retain
+        if excess > 0:
+            for oldest in list(self._entries)[:excess]:
+                del self._entries[oldest]
+
+    def add(self, command: str, now: Optional[int] = None):
+        """Records one use of command and appends it to the log. Other shells' additions are merged first."""
+        with self._lock:
+            command = command.strip()
+            if not command:
+                return
+            self._catch_up()
+            self._touch(command, int(time.time()) if now is None else now)
+            self._trim()
+            self._version += 1
+            if self._unsaved or self._lines > 2 * len(self._entries) + COMPACT_SLACK:
+                self.save()
+            else:
+                self._append(command)
+
+    def entry(self, command: str) -> Optional[HistoryEntry]:
+        meta = self._entries.get(command)
+        return HistoryEntry(command, *meta) if meta else None
+
+    def commands(self) -> List[str]:
+        """Unique commands, most recently used first."""
+        with self._lock:
+            self._ensure_index()
+            return list(self._newest_first)
+
+    def _ensure_index(self):
+        if self._index_version == self._version:
+            return
+        newest_first = list(reversed(self._entries))
+        folded = [c.casefold().replace('\n', ' ') for c in newest_first]
+        offsets = []
+        position = 0
+        for text in folded:
+            offsets.append(position)
+            position += len(text) + 1
+        order = sorted(range(len(folded)), key=folded.__getitem__)
+        self._newest_first = newest_first
+        self._corpus = "\n".join(folded)
+        self._offsets = offsets
+        self._sorted = [folded[i] for i in order]
+        self._sorted_rows = order
+        self._index_version = self._version
+
+    def search(self, query: str = '', limit: int = 50, prefix: bool = False) -> List[HistoryEntry]:
+        """
+        Commands containing query (or starting with it), case-insensitive, most recent first.
+        limit=0 returns every match.
+        """
+        with self._lock:
+            self._ensure_index()
+            needle = query.casefold()
+            rows: List[int] = []
+            if not needle:
+                rows = list(range(len(self._newest_first) if not limit else min(limit, len(self._newest_first))))
+            elif prefix:
+                lo = bisect_left(self._sorted, needle)
+                hi = bisect_left(self._sorted, needle + PREFIX_RANGE_END, lo)
+                rows = sorted(self._sorted_rows[lo:hi])
+                if limit:
+                    rows = rows[:limit]
+            else:
+                # Rows are newest first in the corpus, so the scan can stop at `limit`
+                corpus, offsets = self._corpus, self._offsets
+                pos = corpus.find(needle)
+                while pos != -1 and (not limit or len(rows) < limit):
+                    row = bisect_right(offsets, pos) - 1
+                    rows.append(row)
+                    if row + 1 >= len(offsets):
+                        break
+                    pos = corpus.find(needle, offsets[row + 1])
+            return [self.entry(self._newest_first[i]) for i in rows]
+
+
+def format_entry(entry: HistoryEntry) -> str:
+    last = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.last)) if entry.last else '-'
+    return f"{entry.count:>5}  {last:<16}  {entry.command}"
@@ -0,0 +1,165 @@
+import re
+import time
+import heapq
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Any, Optional, Tuple
+
+# Sorts after any character a value can contain, closing a prefix range
+PREFIX_RANGE_END = '\U0010ffff'
+# A match right after one of these counts as the start of a word
+WORD_SEPARATORS = set('-_./: ')
+# How many candidates are scored between two time budget checks
+BUDGET_CHECK_EVERY = 256
+# Rows scanned by one regex pass before checking the time budget
+SCAN_CHUNK_ROWS = 4096
+
+
+def fuzzy_score(value: str, query: str) -> float:
+    """
+    Scores a casefolded value against a casefolded query, 0 when it doesn't match.
+    Prefix > substring > subsequence; shorter values, earlier and word-aligned hits score higher.
+    """
+    if value.startswith(query):
+        return 3.0 - len(value) / 10000
+    pos = value.find(query)
+    if pos != -1:
+        word_start = pos == 0 or value[pos - 1] in WORD_SEPARATORS
+        return 2.0 + (0.5 if word_start else 0.0) - pos / 1000 - len(value) / 10000
+
+    # Greedy subsequence: fewer gaps and more word-aligned characters is better
+    score = 1.0
+    last = -1
+    for ch in query:
+        pos = value.find(ch, last + 1)
+        if pos == -1:
+            return 0.0
+        if pos != last + 1:
+            score -= 0.01 * min(pos - last - 1, 20)
+        if pos == 0 or value[pos - 1] in WORD_SEPARATORS:
+            score += 0.05
+        last = pos
+    return max(score, 0.001) - len(value) / 10000
+
+
+class ValueIndex:
+    """
+    Completion index for one (source, key) pair, built once per data refresh.
+    Holds the values as strings, a sorted view for prefix lookups and the
+    display metadata (the row's other mapped fields) for each row.
+    """
+    def __init__(self, data: List[Dict[str, Any]], key: str):
+        self.key = key
+        self.values: List[str] = [str(item.get(key, '')) for item in data]
+        self.metas: List[str] = [
+            "  ".join(f"{k}={v}" for k, v in item.items() if k != key)
+            for item in data
+        ]
+        order = sorted(range(len(self.values)), key=self.values.__getitem__)
+        self._sorted_values: List[str] = [self.values[i] for i in order]
+        self._sorted_rows: List[int] = order
+        self._rows_by_value: Dict[str, List[int]] = {}
+        for i, value in enumerate(self.values):
+            self._rows_by_value.setdefault(value, []).append(i)
+
+        # Casefolded corpus for fuzzy search, built on first fuzzy query
+        self._folded: Optional[List[str]] = None
+        self._corpus: str = ''
+        self._row_offsets: List[int] = []
+
+    def _ensure_fuzzy_index(self):
+        if self._folded is not None:
+            return
+        folded = [v.casefold().replace('\n', ' ') for v in self.values]
+        offsets = []
+        position = 0
+        for value in folded:
+            offsets.append(position)
+            position += len(value) + 1
+        self._corpus = "\n".join(folded)
+        self._row_offsets = offsets
+        self._folded = folded
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def prefix_rows(self, prefix: str) -> List[int]:
+        """Row numbers whose value starts with prefix, via binary search on the sorted view."""
+        if not prefix:
+            return list(range(len(self.values)))
+        lo = bisect_left(self._sorted_values, prefix)
+        hi = bisect_left(self._sorted_values, prefix + PREFIX_RANGE_END, lo)
+        return self._sorted_rows[lo:hi]
+
+    def top(self, prefix: str, limit: int, recent: Dict[str, int]) -> Tuple[List[int], int]:
+        """
+        Ranked rows for prefix: exact match first, then most recently used, then data order.
+        Returns at most `limit` rows (0 means unbounded) and the total number of matches.
+        """
+        rows = self.prefix_rows(prefix)
+
+        # Exact and recent rows are few, look them up directly instead of ranking every match
+        ranked = list(self._rows_by_value.get(prefix, []))
+        for value in sorted(recent, key=recent.__getitem__):
+            if value != prefix and value.startswith(prefix):
+                ranked.extend(self._rows_by_value.get(value, []))
+
+        if limit:
+            if len(ranked) >= limit:
+                return ranked[:limit], len(rows)
+            seen = set(ranked)
+            # Data order for the rest: the smallest row numbers that aren't already ranked
+            wanted = limit + len(ranked)
+            rest = range(min(wanted, len(rows))) if not prefix else sorted(rows)[:wanted]
+            ranked.extend(i for i in rest if i not in seen)
+            return ranked[:limit], len(rows)
+
+        seen = set(ranked)
+        return ranked + [i for i in sorted(rows) if i not in seen], len(rows)
+
+    def fuzzy(self, query: str, limit: int, budget: float) -> Tuple[List[int], int, bool]:
+        """
+        Scored subsequence search over the casefolded values, best first.
+        Candidate rows come from one regex scan of the joined corpus; scoring
+        stops when `budget` seconds are spent. Returns (rows, matches, complete).
+        """
+        self._ensure_fuzzy_index()
+        needle = query.casefold()
+        if not needle:
+            rows, total = self.top(query, limit, {})
+            return rows, total, True
+
+        deadline = time.perf_counter() + budget
+        # Leftmost subsequence match within one line. Starting with a literal lets the regex
+        # engine jump between occurrences of the first character; negated classes never backtrack.
+        first, rest = re.escape(needle[0]), needle[1:]
+        pattern = re.compile(first + ''.join(f'[^\\n{re.escape(ch)}]*{re.escape(ch)}' for ch in rest))
+        folded = self._folded
+        offsets = self._row_offsets
+        corpus = self._corpus
+        row_count = len(folded)
+
+        scored: List[Tuple[float, int]] = []
+        complete = True
+        for chunk_start in range(0, row_count, SCAN_CHUNK_ROWS):
+            if time.perf_counter() > deadline:
+                complete = False
+                break
+            chunk_end = min(chunk_start + SCAN_CHUNK_ROWS, row_count)
+            endpos = offsets[chunk_end] if chunk_end < row_count else len(corpus)
+            pos = offsets[chunk_start]
+            while True:
+                match = pattern.search(corpus, pos, endpos)
+                if match is None:
+                    break
+                row = bisect_right(offsets, match.start()) - 1
+                scored.append((fuzzy_score(folded[row], needle), -row))
+                # One hit per row: continue from the next line
+                pos = offsets[row + 1] if row + 1 < row_count else endpos
+                if len(scored) % BUDGET_CHECK_EVERY == 0 and time.perf_counter() > deadline:
+                    complete = False
+                    break
+            if not complete:
+                break
+
+        best = heapq.nlargest(limit, scored) if limit else sorted(scored, reverse=True)
+        return [-neg_row for _, neg_row in best], len(scored), complete
@@ -0,0 +1,211 @@
+"""
+Background jobs for the interactive shell: `alias ... &` runs the command with its
+output captured, while the prompt stays usable. Managed with the jobs/fg/kill built-ins.
+Finished jobs keep their output until `fg` shows it or `jobs -c` clears them.
+"""
+import os
+import time
+import signal
+import subprocess
+import threading
+from typing import Callable, Dict, List, Optional
+
+# Captured output kept per job; older output is dropped first
+MAX_OUTPUT_BYTES = 1024 * 1024
+READ_CHUNK = 65536
+
+
+class Job:
+    def __init__(self, job_id: int, command: str, process: subprocess.Popen,
+                 on_exit: Optional[Callable[['Job'], None]] = None):
+        self.id = job_id
+        self.command = command
+        self.process = process
+        self.on_exit = on_exit
+        self.start_time = time.time()
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self.returncode: Optional[int] = None
+        self.timed_out = False
+        self.reported = False
+        # Tail of the output; `dropped` bytes were discarded from its front
+        self.output = bytearray()
+        self.dropped = 0
+        self.changed = threading.Condition()
+
+    @property
+    def pid(self) -> int:
+        return self.process.pid
+
+    @property
+    def done(self) -> bool:
+        return self.returncode is not None
+
+    def status(self) -> str:
+        if not self.done:
+            return "Running"
+        if self.timed_out:
+            return "Timed out"
+        if self.returncode == 0:
+            return "Done"
+        if self.returncode < 0:
+            try:
+                return f"Killed ({signal.Signals(-self.returncode).name})"
+            except ValueError:
+                return f"Killed (signal {-self.returncode})"
+        return f"Exit {self.returncode}"
+
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    def _append(self, data: bytes):
+        with self.changed:
+            self.output += data
+            excess = len(self.output) - MAX_OUTPUT_BYTES
+            if excess > 0:
+                del self.output[:excess]
+                self.dropped += excess
+            self.changed.notify_all()
+
+    def read_from(self, position: int) -> tuple:
+        """Output written since `position` (a byte count from the start), and the new position."""
+        with self.changed:
+            start = max(position - self.dropped, 0)
+            return bytes(self.output[start:]), self.dropped + len(self.output)
+
+
+class JobManager:
+    def __init__(self):
+        self.jobs: Dict[int, Job] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # Called with the job from its watcher thread when it finishes
+        self.on_done: Optional[Callable[[Job], None]] = None
+
+    def start(self, command: str, argv: Optional[List[str]] = None, timeout: int = 0,
+              on_exit: Optional[Callable[[Job], None]] = None) -> Job:
+        """
+        Starts a command in its own process group with stdout/stderr captured.
+        on_exit is called with the job from its watcher thread once it has finished.
+        """
+        process = subprocess.Popen(
+            argv if argv else command, shell=not argv,
+            stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            # Own session: Ctrl+C at the prompt must not reach background jobs
+            start_new_session=True,
+        )
+        with self._lock:
+            job = Job(self._next_id, command, process, on_exit)
+            self.jobs[job.id] = job
+            self._next_id += 1
+
+        threading.Thread(target=self._watch, args=(job, timeout), name=f'dya-job-{job.id}', daemon=True).start()
+        return job
+
+    def _watch(self, job: Job, timeout: int):
+        timer = None
+        if timeout > 0:
+            def expire():
+                job.timed_out = True
+                self._signal(job, signal.SIGKILL)
+            timer = threading.Timer(timeout, expire)
+            timer.daemon = True
+            timer.start()
+
+        fd = job.process.stdout.fileno()
+        try:
+            while True:
+                data = os.read(fd, READ_CHUNK)
+                if not data:
+                    break
+                job._append(data)
+        except OSError:
+            pass
+        finally:
+            job.process.stdout.close()
+            returncode = job.process.wait()
+            if timer is not None:
+                timer.cancel()
+
+        with job.changed:
+            job.finished = time.monotonic()
+            job.returncode = returncode
+            job.changed.notify_all()
+        if job.on_exit is not None:
+            job.on_exit(job)
+        if self.on_done is not None:
+            self.on_done(job)
+
+    def get(self, job_id: Optional[int] = None) -> Optional[Job]:
+        """A job by id, or the most recent one when job_id is None."""
+        with self._lock:
+            if job_id is None:
+                return self.jobs[max(self.jobs)] if self.jobs else None
+            return self.jobs.get(job_id)
+
+    def running(self) -> List[Job]:
+        with self._lock:
+            return [job for job in self.jobs.values() if not job.done]
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self.jobs.values())
+
+    def finished_unreported(self) -> List[Job]:
+        """Finished jobs not yet announced; each one is returned once. The job and its output are kept."""
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job.done and not job.reported]
+            for job in finished:
+                job.reported = True
+            return finished
+
+    def remove(self, job: Job):
+        """Forgets a finished job (after `fg` showed its output)."""
+        with self._lock:
+            if job.done:
+                self.jobs.pop(job.id, None)
+
+    def clear(self) -> List[Job]:
+        """Forgets every finished job; returns them."""
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job.done]
+            for job in finished:
+                del self.jobs[job.id]
+            return finished
+
+    def _signal(self, job: Job, sig: int) -> bool:
+        if job.done:
+            return False
+        try:
+            os.killpg(job.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            return False
+        return True
+
+    def kill(self, job: Job, sig: int = signal.SIGTERM) -> bool:
+        return self._signal(job, sig)
+
+    def follow(self, job: Job, write: Callable[[bytes], None]):
+        """
+        Foreground: writes the captured output, then new output as it arrives, until the
+        job exits. Ctrl+C is forwarded to the job, as it would be for a foreground command.
+        """
+        position = 0
+        while True:
+            try:
+                with job.changed:
+                    data, position = job.read_from(position)
+                    if not data and not job.done:
+                        job.changed.wait(0.5)
+                        continue
+                if data:
+                    write(data)
+                elif job.done:
+                    return
+            except KeyboardInterrupt:
+                self._signal(job, signal.SIGINT)
+
+    def shutdown(self):
+        """Terminates jobs still running (interactive shell exit)."""
+        for job in self.running():
+            self._signal(job, signal.SIGTERM)
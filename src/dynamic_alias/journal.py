@@ -0,0 +1,197 @@
+"""
+Execution journal: one JSON line per command run by CommandExecutor.execute,
+kept next to the cache file (~/.dya.json -> ~/.dya.journal) and rotated to
+<journal>.1 past journal-size KiB. `dya --dya-report` summarizes it per alias.
+
+    {"alias": "pg ${env}", "hash": "3f2a...", "start": 1760000000.123, "wall": 1.52,
+     "exit": 0, "timeout": false, "cpu": 0.41, "rss": 52340}
+
+wall, exit, cpu and rss are null when unknown: exec-replaced runs (nothing comes
+back to time them), Ctrl+C (no exit code), co-process runs (no child rusage).
+"""
+import os
+import sys
+import json
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Aliases listed in each section of the report
+REPORT_TOP = 10
+ALIAS_WIDTH = 36
+
+
+def journal_path(cache_file: str) -> str:
+    """Journal lives next to the cache file: ~/.dya.json -> ~/.dya.journal"""
+    return os.path.splitext(cache_file)[0] + '.journal'
+
+
+def command_hash(command: str) -> str:
+    # Tells runs of one alias apart by their rendered command without storing it (it may hold secrets)
+    return f"{zlib.crc32(command.encode()):08x}"
+
+
+def _children_usage():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+class Measurement:
+    """Wall time and child CPU/max RSS around one run."""
+    def __init__(self, children: bool = True):
+        self.children = children
+        self.start = time.time()
+        self.wall: Optional[float] = None
+        self.cpu: Optional[float] = None
+        self.rss: Optional[int] = None
+
+    def __enter__(self):
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self._usage = _children_usage() if self.children else None
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall = time.perf_counter() - self._started
+        before = self._usage
+        after = _children_usage() if before is not None else None
+        if after is not None:
+            # Children reaped meanwhile: the command, plus background fetches finishing at the same time
+            self.cpu = (after.ru_utime + after.ru_stime) - (before.ru_utime + before.ru_stime)
+            # ru_maxrss is the largest child so far, so it only belongs to this run if it grew
+            if after.ru_maxrss > before.ru_maxrss:
+                self.rss = after.ru_maxrss // 1024 if sys.platform == 'darwin' else after.ru_maxrss
+        return False
+
+
+class Journal:
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+
+    def record(self, alias: str, command: str, measurement: Optional[Measurement] = None,
+               exit_code: Optional[int] = None, timed_out: bool = False):
+        entry = {
+            'alias': alias,
+            'hash': command_hash(command),
+            'start': round(measurement.start if measurement else time.time(), 3),
+            'wall': round(measurement.wall, 4) if measurement and measurement.wall is not None else None,
+            'exit': exit_code,
+            'timeout': timed_out,
+            'cpu': round(measurement.cpu, 4) if measurement and measurement.cpu is not None else None,
+            'rss': measurement.rss if measurement else None,
+        }
+        line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+        try:
+            self._rotate()
+            # One O_APPEND write per record: concurrent runs don't interleave lines
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            print(f"Warning: Failed to write journal: {e}")
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        os.replace(self.path, self.path + '.1')
+
+
+def read_records(path: str) -> List[Dict[str, Any]]:
+    """Records from the rotated journal then the current one, oldest first. Damaged lines are skipped."""
+    records = []
+    for name in (path + '.1', path):
+        try:
+            with open(name, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and isinstance(record.get('alias'), str):
+                        records.append(record)
+        except OSError:
+            continue
+    return records
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-alias run counts, failures, timeouts, wall time percentiles, mean CPU and max RSS."""
+    by_alias: Dict[str, List[Dict[str, Any]]] = {}
+    for record in records:
+        by_alias.setdefault(record['alias'], []).append(record)
+
+    summaries = []
+    for alias, runs in by_alias.items():
+        walls = sorted(r['wall'] for r in runs if isinstance(r.get('wall'), (int, float)))
+        cpus = [r['cpu'] for r in runs if isinstance(r.get('cpu'), (int, float))]
+        rss = [r['rss'] for r in runs if isinstance(r.get('rss'), int)]
+        summary = {
+            'alias': alias,
+            'runs': len(runs),
+            'timed': len(walls),
+            'failures': sum(1 for r in runs if r.get('timeout') or r.get('exit') not in (0, None)),
+            'timeouts': sum(1 for r in runs if r.get('timeout')),
+            'cpu': sum(cpus) / len(cpus) if cpus else None,
+            'rss': max(rss) if rss else None,
+        }
+        for pct in (50, 90, 99):
+            summary[f'p{pct}'] = percentile(walls, pct) if walls else None
+        summary['max'] = walls[-1] if walls else None
+        summaries.append(summary)
+    return summaries
+
+
+def _seconds(value: Optional[float]) -> str:
+    if value is None:
+        return '-'
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.2f}s"
+
+
+def _alias(alias: str) -> str:
+    return alias if len(alias) <= ALIAS_WIDTH else alias[:ALIAS_WIDTH - 1] + '…'
+
+
+def format_report(records: List[Dict[str, Any]], top: int = REPORT_TOP) -> str:
+    if not records:
+        return "No runs recorded yet."
+    summaries = summarize(records)
+    lines = [f"{len(records)} runs of {len(summaries)} aliases", ""]
+
+    slowest = sorted((s for s in summaries if s['timed']), key=lambda s: s['p90'], reverse=True)[:top]
+    lines.append("Slowest (by p90 wall time)")
+    lines.append(f"{'alias':<{ALIAS_WIDTH}} {'runs':>5} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8} {'cpu':>8} {'rss':>9}")
+    for s in slowest:
+        rss = f"{s['rss'] // 1024}MiB" if s['rss'] is not None else '-'
+        lines.append(f"{_alias(s['alias']):<{ALIAS_WIDTH}} {s['timed']:>5} {_seconds(s['p50']):>8} {_seconds(s['p90']):>8} "
+                     f"{_seconds(s['p99']):>8} {_seconds(s['max']):>8} {_seconds(s['cpu']):>8} {rss:>9}")
+    if not slowest:
+        lines.append("(no timed runs: one-shot commands without a timeout replace dya, set journal-timing: true to time them)")
+
+    failing = sorted((s for s in summaries if s['failures']),
+                     key=lambda s: (s['failures'] / s['runs'], s['failures']), reverse=True)[:top]
+    lines += ["", "Most failures"]
+    lines.append(f"{'alias':<{ALIAS_WIDTH}} {'runs':>5} {'failed':>7} {'timeout':>8} {'rate':>6}")
+    for s in failing:
+        lines.append(f"{_alias(s['alias']):<{ALIAS_WIDTH}} {s['runs']:>5} {s['failures']:>7} {s['timeouts']:>8} "
+                     f"{s['failures'] / s['runs']:>6.0%}")
+    if not failing:
+        lines.append("(none)")
+    return "\n".join(lines)
@@ -7,12 +7,13 @@ from typing import List
 # For local dev without install:
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
-from .config import ConfigLoader
-from .cache import CacheManager
-from .resolver import DataResolver
-from .executor import CommandExecutor
-from .shell import InteractiveShell
+# Only light modules at import time: with the daemon enabled, a one-shot invocation
+# is answered by the thin client before config, resolver or executor are loaded.
+# shell (prompt_toolkit) and batch are imported where they are used.
 from .constants import CUSTOM_SHORTCUT
+from .client import daemon_enabled, run_client
+from .complete import COMPLETE_COMMAND, completion_script, run_complete
+from . import tracing
 
 # Constants
 CACHE_ENABLED = True
@@ -26,9 +27,27 @@ def main():
     
     config_flag = f"--{CUSTOM_SHORTCUT}-config"
     cache_flag = f"--{CUSTOM_SHORTCUT}-cache"
+    batch_flag = f"--{CUSTOM_SHORTCUT}-batch"
+    parallel_flag = f"--{CUSTOM_SHORTCUT}-parallel"
+    completion_flag = f"--{CUSTOM_SHORTCUT}-completion"
+    offline_flag = f"--{CUSTOM_SHORTCUT}-offline"
+    refresh_flag = f"--{CUSTOM_SHORTCUT}-refresh"
+    no_cache_flag = f"--{CUSTOM_SHORTCUT}-no-cache"
+    history_flag = f"--{CUSTOM_SHORTCUT}-history"
+    profile_flag = f"--{CUSTOM_SHORTCUT}-profile"
+    report_flag = f"--{CUSTOM_SHORTCUT}-report"
     
     config_file_override = None
     cache_file_override = None
+    batch_source = None
+    parallel = 1
+    completion_shell = None
+    offline = False
+    refresh_sources = None
+    no_cache = False
+    history_query = None
+    profile_file = None
+    report = False
     
     filtered_args = []
     
@@ -51,9 +70,79 @@ def main():
             else:
                 print(f"Error: {cache_flag} requires an argument")
                 sys.exit(1)
+        elif arg == batch_flag:
+            if i + 1 < len(args):
+                batch_source = args[i+1]
+                i += 2
+                continue
+            else:
+                print(f"Error: {batch_flag} requires a file or '-' for stdin")
+                sys.exit(1)
+        elif arg == parallel_flag:
+            if i + 1 < len(args) and args[i+1].isdigit() and int(args[i+1]) > 0:
+                parallel = int(args[i+1])
+                i += 2
+                continue
+            else:
+                print(f"Error: {parallel_flag} requires a positive integer")
+                sys.exit(1)
+        elif arg == completion_flag:
+            if i + 1 < len(args):
+                completion_shell = args[i+1]
+                i += 2
+                continue
+            else:
+                print(f"Error: {completion_flag} requires a shell (bash, zsh or fish)")
+                sys.exit(1)
+        elif arg == profile_flag:
+            if i + 1 < len(args):
+                profile_file = args[i+1]
+                i += 2
+                continue
+            else:
+                print(f"Error: {profile_flag} requires a trace file")
+                sys.exit(1)
+        elif arg == offline_flag:
+            offline = True
+            i += 1
+        elif arg == report_flag:
+            report = True
+            i += 1
+        elif arg == no_cache_flag:
+            no_cache = True
+            i += 1
+        elif arg == history_flag:
+            # One optional query (quoted if it has spaces), `^text` searches by prefix;
+            # `--` before a query that starts with '-'
+            history_query = ''
+            i += 1
+            if i + 1 < len(args) and args[i] == '--':
+                history_query = args[i + 1]
+                i += 2
+            elif i < len(args) and not args[i].startswith('-'):
+                history_query = args[i]
+                i += 1
+        elif arg == refresh_flag:
+            # One optional argument, comma-separated source names; without it every dynamic dict
+            refresh_sources = []
+            i += 1
+            if i < len(args) and not args[i].startswith('-'):
+                refresh_sources = [name for name in args[i].split(',') if name]
+                i += 1
         else:
             filtered_args.append(arg)
             i += 1
+
+    # Phase spans as Chrome trace JSON, from --dya-profile or DYA_PROFILE
+    tracing.start_from_env(profile_file)
+
+    if completion_shell is not None:
+        script = completion_script(completion_shell)
+        if script is None:
+            print(f"Error: {completion_flag} supports bash, zsh or fish")
+            sys.exit(1)
+        sys.stdout.write(script)
+        return
             
     # 2. Resolve Paths
     if config_file_override:
@@ -70,18 +159,88 @@ def main():
         default_json = f"~/.{CUSTOM_SHORTCUT}.json"
         final_cache_path = _resolve_path(path_options_json, default_json)
 
+    if history_query is not None:
+        if filtered_args or batch_source:
+            print(f'Error: {history_flag} takes one argument (quote it, e.g. "pg prod") and no command')
+            sys.exit(1)
+        from .history import HistoryStore, history_path, format_entry
+        store = HistoryStore(history_path(final_cache_path))
+        store.load()
+        if not len(store) and CACHE_ENABLED:
+            from .cache import CacheManager
+            cache = CacheManager(final_cache_path, CACHE_ENABLED)
+            cache.load()
+            store.seed(cache.get_history())
+        prefix = history_query.startswith('^')
+        for entry in store.search(history_query[1:] if prefix else history_query, limit=50, prefix=prefix):
+            print(format_entry(entry))
+        return
+
+    if report:
+        from .journal import journal_path, read_records, format_report
+        print(format_report(read_records(journal_path(final_cache_path))))
+        return
+
+    # Shell Tab completion: cached data only, never runs a dynamic source
+    if filtered_args and filtered_args[0] == COMPLETE_COMMAND:
+        sys.exit(run_complete(filtered_args[1:], final_config_path, final_cache_path))
+
+    # One-shot through the resident daemon, when enabled and reachable
+    # (not while profiling: the phases to measure would run in the daemon)
+    if (daemon_enabled() and filtered_args and not batch_source and not offline and refresh_sources is None
+            and not tracing.enabled() and CACHE_ENABLED and os.path.exists(final_config_path)):
+        exit_code = run_client(filtered_args, final_config_path, final_cache_path)
+        if exit_code is not None:
+            sys.exit(exit_code)
+
+    with tracing.span('import'):
+        from .config import ConfigLoader
+        from .cache import CacheManager
+        from .resolver import DataResolver
+        from .executor import CommandExecutor
+        from .snapshot import snapshot_path
+
     # 3. Load App
     loader = ConfigLoader(final_config_path)
-    loader.load()
+    loader.load(snapshot_path(final_cache_path) if CACHE_ENABLED else None)
     
     cache = CacheManager(final_cache_path, CACHE_ENABLED)
     cache.load()
     
     resolver = DataResolver(loader, cache)
+    resolver.offline = offline
     # Don't resolve_all() at startup - use lazy loading
     # resolve_all() is only called for non-interactive command execution
     
-    executor = CommandExecutor(resolver)
+    # One-shot invocations exec the command in place of this process
+    one_shot = bool(filtered_args) and not batch_source
+    executor = CommandExecutor(resolver, direct_exec=True, replace_process=one_shot)
+    executor.use_output_cache = not no_cache
+    if CACHE_ENABLED and loader.global_config.journal_size > 0:
+        from .journal import Journal, journal_path
+        executor.journal = Journal(journal_path(final_cache_path), loader.global_config.journal_size * 1024)
+
+    if refresh_sources is not None:
+        if offline:
+            print(f"Error: {refresh_flag} can't be combined with {offline_flag}")
+            sys.exit(1)
+        if filtered_args or batch_source:
+            print(f"Error: {refresh_flag} takes one argument (e.g. nodes,instances) and no command")
+            sys.exit(1)
+        sys.exit(0 if executor.refresh_sources(refresh_sources) else 1)
+
+    if batch_source:
+        # Batch mode: config, cache and resolution are paid once for every line
+        from .batch import BatchRunner
+        runner = BatchRunner(executor, parallel)
+        try:
+            lines = runner.read_lines(batch_source)
+        except OSError as e:
+            print(f"Error: Failed to read batch input: {e}")
+            sys.exit(1)
+        failures = runner.run(lines)
+        cache.save()
+        sys.exit(1 if failures else 0)
 
     if filtered_args:
         # Global help check
@@ -95,16 +254,21 @@ def main():
         result = executor.find_command(filtered_args)
         if result:
             cmd, vars, is_help, remaining = result
+            exit_code = None
             if is_help:
                 executor.print_help(cmd)
             else:
-                executor.execute(cmd, vars, remaining)
+                exit_code = executor.execute(cmd, vars, remaining)
             # Save cache after execution (captures any resolved dicts)
             cache.save()
+            if exit_code:
+                # Killed by a signal: the shell convention, 128 + signal number
+                sys.exit(exit_code if exit_code > 0 else 128 - exit_code)
         else:
             print("Error: Command not found.")
     else:
         # Interactive mode - lazy loading via resolve_one() in completer
+        from .shell import InteractiveShell
         shell = InteractiveShell(resolver, executor)
         shell.run()
 
@@ -1,8 +1,114 @@
+import threading
 from dataclasses import dataclass, field
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 
 DEFAULT_TIMEOUT = 10
 
+class LazyList(list):
+    """
+    List built on first use from raw config documents, so command subtrees that are
+    never reached are never turned into dataclasses. Behaves as a plain list after that.
+    """
+    def __init__(self, factory: Callable[[List[Any]], List[Any]], raw: List[Any]):
+        super().__init__()
+        self._factory = factory
+        self._raw = raw
+        self._lock = threading.Lock()
+
+    def _materialize(self):
+        if self._factory is None:
+            return
+        with self._lock:
+            if self._factory is not None:
+                list.extend(self, self._factory(self._raw))
+                self._factory = None
+                self._raw = None
+
+    def pending(self) -> Optional[List[Any]]:
+        """The raw documents while the list hasn't been built yet, else None."""
+        # _materialize clears _factory before _raw, so this never pairs a None raw with a pending list
+        raw = self._raw
+        return raw if self._factory is not None else None
+
+    def __reduce__(self):
+        # Still lazy: pickle the raw documents, not the built subtree
+        if self._factory is not None:
+            return (LazyList, (self._factory, self._raw))
+        return (list, (list(self),))
+
+    def __iter__(self):
+        self._materialize()
+        return list.__iter__(self)
+
+    def __len__(self):
+        self._materialize()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._materialize()
+        return list.__getitem__(self, index)
+
+    def __contains__(self, item):
+        self._materialize()
+        return list.__contains__(self, item)
+
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, LazyList):
+            other._materialize()
+        return list.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        self._materialize()
+        return list.__repr__(self)
+
+    def __reversed__(self):
+        self._materialize()
+        return list.__reversed__(self)
+
+    def __add__(self, other):
+        self._materialize()
+        return list.__add__(self, other)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __mul__(self, n):
+        self._materialize()
+        return list.__mul__(self, n)
+
+    __rmul__ = __mul__
+
+    def __imul__(self, n):
+        self._materialize()
+        return list.__imul__(self, n)
+
+    def append(self, item):
+        self._materialize()
+        list.append(self, item)
+
+    def extend(self, items):
+        self._materialize()
+        list.extend(self, items)
+
+    def index(self, *args):
+        self._materialize()
+        return list.index(self, *args)
+
+    def count(self, item):
+        self._materialize()
+        return list.count(self, item)
+
+    def copy(self):
+        self._materialize()
+        return list(self)
+
+    __hash__ = None
+
 @dataclass
 class DictConfig:
     name: str
@@ -45,6 +151,20 @@ class GlobalConfig:
     placeholder_color: str = "gray"
     placeholder_text: str = "(tab for menu)"
     history_size: int = 20  # Rule 1.2.19: Default 20
+    history_retain: int = 10000  # Unique commands kept in the history file (up-arrow, search)
+    shell_coprocess: bool = False  # Reuse one shell process in interactive mode
+    completion_limit: int = 100  # Max dynamic values per menu, 0 means unbounded
+    completion_fuzzy: bool = False  # Fuzzy/substring matching for dynamic values
+    completion_fuzzy_budget: int = 20  # Milliseconds spent per keystroke on fuzzy scoring
+    completion_refresh: bool = True  # Shell Tab completion refreshes stale sources in background
+    prefetch_max: int = 3  # Dynamic dicts warmed at interactive startup, 0 disables
+    prefetch_concurrency: int = 1  # Sources fetched at the same time during prefetch
+    prefetch_nice: int = 10  # Niceness added to prefetch fetches, 0 keeps normal priority
+    daemon_idle_timeout: int = 600  # Seconds an idle daemon stays up, 0 keeps it running
+    daemon_env: List[str] = field(default_factory=list)  # Extra client env vars (fnmatch patterns) sent to the daemon
+    output_cache_size: int = 1024  # KiB of cached command output kept in the cache file
+    journal_size: int = 1024  # KiB of execution journal before it's rotated, 0 disables it
+    journal_timing: bool = False  # One-shot commands run as a child instead of exec, so the journal times them
 
 @dataclass
 class CommandConfig:
@@ -56,3 +176,4 @@ class CommandConfig:
     args: List[ArgConfig] = field(default_factory=list)
     timeout: int = 0  # Rule 4.9: Default 0
     strict: bool = False  # Strict mode logic
+    output_cache_ttl: int = 0  # Seconds a run's output is replayed instead of running again, 0 disables
@@ -0,0 +1,80 @@
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Set
+from .models import LazyList
+
+APP_VAR_PATTERN = re.compile(r'\$\$\{(\w+)\.(\w+)\}')
+# Weight of a history entry drops by this factor for each newer entry
+HISTORY_DECAY = 0.9
+# Usage counts lose half their weight after this many seconds
+USAGE_HALF_LIFE = 7 * 24 * 3600
+
+
+def _sources(alias, command) -> Set[str]:
+    return set(m.group(1) for m in APP_VAR_PATTERN.finditer(f"{alias} {command}"))
+
+
+def _raw_sources(docs) -> Set[str]:
+    """Sources in raw sub/args documents, read without building them."""
+    sources = set()
+    for doc in docs or ():
+        if isinstance(doc, dict):
+            sources.update(_sources(doc.get('alias', ''), doc.get('command', '')))
+            sources.update(_raw_sources(doc.get('args')))
+            sources.update(_raw_sources(doc.get('sub')))
+    return sources
+
+
+def _children_sources(items) -> Set[str]:
+    pending = items.pending() if isinstance(items, LazyList) else None
+    if pending is not None:
+        # Ranking every command must not build the subtrees nobody has used yet
+        return _raw_sources(pending)
+    sources = set()
+    for item in items:
+        sources.update(command_sources(item))
+    return sources
+
+
+def command_sources(node) -> Set[str]:
+    """Every $${source} referenced by a command node, its args and its subcommands."""
+    sources = _sources(node.alias, node.command)
+    sources.update(_children_sources(getattr(node, 'args', [])))
+    sources.update(_children_sources(getattr(node, 'sub', [])))
+    return sources
+
+
+def rank_sources(commands: Iterable, dynamic_dicts: Dict, history: List[str],
+                 usage: Dict[str, Dict[str, int]], limit: int, now: Optional[float] = None) -> List[str]:
+    """
+    Dynamic dicts most likely needed next, best first.
+    History entries credit every source of the root command they start with (recent ones
+    weigh more); recorded per-source usage counts add on top, decayed by age.
+    """
+    if limit <= 0:
+        return []
+    if now is None:
+        now = time.time()
+
+    sources_by_head: Dict[str, Set[str]] = {}
+    for cmd in commands:
+        head = cmd.alias.split()[0] if cmd.alias.split() else ''
+        sources_by_head.setdefault(head, set()).update(command_sources(cmd))
+
+    scores: Dict[str, float] = {}
+    weight = 1.0
+    for entry in reversed(history):
+        tokens = entry.split()
+        if tokens:
+            for source in sources_by_head.get(tokens[0], ()):
+                scores[source] = scores.get(source, 0.0) + weight
+        weight *= HISTORY_DECAY
+
+    for source, stats in usage.items():
+        if not isinstance(stats, dict):
+            continue
+        age = max(0.0, now - stats.get('last', 0))
+        scores[source] = scores.get(source, 0.0) + stats.get('count', 0) * 0.5 ** (age / USAGE_HALF_LIFE)
+
+    ranked = [s for s in sorted(scores, key=lambda s: -scores[s]) if s in dynamic_dicts and scores[s] > 0]
+    return ranked[:limit]
@@ -1,27 +1,100 @@
+import os
 import subprocess
 import json
-from typing import Dict, List, Any
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Any, Optional
 from .models import DynamicDictConfig
 from .config import ConfigLoader
 from .cache import CacheManager
+from .index import ValueIndex
+from . import tracing
+
+if TYPE_CHECKING:
+    # Background resolution is interactive only; one-shot runs don't import concurrent.futures
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+
+def _lower_priority(nice: int):
+    # Linux applies niceness per thread, and sources started from this thread inherit it
+    if nice and hasattr(os, 'setpriority'):
+        try:
+            tid = threading.get_native_id()
+            os.setpriority(os.PRIO_PROCESS, tid, os.getpriority(os.PRIO_PROCESS, tid) + nice)
+        except OSError:
+            pass
 
 class DataResolver:
     def __init__(self, config: ConfigLoader, cache: CacheManager):
         self.config = config
         self.cache = cache
         self.resolved_data: Dict[str, List[Dict[str, Any]]] = {}
+        # Bumped whenever resolved data changes, so completion caches know when to rebuild
+        self.version = 0
+        self.generations: Dict[str, int] = {}
+        self._indexes: Dict[tuple, tuple] = {}
+        # Optional ShellCoprocess (interactive mode) used instead of a fresh /bin/sh per source
+        self.coprocess = None
+        # Offline: never run a dynamic source, serve cached data regardless of cache-ttl
+        self.offline = False
+        # Background resolution (interactive mode): one in-flight future per source
+        self.background_workers = 2
+        self._pool: Optional['ThreadPoolExecutor'] = None
+        self._prefetch_pool: Optional['ThreadPoolExecutor'] = None
+        self._pending: Dict[str, 'Future'] = {}
+        self._lock = threading.Lock()
 
     def resolve_all(self):
         """Resolve all dicts and dynamic_dicts at once (for non-interactive mode)."""
         for name, d in self.config.dicts.items():
-            self.resolved_data[name] = d.data
+            self._store(name, d.data)
         
-        for name, dd in self.config.dynamic_dicts.items():
-            data = self.cache.get(name, ttl=dd.cache_ttl)
-            if data is None:
-                data = self._execute_dynamic_source(dd)
-                self.cache.set(name, data)
-            self.resolved_data[name] = data
+        for name in self.config.dynamic_dicts:
+            self._resolve_dynamic(name, save=False)
+
+    def _store(self, name: str, data: List[Dict[str, Any]]):
+        self.resolved_data[name] = data
+        self.generations[name] = self.generations.get(name, 0) + 1
+        self.version += 1
+
+    def generation(self, name: str) -> int:
+        return self.generations.get(name, 0)
+
+    def invalidate(self, names):
+        """
+        Forgets data of sources whose definition changed (config reload), plus the dynamic
+        dicts that reference them. Other sources stay resolved. Always bumps version,
+        since the command tree may have changed too.
+        """
+        stale = set(names)
+        # Dependent dynamic dicts: their command embeds $${changed.key}
+        grew = True
+        while grew:
+            grew = False
+            for name, dd in self.config.dynamic_dicts.items():
+                if name not in stale and any(f"$${{{source}." in dd.command for source in stale):
+                    stale.add(name)
+                    grew = True
+
+        with self._lock:
+            for name in stale:
+                self.resolved_data.pop(name, None)
+                self.cache.delete(name)
+                self.generations[name] = self.generations.get(name, 0) + 1
+                for index_key in [k for k in self._indexes if k[0] == name]:
+                    del self._indexes[index_key]
+            self.version += 1
+        return stale
+
+    def value_index(self, name: str, key: str) -> ValueIndex:
+        """Completion index for a source key, rebuilt only when the source's data changes."""
+        data = self.resolve_one(name)
+        stamp = (self.generation(name), id(data))
+        cached = self._indexes.get((name, key))
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        index = ValueIndex(data, key)
+        self._indexes[(name, key)] = (stamp, index)
+        return index
 
     def resolve_one(self, name: str) -> List[Dict[str, Any]]:
         """
@@ -32,31 +105,164 @@ class DataResolver:
         if name in self.resolved_data:
             return self.resolved_data[name]
         
-        # Check static dicts first
-        if name in self.config.dicts:
-            self.resolved_data[name] = self.config.dicts[name].data
-            return self.resolved_data[name]
-        
-        # Check dynamic dicts
-        if name in self.config.dynamic_dicts:
-            dd = self.config.dynamic_dicts[name]
+        with tracing.span('resolve', source=name):
+            # Check static dicts first
+            if name in self.config.dicts:
+                self._store(name, self.config.dicts[name].data)
+                return self.resolved_data[name]
+
+            # Check dynamic dicts
+            if name in self.config.dynamic_dicts:
+                pending = self._pending.get(name)
+                if pending is not None:
+                    # Already being fetched in background - wait for it instead of running the source twice
+                    return pending.result()
+                return self._resolve_dynamic(name)
+
+        return []
+
+    def _resolve_dynamic(self, name: str, save: bool = True) -> List[Dict[str, Any]]:
+        dd = self.config.dynamic_dicts[name]
+        if self.offline:
+            data = self.cache.get(name, ttl=None) or []
+        else:
             data = self.cache.get(name, ttl=dd.cache_ttl)
             if data is None:
                 data = self._execute_dynamic_source(dd)
-                self.cache.set(name, data)
-                self.cache.save()
-            self.resolved_data[name] = data
-            return self.resolved_data[name]
-        
-        return []
+                if data is None:
+                    # Failed: serve the last good data, even expired, and leave the cache
+                    # alone so the next use tries again
+                    data = self.cache.get(name, ttl=None) or []
+                else:
+                    self.cache.set(name, data)
+                    if save:
+                        self.cache.save()
+        self._store(name, data)
+        return self.resolved_data[name]
+
+    def refresh(self, names: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Re-runs the named dynamic_dicts now, ignoring cache-ttl (and offline mode, since
+        it's an explicit request). Sources run concurrently; returns rows fetched per source,
+        None for a source that failed, whose previous data is kept.
+        """
+        names = [name for name in dict.fromkeys(names) if name in self.config.dynamic_dicts]
+        if not names:
+            return {}
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='dya-refresh') as pool:
+            fetched = dict(zip(names, pool.map(
+                lambda name: self._execute_dynamic_source(self.config.dynamic_dicts[name]), names)))
+
+        with self._lock:
+            for name, data in fetched.items():
+                if data is not None:
+                    self.cache.set(name, data)
+                    self._store(name, data)
+        self.cache.save()
+        return {name: len(data) if data is not None else None for name, data in fetched.items()}
+
+    def record_usage(self, variables: Dict[str, Any]):
+        """Records which dynamic dicts an executed command used (its $${source} variables)."""
+        self.cache.record_usage([name for name in variables if name in self.config.dynamic_dicts])
+
+    def record_user_values(self, bindings: List[tuple]):
+        """Records values bound to user variables as (key, value) pairs, see frecency.py."""
+        self.cache.record_values(bindings)
+
+    def is_resolved(self, name: str) -> bool:
+        """True when resolve_one(name) would return without running a dynamic source."""
+        if name in self.resolved_data or name not in self.config.dynamic_dicts or self.offline:
+            return True
+        dd = self.config.dynamic_dicts[name]
+        return self.cache.get(name, ttl=dd.cache_ttl) is not None
+
+    def resolve_cached(self, name: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        Data for a source without ever running it: resolved data, a static dict, or the
+        cache entry even past its cache-ttl. None when a dynamic_dict was never cached.
+        """
+        if name in self.resolved_data or name not in self.config.dynamic_dicts:
+            return self.resolve_one(name)
+        data = self.cache.get(name, ttl=None)
+        if data is None:
+            return None
+        self._store(name, data)
+        return data
+
+    def resolve_in_background(self, name: str, callback: Optional[Callable[[str], None]] = None) -> Optional['Future']:
+        """
+        Starts resolving a dynamic_dict on a worker thread and returns its future.
+        Concurrent requests for the same source share one future. The callback
+        receives the source name once data is available.
+        """
+        with self._lock:
+            if self._pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._pool = ThreadPoolExecutor(max_workers=self.background_workers, thread_name_prefix='dya-resolve')
+            future = self._submit(name, self._pool)
+
+        if future is not None and callback is not None:
+            future.add_done_callback(lambda _: callback(name))
+        return future
+
+    def prefetch(self, names: List[str], concurrency: int = 1, nice: int = 0) -> List['Future']:
+        """
+        Warms sources ahead of use on a separate low-priority pool, `concurrency` at a time.
+        Completion requests for a source being prefetched share its future.
+        """
+        with self._lock:
+            if self._prefetch_pool is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._prefetch_pool = ThreadPoolExecutor(
+                    max_workers=concurrency, thread_name_prefix='dya-prefetch',
+                    initializer=_lower_priority, initargs=(nice,))
+            futures = [self._submit(name, self._prefetch_pool) for name in names]
+        return [f for f in futures if f is not None]
+
+    def _submit(self, name: str, pool: 'ThreadPoolExecutor') -> Optional['Future']:
+        # Caller holds self._lock
+        if name in self.resolved_data or name not in self.config.dynamic_dicts:
+            return None
+        future = self._pending.get(name)
+        if future is None:
+            future = pool.submit(self._resolve_background, name)
+            self._pending[name] = future
+        return future
+
+    def _resolve_background(self, name: str) -> List[Dict[str, Any]]:
+        try:
+            return self._resolve_dynamic(name)
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+
+    def shutdown(self):
+        """Stops background workers, dropping resolutions that haven't started."""
+        for pool in (self._pool, self._prefetch_pool):
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        self._prefetch_pool = None
+
+    def _execute_dynamic_source(self, dd: DynamicDictConfig) -> Optional[List[Dict[str, Any]]]:
+        with tracing.span('source.fetch', source=dd.name):
+            return self._run_dynamic_source(dd)
 
-    def _execute_dynamic_source(self, dd: DynamicDictConfig) -> List[Dict[str, Any]]:
+    def _run_dynamic_source(self, dd: DynamicDictConfig) -> Optional[List[Dict[str, Any]]]:
+        """Runs the source command and maps its JSON; None (after printing why) when it fails."""
         try:
             cmd = dd.command
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=dd.timeout)
+            # The co-process runs one command at a time: background and prefetch fetches
+            # on it would keep the user's next command waiting, so only the UI thread uses it
+            if self.coprocess is not None and threading.current_thread() is threading.main_thread():
+                result = self.coprocess.run(cmd, timeout=dd.timeout)
+            else:
+                result = subprocess.run(cmd, shell=True, capture_output=True, text=True, timeout=dd.timeout)
             if result.returncode != 0:
                 print(f"Error executing dynamic dict '{dd.name}': {result.stderr}")
-                return []
+                return None
 
             raw_json = json.loads(result.stdout)
             mapped_data = []
@@ -78,4 +284,4 @@ class DataResolver:
 
         except Exception as e:
             print(f"Error in dynamic dict '{dd.name}': {e}")
-            return []
+            return None
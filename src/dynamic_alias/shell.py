@@ -1,18 +1,29 @@
+import os
+import sys
+import signal
 from prompt_toolkit import PromptSession
-from prompt_toolkit.history import History
+from prompt_toolkit.application import run_in_terminal
+from prompt_toolkit.history import History, ThreadedHistory
+from prompt_toolkit.completion import ThreadedCompleter
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.styles import Style
 from prompt_toolkit.formatted_text import HTML
+from prompt_toolkit import print_formatted_text
 from .resolver import DataResolver
 from .executor import CommandExecutor
 from .completer import DynamicAliasCompleter
+from .jobs import Job, JobManager
+from .history import HistoryStore, history_path
+from .prefetch import rank_sources
 from .constants import CUSTOM_SHORTCUT
 
 class CacheHistory(History):
-    def __init__(self, cache_manager, limit: int = 20):
+    def __init__(self, cache_manager, limit: int = 20, store: HistoryStore = None):
         super().__init__()
         self.cache_manager = cache_manager
         self.limit = limit
+        # Long-term deduplicated history (history.py); the cache keeps the recent window
+        self.store = store
         
     def load_history_strings(self):
         # Return history in chronological order (oldest to newest)
@@ -31,19 +42,186 @@ class CacheHistory(History):
         # No, it uses iterator.
         
         # Let's just trust the "reverse" feedback and reverse the list.
-        return reversed(self.cache_manager.get_history())
+        if self.store is None:
+            return reversed(self.cache_manager.get_history())
+
+        self.store.load()
+        # First run with a history file: start from the cache's list
+        self.store.seed(self.cache_manager.get_history())
+        return self.store.commands()
         
     def store_string(self, string: str):
          self.cache_manager.add_history(string, self.limit)
          self.cache_manager.save()
+         if self.store is not None:
+             self.store.add(string)
 
 class InteractiveShell:
     def __init__(self, resolver: DataResolver, executor: CommandExecutor):
         self.resolver = resolver
         self.executor = executor
+        self.coprocess = None
+        self.jobs = JobManager()
+
+    def _start_coprocess(self):
+        # Optional: one long-lived shell shared by commands and dynamic dict refreshes
+        if not self.resolver.config.global_config.shell_coprocess or os.name != 'posix':
+            return
+        # POSIX only (fcntl, posix_spawn): not imported on Windows
+        from .coprocess import ShellCoprocess
+        self.coprocess = ShellCoprocess()
+        self.executor.coprocess = self.coprocess
+        self.resolver.coprocess = self.coprocess
+
+    def _stop_coprocess(self):
+        if self.coprocess is None:
+            return
+        self.coprocess.close()
+        self.executor.coprocess = None
+        self.resolver.coprocess = None
+        self.coprocess = None
+
+    def _prefetch(self):
+        # Warm the sources this user most likely needs while the prompt is already usable
+        global_config = self.resolver.config.global_config
+        history = self.resolver.cache.get_history()
+        sources = rank_sources(
+            self.resolver.config.commands, self.resolver.config.dynamic_dicts,
+            history if isinstance(history, list) else [], self.resolver.cache.get_usage(),
+            global_config.prefetch_max)
+        sources = [name for name in sources if not self.resolver.is_resolved(name)]
+        if sources:
+            self.resolver.prefetch(sources, global_config.prefetch_concurrency, global_config.prefetch_nice)
+
+    def _reload_config(self) -> bool:
+        # Between prompts: pick up config edits without dropping warm sources
+        config = self.resolver.config
+        if not config.changed():
+            return False
+        try:
+            changed = config.reload()
+        except Exception as e:
+            print(f"Error reloading config: {e}")
+            return False
+        self.resolver.invalidate(changed)
+        print_formatted_text(HTML("<gray>Config reloaded</gray>"))
+        return True
+
+    def _builtin(self, parts) -> bool:
+        """Runs shell built-ins (offline, refresh, jobs, fg, kill); False when parts aren't one."""
+        name, args = parts[0], parts[1:]
+        if name == 'offline':
+            if args and args[0] not in ('on', 'off'):
+                print("Usage: offline [on|off]")
+                return True
+            if args:
+                self.resolver.offline = args[0] == 'on'
+            state = "on" if self.resolver.offline else "off"
+            print_formatted_text(HTML(f"<gray>Offline mode {state}</gray>"))
+            return True
+        if name == 'refresh':
+            if self.resolver.offline:
+                print("Error: Offline mode is on, run 'offline off' first")
+                return True
+            self.executor.refresh_sources(args)
+            return True
+        if name == 'jobs':
+            if args and args != ['-c']:
+                print("Usage: jobs [-c]")
+                return True
+            if args:
+                self.jobs.clear()
+                return True
+            for job in self.jobs.list():
+                print(self._job_line(job))
+            return True
+        if name in ('fg', 'kill'):
+            sig = signal.SIGTERM
+            if name == 'kill' and args and args[0].startswith('-'):
+                sig = self._parse_signal(args.pop(0))
+                if sig is None:
+                    print("Usage: kill [-SIGNAL] [job]")
+                    return True
+            job = self._find_job(args)
+            if job is None:
+                print(f"{name}: no such job")
+            elif name == 'fg':
+                self._foreground(job)
+            elif not self.jobs.kill(job, sig):
+                print(f"kill: job {job.id} is not running")
+            return True
+        return False
+
+    @staticmethod
+    def _parse_signal(text: str):
+        name = text.lstrip('-').upper()
+        if name.isdigit():
+            return int(name)
+        try:
+            return signal.Signals[name if name.startswith('SIG') else f'SIG{name}']
+        except KeyError:
+            return None
+
+    def _find_job(self, args):
+        # `fg`, `fg 2` and `fg %2` all work, the latest job is the default
+        if not args:
+            return self.jobs.get()
+        job_id = args[0].lstrip('%')
+        return self.jobs.get(int(job_id)) if job_id.isdigit() else None
+
+    @staticmethod
+    def _job_line(job: Job) -> str:
+        return f"[{job.id}]  {job.status():<12} {job.elapsed():6.1f}s  {job.command}"
+
+    def _foreground(self, job: Job):
+        print(f"[{job.id}]  {job.command}")
+        out = sys.stdout.buffer if hasattr(sys.stdout, 'buffer') else None
+
+        def write(data: bytes):
+            if out is not None:
+                out.write(data)
+                out.flush()
+            else:
+                print(data.decode(errors='replace'), end='', flush=True)
+
+        self.jobs.follow(job, write)
+        # Its output has been seen, like a shell forgets a job that finished in foreground
+        job.reported = True
+        self.jobs.remove(job)
+        self._report_jobs()
+
+    def _start_job(self, cmd, vars, remaining):
+        cmd_resolved = self.executor.prepare(cmd, vars, remaining)
+        if cmd_resolved is None:
+            return
+        argv = self.executor.build_argv(cmd_resolved) if self.executor.direct_exec else None
+        try:
+            job = self.jobs.start(cmd_resolved, argv, self.executor.get_timeout(cmd),
+                                  on_exit=lambda job: self.executor.record_job(cmd, job))
+        except OSError as e:
+            print(f"Execution error: {e}")
+            return
+        self.resolver.cache.save()
+        print(f"[{job.id}] {job.pid}")
+
+    def _report_jobs(self):
+        # Announce each finished job once, like a shell does before its next prompt
+        for job in self.jobs.finished_unreported():
+            print(self._job_line(job))
 
     def run(self):
-        completer = DynamicAliasCompleter(self.resolver, self.executor)
+        self._start_coprocess()
+        try:
+            self._prefetch()
+            self._loop()
+        finally:
+            self.jobs.shutdown()
+            self.resolver.shutdown()
+            self._stop_coprocess()
+
+    def _loop(self):
+        # Completion runs off the UI thread; uncached sources are fetched in background
+        completer = DynamicAliasCompleter(self.resolver, self.executor, non_blocking=True)
         
         # Rule 1.1.10: Use styles from config (with defaults in models.py)
         global_config = self.resolver.config.global_config
@@ -118,38 +296,88 @@ class InteractiveShell:
             b.start_completion(select_first=False) # select_first=False to just show menu without pre-selecting to avoid aggressive intrusion
         
         history_size = global_config.history_size
-        history = CacheHistory(self.resolver.cache, history_size)
+        store = HistoryStore(history_path(self.resolver.cache.cache_file), global_config.history_retain)
+        history = CacheHistory(self.resolver.cache, history_size, store)
         
         session = PromptSession(
-            completer=completer,
+            completer=ThreadedCompleter(completer),
             style=style,
-            history=history,
+            # Loaded off the UI thread, so a long history doesn't delay the first prompt
+            history=ThreadedHistory(history),
             complete_while_typing=True,
             key_bindings=bindings
         )
 
+        def on_source_ready(source, requested_text):
+            # Called from a resolver thread: hop onto the prompt's event loop
+            app = session.app
+            loop = getattr(app, 'loop', None)
+            if loop is None:
+                return
+
+            def refresh():
+                b = app.current_buffer
+                # Drop stale requests: the user already typed past the token that needed this source
+                if b.document.text_before_cursor != requested_text:
+                    return
+                b.start_completion(select_first=False)
+
+            loop.call_soon_threadsafe(refresh)
+
+        completer.on_source_ready = on_source_ready
+
+        def on_job_done(job):
+            # Called from the job's watcher thread: print above the prompt when one is showing,
+            # otherwise the notice waits for the next prompt
+            app = session.app
+            loop = getattr(app, 'loop', None)
+            if loop is None or not app.is_running:
+                return
+            loop.call_soon_threadsafe(lambda: run_in_terminal(self._report_jobs))
+
+        self.jobs.on_done = on_job_done
+
         while True:
             try:
+                if self._reload_config():
+                    session.style = Style.from_dict(self.resolver.config.global_config.styles)
+                    history.limit = self.resolver.config.global_config.history_size
+                    store.retain = self.resolver.config.global_config.history_retain
+                self._report_jobs()
+
                 text = session.prompt(f'{CUSTOM_SHORTCUT} > ', placeholder=placeholder_html)
                 text = text.strip()
                 if not text:
                     continue
                 if text in ['exit', 'quit']:
                     break
-                    
+
+                # Trailing `&` runs the command as a background job (`&&` is left alone)
+                background = text.endswith('&') and not text.endswith(('&&', '\\&'))
+                if background:
+                    text = text[:-1].rstrip()
+
                 import shlex
                 try:
                     parts = shlex.split(text)
                 except ValueError:
                     print("Error: Invalid quotes")
                     continue
-                    
+
+                if not parts:
+                    continue
+
+                # Aliases come first, so a config can define its own jobs/fg/refresh...
                 result = self.executor.find_command(parts)
+                if not result and not background and self._builtin(parts):
+                    continue
                 
                 if result:
                     cmd, vars, is_help, remaining = result
                     if is_help:
                         self.executor.print_help(cmd)
+                    elif background:
+                        self._start_job(cmd, vars, remaining)
                     else:
                         self.executor.execute(cmd, vars, remaining)
                 
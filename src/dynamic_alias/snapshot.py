@@ -0,0 +1,140 @@
+import os
+import re
+import zlib
+import pickle
+from dataclasses import fields
+from typing import Any, Dict, List, Optional, Tuple
+from . import models
+from .constants import CUSTOM_SHORTCUT, VERSION
+
+ENV_VAR_PATTERN = re.compile(r'\$\$\{env\.(\w+)\}')
+# Bump when the snapshot layout changes; model changes are picked up by the fingerprint
+SNAPSHOT_FORMAT = 2
+
+
+def snapshot_dir() -> str:
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, CUSTOM_SHORTCUT)
+
+
+def snapshot_path(cache_file: str) -> str:
+    """
+    Snapshot of the config used with a cache file, in the user's own cache dir:
+    ~/.dya.json -> ~/.cache/dya/dya-<crc>.snapshot. Unpickling runs code, so it is
+    never kept next to a cache file that may sit in a shared or cloned directory.
+    """
+    cache_file = os.path.abspath(cache_file)
+    name = os.path.splitext(os.path.basename(cache_file))[0].lstrip('.')
+    return os.path.join(snapshot_dir(), f"{name}-{zlib.crc32(cache_file.encode()):08x}.snapshot")
+
+
+def _models_fingerprint() -> tuple:
+    # The version covers changes to what the models hold, not just their field names
+    return (VERSION,) + tuple(
+        (cls.__name__, tuple(f.name for f in fields(cls)))
+        for cls in (models.DictConfig, models.DynamicDictConfig, models.ArgConfig,
+                    models.SubCommand, models.GlobalConfig, models.CommandConfig)
+    )
+
+
+def _sha256(content: bytes) -> str:
+    # Only needed when a file is parsed or touched, keep it off the snapshot-hit path
+    import hashlib
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_stamp(path: str, content: bytes) -> List:
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size, _sha256(content)]
+
+
+def env_stamp(names) -> Dict[str, Optional[str]]:
+    """Values of the env vars a config substitutes, which change the loaded result."""
+    return {name: os.environ.get(name) for name in names}
+
+
+def env_names(content: str) -> List[str]:
+    return sorted(set(ENV_VAR_PATTERN.findall(content)))
+
+
+def file_unchanged(path: str, stamp: List) -> bool:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return False
+    if [st.st_mtime_ns, st.st_size] == stamp[:2]:
+        return True
+    # Touched or checked out again: fall back to the content hash
+    if st.st_size != stamp[1]:
+        return False
+    try:
+        with open(path, 'rb') as f:
+            return _sha256(f.read()) == stamp[2]
+    except OSError:
+        return False
+
+
+def _trusted(f) -> bool:
+    """Only unpickle files the user wrote and nobody else can modify."""
+    if not hasattr(os, 'getuid'):
+        return True
+    st = os.fstat(f.fileno())
+    return st.st_uid == os.getuid() and not st.st_mode & 0o022
+
+
+def load_snapshot(snapshot_file: str, config_file: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, tuple]]:
+    """
+    Returns (state, documents). state is the stored loader state if it still matches the
+    config files and environment, else None. documents is the per-file parse cache
+    {path: (stamp, documents, env_names)}, whose entries are checked by the caller.
+    """
+    try:
+        with open(snapshot_file, 'rb') as f:
+            if not _trusted(f):
+                return None, {}
+            snapshot = pickle.load(f)
+    except Exception:
+        # Missing, truncated or written by an incompatible version: just parse the YAML
+        return None, {}
+
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        return None, {}
+    documents = snapshot.get('documents', {})
+    if snapshot.get('models') != _models_fingerprint():
+        return None, documents
+    if snapshot.get('config_file') != os.path.abspath(config_file):
+        return None, documents
+    if any(os.environ.get(name) != value for name, value in snapshot['env'].items()):
+        return None, documents
+    if not all(file_unchanged(path, stamp) for path, stamp in snapshot['files'].items()):
+        return None, documents
+    return snapshot['state'], documents
+
+
+def save_snapshot(snapshot_file: str, config_file: str, files: Dict[str, List],
+                  env: Dict[str, Optional[str]], state: Dict[str, Any],
+                  documents: Dict[str, tuple]):
+    snapshot = {
+        'format': SNAPSHOT_FORMAT,
+        'models': _models_fingerprint(),
+        'config_file': os.path.abspath(config_file),
+        'files': files,
+        'env': env,
+        'state': state,
+        'documents': documents,
+    }
+    tmp_file = f"{snapshot_file}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(snapshot_file), mode=0o700, exist_ok=True)
+        # Private from the start: load_snapshot refuses files others can write
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic swap: concurrent invocations never read a half-written snapshot
+        os.replace(tmp_file, snapshot_file)
+    except OSError as e:
+        print(f"Warning: Failed to save config snapshot: {e}")
+        try:
+            os.remove(tmp_file)
+        except OSError:
+            pass
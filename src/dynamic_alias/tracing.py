@@ -0,0 +1,170 @@
+"""
+Phase-level tracing: spans around config load, cache load/save, source resolution,
+command matching and execution, and completion. Written as Chrome trace-event JSON
+(chrome://tracing, https://ui.perfetto.dev) when `--dya-profile <file>` or DYA_PROFILE
+is set. DYA_PROFILE_PYTHON=cprofile,tracemalloc adds deeper dumps next to the trace.
+
+Disabled, span() returns one shared no-op context manager, so instrumented code
+pays a global lookup and a call.
+"""
+import os
+import sys
+import time
+import atexit
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional
+from .constants import CUSTOM_SHORTCUT
+
+# Trace file to write; same as --dya-profile
+PROFILE_ENV = f"{CUSTOM_SHORTCUT.upper()}_PROFILE"
+# Comma-separated: cprofile (<trace>.prof, for pstats/snakeviz), tracemalloc (<trace>.mem.txt)
+PROFILE_PYTHON_ENV = f"{CUSTOM_SHORTCUT.upper()}_PROFILE_PYTHON"
+PYTHON_PROFILERS = ('cprofile', 'tracemalloc')
+# A long interactive session stops recording past this many spans
+MAX_EVENTS = 200000
+# Allocation sites listed in the tracemalloc dump
+TRACEMALLOC_TOP = 30
+
+_DISABLED = nullcontext()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.add(self.name, self.start, time.perf_counter_ns(), self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self, path: str, profilers: tuple = ()):
+        self.path = path
+        self.profilers = profilers
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._threads: Dict[int, str] = {}
+        self._profile = None
+        if 'tracemalloc' in profilers:
+            import tracemalloc
+            tracemalloc.start()
+        if 'cprofile' in profilers:
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def _event(self, name: str, start: int, args: Dict[str, Any], **fields) -> Optional[Dict[str, Any]]:
+        if len(self.events) >= MAX_EVENTS:
+            self.dropped += 1
+            return None
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        event = {'name': name, 'cat': CUSTOM_SHORTCUT, 'pid': self.pid, 'tid': tid,
+                 'ts': (start - self.origin) / 1000, **fields}
+        if args:
+            event['args'] = args
+        # list.append is atomic: background resolution threads add spans too
+        self.events.append(event)
+        return event
+
+    def add(self, name: str, start: int, end: int, args: Dict[str, Any]):
+        self._event(name, start, args, ph='X', dur=(end - start) / 1000)
+
+    def instant(self, name: str, args: Optional[Dict[str, Any]] = None):
+        """A point in time, for things that don't return (exec)."""
+        self._event(name, time.perf_counter_ns(), args or {}, ph='i', s='p')
+
+    def write(self):
+        import json
+        end = time.perf_counter_ns()
+        events = [
+            {'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'tid': 0, 'args': {'name': CUSTOM_SHORTCUT}},
+            {'name': 'total', 'cat': CUSTOM_SHORTCUT, 'ph': 'X', 'pid': self.pid, 'tid': threading.main_thread().ident,
+             'ts': 0, 'dur': (end - self.origin) / 1000, 'args': {'argv': sys.argv[1:]}},
+        ]
+        events += [
+            {'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': {'name': name}}
+            for tid, name in self._threads.items()
+        ]
+        events += self.events
+        metadata = {'dropped_events': self.dropped}
+
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.path + '.prof')
+        if 'tracemalloc' in self.profilers:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            metadata.update(memory_current=current, memory_peak=peak)
+            stats = tracemalloc.take_snapshot().statistics('lineno')
+            tracemalloc.stop()
+            with open(self.path + '.mem.txt', 'w', encoding='utf-8') as f:
+                f.write(f"current={current} peak={peak} bytes\n")
+                f.writelines(f"{stat}\n" for stat in stats[:TRACEMALLOC_TOP])
+
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': metadata}, f)
+
+
+_tracer: Optional[Tracer] = None
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def start(path: str, profilers: tuple = ()) -> Tracer:
+    """Starts recording; the trace is written by finish(), at the latest on exit."""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(path, profilers)
+        atexit.register(finish)
+    return _tracer
+
+
+def start_from_env(path: Optional[str] = None) -> Optional[Tracer]:
+    """Starts when path (the --dya-profile value) or DYA_PROFILE names a trace file."""
+    path = path or os.environ.get(PROFILE_ENV)
+    if not path:
+        return None
+    requested = os.environ.get(PROFILE_PYTHON_ENV, '').lower().replace(' ', '').split(',')
+    profilers = tuple(p for p in PYTHON_PROFILERS if p in requested or 'all' in requested)
+    return start(os.path.abspath(os.path.expanduser(path)), profilers)
+
+
+def finish():
+    """Writes the trace and stops recording. Called before exec, since atexit won't run."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return
+    try:
+        tracer.write()
+    except OSError as e:
+        print(f"Warning: Failed to write profile: {e}")
+
+
+def span(name: str, **args):
+    """`with span('cache.load'):` records the block's duration while tracing is on."""
+    tracer = _tracer
+    if tracer is None:
+        return _DISABLED
+    return _Span(tracer, name, args)
+
+
+def instant(name: str, **args):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.instant(name, args)
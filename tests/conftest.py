@@ -2,9 +2,17 @@
 Pytest configuration - runs before all tests
 Centralizes prompt_toolkit mocking to avoid interference
 """
+import os
 import sys
+import atexit
+import shutil
+import tempfile
 from unittest.mock import MagicMock
 
+# Config snapshots are written to the user's cache dir; keep the test runs' out of it
+os.environ['XDG_CACHE_HOME'] = tempfile.mkdtemp(prefix='dya-test-cache-')
+atexit.register(shutil.rmtree, os.environ['XDG_CACHE_HOME'], True)
+
 # Mock prompt_toolkit BEFORE any test files import dynamic_alias modules
 sys.modules['prompt_toolkit'] = MagicMock()
 sys.modules['prompt_toolkit.shortcuts'] = MagicMock()
@@ -14,6 +22,7 @@ sys.modules['prompt_toolkit.history'] = MagicMock()
 sys.modules['prompt_toolkit.patch_stdout'] = MagicMock()
 sys.modules['prompt_toolkit.completion'] = MagicMock()
 sys.modules['prompt_toolkit.styles'] = MagicMock()
+sys.modules['prompt_toolkit.application'] = MagicMock()
 
 # Mock History class for shell.py inheritance
 class MockHistory:
@@ -31,8 +40,9 @@ sys.modules['prompt_toolkit.completion'].Completer = MockCompleter
 
 # Mock Completion class
 class MockCompletion:
-    def __init__(self, text, start_position=0, display=None):
+    def __init__(self, text, start_position=0, display=None, display_meta=None):
         self.text = text
         self.start_position = start_position
         self.display = display
+        self.display_meta = display_meta
 sys.modules['prompt_toolkit.completion'].Completion = MockCompletion
@@ -0,0 +1,71 @@
+"""
+Batch Mode Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import io
+import json
+import tempfile
+import sys
+from unittest.mock import patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.batch import BatchRunner
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+
+class TestBatch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.cache = CacheManager(os.path.join(self.temp_dir.name, "dya.json"), enabled=True)
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.executor = CommandExecutor(self.resolver)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_batch(self, lines, parallel=1):
+        out = io.StringIO()
+        failures = BatchRunner(self.executor, parallel, out).run(lines)
+        return failures, [json.loads(l) for l in out.getvalue().splitlines()]
+
+    def test_batch_reports_json_lines(self):
+        failures, records = self.run_batch(["simple", "consume prod", "", "# skipped"])
+        self.assertEqual(failures, 0)
+        self.assertEqual([r['line'] for r in records], [1, 2])
+        self.assertEqual(records[0]['command'], "echo simple")
+        self.assertEqual(records[1]['command'], "echo prod.internal")
+        for record in records:
+            self.assertEqual(record['exit_code'], 0)
+            self.assertIn('duration', record)
+
+    def test_batch_errors_are_reported(self):
+        failures, records = self.run_batch(["unknown", "strict extra"])
+        self.assertEqual(failures, 2)
+        self.assertEqual(records[0]['error'], "Command not found")
+        self.assertIn("Strict mode", records[1]['error'])
+
+    def test_batch_resolves_source_once(self):
+        with patch.object(self.resolver, '_execute_dynamic_source', wraps=self.resolver._execute_dynamic_source) as mock_exec:
+            failures, records = self.run_batch(["dyn node-1", "dyn node-2", "dyn node-1"], parallel=2)
+        self.assertEqual(failures, 0)
+        self.assertEqual(mock_exec.call_count, 1)
+        # Parallel results keep input order
+        self.assertEqual([r['command'] for r in records], ["echo 10.0.0.1", "echo 10.0.0.2", "echo 10.0.0.1"])
+
+if __name__ == '__main__':
+    unittest.main()
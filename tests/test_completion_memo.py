@@ -0,0 +1,85 @@
+"""
+Completion Memo Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias import completer as completer_module
+from dynamic_alias.completer import DynamicAliasCompleter
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+
+class MockDocument:
+    def __init__(self, text):
+        self.text_before_cursor = text
+
+class TestCompletionMemo(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        loader = ConfigLoader(self.config_file)
+        loader.load()
+        self.cache = MagicMock()
+        self.cache.get.return_value = None
+        self.cache.get_history.return_value = []
+        self.resolver = DataResolver(loader, self.cache)
+        self.resolver.resolved_data = {
+            'dynamic_nodes': [
+                {'name': 'node-1', 'ip': '10.0.0.1'},
+                {'name': 'node-2', 'ip': '10.0.0.2'},
+            ],
+        }
+        self.executor = CommandExecutor(self.resolver)
+        self.completer = DynamicAliasCompleter(self.resolver, self.executor)
+
+    def get_completions(self, text):
+        return [c.text for c in self.completer.get_completions(MockDocument(text), None)]
+
+    def test_reopening_menu_is_memoized(self):
+        first = self.get_completions("dyn n")
+        with patch.object(self.completer, '_candidates') as mock_candidates, \
+             patch.object(self.completer, '_expand_source') as mock_expand:
+            self.assertEqual(self.get_completions("dyn n"), first)
+            mock_candidates.assert_not_called()
+            mock_expand.assert_not_called()
+
+    def test_backspace_and_retype_is_memoized(self):
+        self.get_completions("dyn ")
+        self.get_completions("dyn n")
+        with patch.object(self.completer, '_expand_source') as mock_expand:
+            self.assertEqual(self.get_completions("dyn "), ["node-1", "node-2"])
+            self.assertEqual(self.get_completions("dyn n"), ["node-1", "node-2"])
+            mock_expand.assert_not_called()
+
+    def test_source_refresh_invalidates(self):
+        self.assertEqual(self.get_completions("dyn "), ["node-1", "node-2"])
+        self.resolver._store('dynamic_nodes', [{'name': 'node-3'}])
+        self.assertEqual(self.get_completions("dyn "), ["node-3"])
+
+    def test_history_change_invalidates_ranking(self):
+        self.assertEqual(self.get_completions("dyn "), ["node-1", "node-2"])
+        self.cache.get_history.return_value = ["dyn node-2"]
+        self.assertEqual(self.get_completions("dyn "), ["node-2", "node-1"])
+
+    def test_memo_is_bounded(self):
+        with patch.object(completer_module, 'MEMO_SIZE', 3):
+            for prefix in ["a", "b", "c", "d", "e"]:
+                self.get_completions(f"dyn {prefix}")
+            self.assertEqual(len(self.completer._memo), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+Config Include Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import pickle
+import tempfile
+import shutil
+import sys
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.models import LazyList
+
+def command_doc(name, alias, sub=""):
+    return f"---\ntype: command\nname: {name}\nalias: {alias}\ncommand: echo {alias}\n{sub}"
+
+class TestConfigInclude(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp_dir, "conf.d"))
+        self.config_file = os.path.join(self.tmp_dir, "dya.yaml")
+        self.snapshot_file = os.path.join(self.tmp_dir, "dya.snapshot")
+        self.write("dya.yaml", command_doc("Root", "root") + "---\ninclude: conf.d/*.yaml\n" + command_doc("Last", "last"))
+        self.write("conf.d/b.yaml", command_doc("B", "bee"))
+        self.write("conf.d/a.yaml", command_doc("A", "ay", "sub:\n  - alias: inner\n    command: echo inner\n"))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, content):
+        with open(os.path.join(self.tmp_dir, name), 'w') as f:
+            f.write(content)
+
+    def load(self, snapshot_file=None):
+        loader = ConfigLoader(self.config_file)
+        loader.load(snapshot_file)
+        return loader
+
+    def test_include_glob_in_order(self):
+        loader = self.load()
+        self.assertEqual([c.alias for c in loader.commands], ['root', 'ay', 'bee', 'last'])
+
+    def test_include_cycle_loads_once(self):
+        self.write("conf.d/b.yaml", command_doc("B", "bee") + "---\ninclude: ../dya.yaml\n")
+        loader = self.load()
+        self.assertEqual([c.alias for c in loader.commands], ['root', 'ay', 'bee', 'last'])
+
+    def test_missing_include_warns(self):
+        self.write("dya.yaml", "---\ninclude: nope.yaml\n")
+        with patch('builtins.print') as mock_print:
+            self.load()
+        self.assertIn("nope.yaml", str(mock_print.call_args))
+
+    def test_only_edited_file_is_parsed_again(self):
+        self.load(self.snapshot_file)
+        self.write("conf.d/b.yaml", command_doc("B", "bee") + command_doc("C", "sea"))
+
+        with patch.object(ConfigLoader, '_parse_documents', autospec=True,
+                          side_effect=ConfigLoader._parse_documents) as mock_parse:
+            loader = self.load(self.snapshot_file)
+        self.assertFalse(loader.from_snapshot)
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertIn("sea", mock_parse.call_args[0][1])
+        self.assertEqual([c.alias for c in loader.commands], ['root', 'ay', 'bee', 'sea', 'last'])
+
+        # Nothing changed since: whole state comes from the snapshot
+        self.assertTrue(self.load(self.snapshot_file).from_snapshot)
+
+    def test_subtree_built_on_first_use(self):
+        loader = self.load()
+        cmd = next(c for c in loader.commands if c.alias == 'ay')
+        self.assertIsInstance(cmd.sub, LazyList)
+        self.assertIsNotNone(cmd.sub._factory)
+
+        self.assertEqual([s.alias for s in cmd.sub], ['inner'])
+        self.assertIsNone(cmd.sub._factory)
+        self.assertEqual(len(cmd.args), 0)
+        self.assertFalse(cmd.args)
+
+    def test_repeat_builds_subtree(self):
+        loader = self.load()
+        cmd = next(c for c in loader.commands if c.alias == 'ay')
+        self.assertEqual([s.alias for s in cmd.sub * 2], ['inner', 'inner'])
+        other = next(c for c in self.load().commands if c.alias == 'ay')
+        self.assertEqual([s.alias for s in 2 * other.sub], ['inner', 'inner'])
+
+    def test_lazy_subtree_pickles_unbuilt(self):
+        loader = self.load()
+        cmd = next(c for c in loader.commands if c.alias == 'ay')
+        restored = pickle.loads(pickle.dumps(cmd))
+        self.assertIsNotNone(restored.sub._factory)
+        self.assertEqual(restored, cmd)
+        self.assertEqual(restored.sub[0].alias, 'inner')
+
+if __name__ == '__main__':
+    unittest.main()
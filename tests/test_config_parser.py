@@ -0,0 +1,85 @@
+"""
+Config Parser Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import tempfile
+import sys
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+import yaml
+from dynamic_alias import config as config_module
+from dynamic_alias.config import ConfigLoader
+
+class TestConfigParser(unittest.TestCase):
+    def load(self, content):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml') as tmp:
+            tmp.write(content)
+            tmp_path = tmp.name
+        try:
+            loader = ConfigLoader(tmp_path)
+            loader.load()
+            return loader
+        finally:
+            os.remove(tmp_path)
+
+    def test_uses_libyaml_when_available(self):
+        expected = yaml.CSafeLoader if hasattr(yaml, 'CSafeLoader') else yaml.SafeLoader
+        self.assertIs(config_module.SafeLoader, expected)
+
+    def test_dashes_inside_strings(self):
+        loader = self.load("""---
+type: command
+name: Separator
+alias: sep
+command: echo '---' && printf -- '---%s' x
+helper: |
+  Prints a separator
+  ---
+---
+type: command
+name: Next
+alias: next
+command: echo next
+""")
+        self.assertEqual([c.alias for c in loader.commands], ['sep', 'next'])
+        self.assertEqual(loader.commands[0].command, "echo '---' && printf -- '---%s' x")
+        self.assertIn('---', loader.commands[0].helper)
+
+    def test_broken_document_keeps_valid_ones(self):
+        with patch('builtins.print') as mock_print:
+            loader = self.load("""---
+type: command
+name: Good
+alias: good
+command: echo good
+---
+type: command
+name: Broken
+alias: [unclosed
+---
+type: command
+name: Also Good
+alias: also
+command: echo also
+""")
+        self.assertEqual([c.alias for c in loader.commands], ['good', 'also'])
+        self.assertTrue(any("Error parsing YAML" in str(c) for c in mock_print.call_args_list))
+
+    def test_pure_python_fallback(self):
+        with patch.object(config_module, 'SafeLoader', yaml.SafeLoader):
+            loader = ConfigLoader(os.path.join(os.path.dirname(__file__), "dya.yaml"))
+            loader.load()
+        self.assertIn('simple', [c.alias for c in loader.commands])
+        self.assertIn('static_envs', loader.dicts)
+
+if __name__ == '__main__':
+    unittest.main()
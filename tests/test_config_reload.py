@@ -0,0 +1,138 @@
+"""
+Config Hot Reload Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import tempfile
+import shutil
+import sys
+from unittest.mock import MagicMock
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.shell import InteractiveShell
+
+ROOT = """---
+type: dict
+name: envs
+data:
+  - name: dev
+---
+type: dynamic_dict
+name: regions
+command: echo '[]'
+mapping:
+  name: name
+---
+type: dynamic_dict
+name: nodes
+priority: 2
+command: list-nodes --region $${regions.name}
+mapping:
+  name: name
+---
+include: conf.d/*.yaml
+"""
+
+class TestConfigReload(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.tmp_dir, "conf.d"))
+        self.config_file = os.path.join(self.tmp_dir, "dya.yaml")
+        self.write("dya.yaml", ROOT)
+        self.write("conf.d/a.yaml", "---\ntype: command\nname: A\nalias: ay\ncommand: echo a\n")
+        self.write("conf.d/b.yaml", "---\ntype: command\nname: B\nalias: bee\ncommand: echo b\n")
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+
+        self.cache = MagicMock()
+        self.cache.get.return_value = None
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.resolver.resolved_data = {
+            'envs': [{'name': 'dev'}],
+            'regions': [{'name': 'us-east-1'}],
+            'nodes': [{'name': 'node-1'}],
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp_dir, name)
+        existed = os.path.exists(path)
+        with open(path, 'w') as f:
+            f.write(content)
+        if existed:
+            # Make sure the edit is visible even on coarse mtime filesystems
+            st = os.stat(path)
+            os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+    def test_detects_edits(self):
+        self.assertFalse(self.loader.changed())
+        self.write("conf.d/b.yaml", "---\ntype: command\nname: B\nalias: bee2\ncommand: echo b\n")
+        self.assertTrue(self.loader.changed())
+
+    def test_detects_new_included_file(self):
+        dir_path = os.path.join(self.tmp_dir, "conf.d")
+        self.write("conf.d/c.yaml", "---\ntype: command\nname: C\nalias: sea\ncommand: echo c\n")
+        st = os.stat(dir_path)
+        os.utime(dir_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertTrue(self.loader.changed())
+        self.loader.reload()
+        self.assertEqual([c.alias for c in self.loader.commands], ['ay', 'bee', 'sea'])
+
+    def test_unchanged_commands_are_reused(self):
+        before = {c.alias: c for c in self.loader.commands}
+        self.write("conf.d/b.yaml", "---\ntype: command\nname: B\nalias: bee2\ncommand: echo b\n")
+        changed = self.loader.reload()
+
+        self.assertEqual(changed, set())
+        after = {c.alias: c for c in self.loader.commands}
+        self.assertIs(after['ay'], before['ay'])
+        self.assertEqual(list(after), ['ay', 'bee2'])
+
+    def test_changed_sources_and_dependents_are_dropped(self):
+        version = self.resolver.version
+        self.write("dya.yaml", ROOT.replace("echo '[]'", "echo '[{\"name\": \"eu-west-1\"}]'"))
+        changed = self.loader.reload()
+        self.assertEqual(changed, {'regions'})
+
+        stale = self.resolver.invalidate(changed)
+        self.assertEqual(stale, {'regions', 'nodes'})
+        self.assertEqual(set(self.resolver.resolved_data), {'envs'})
+        self.assertGreater(self.resolver.version, version)
+        self.cache.delete.assert_any_call('regions')
+
+    def test_shell_reload_keeps_warm_sources(self):
+        shell = InteractiveShell(self.resolver, CommandExecutor(self.resolver))
+        self.assertFalse(shell._reload_config())
+
+        self.write("conf.d/a.yaml", "---\ntype: command\nname: A\nalias: ay2\ncommand: echo a\n")
+        self.assertTrue(shell._reload_config())
+        self.assertIn('ay2', [c.alias for c in self.loader.commands])
+        self.assertEqual(set(self.resolver.resolved_data), {'envs', 'regions', 'nodes'})
+
+    def test_reload_after_snapshot_load(self):
+        snapshot_file = os.path.join(self.tmp_dir, "dya.snapshot")
+        ConfigLoader(self.config_file).load(snapshot_file)
+        loader = ConfigLoader(self.config_file)
+        loader.load(snapshot_file)
+        self.assertTrue(loader.from_snapshot)
+        self.assertFalse(loader.changed())
+
+        self.write("conf.d/a.yaml", "---\ntype: command\nname: A\nalias: ay2\ncommand: echo a\n")
+        self.assertTrue(loader.changed())
+        loader.reload()
+        self.assertEqual([c.alias for c in loader.commands], ['ay2', 'bee'])
+
+if __name__ == '__main__':
+    unittest.main()
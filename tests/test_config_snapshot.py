@@ -0,0 +1,127 @@
+"""
+Config Snapshot Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import tempfile
+import shutil
+import sys
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.snapshot import snapshot_path
+
+class TestConfigSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.tmp_dir, "dya.yaml")
+        shutil.copy(os.path.join(os.path.dirname(__file__), "dya.yaml"), self.config_file)
+        self.cache_home = os.path.join(self.tmp_dir, "cache")
+        self.env = patch.dict(os.environ, {'XDG_CACHE_HOME': self.cache_home})
+        self.env.start()
+        self.snapshot_file = snapshot_path(os.path.join(self.tmp_dir, "dya.json"))
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def load(self):
+        loader = ConfigLoader(self.config_file)
+        loader.load(self.snapshot_file)
+        return loader
+
+    def test_snapshot_path_in_user_cache_dir(self):
+        self.assertEqual(os.path.dirname(self.snapshot_file), os.path.join(self.cache_home, "dya"))
+        self.assertTrue(os.path.basename(self.snapshot_file).startswith("dya-"))
+        # One snapshot per cache file, even with the same name
+        self.assertNotEqual(self.snapshot_file, snapshot_path(os.path.join(self.tmp_dir, "other", "dya.json")))
+
+    def test_snapshot_is_private(self):
+        self.load()
+        self.assertEqual(os.stat(os.path.dirname(self.snapshot_file)).st_mode & 0o777, 0o700)
+        self.assertEqual(os.stat(self.snapshot_file).st_mode & 0o777, 0o600)
+
+    def test_writable_by_others_is_not_unpickled(self):
+        self.load()
+        os.chmod(self.snapshot_file, 0o666)
+        with patch('dynamic_alias.snapshot.pickle.load') as mock_load:
+            self.assertFalse(self.load().from_snapshot)
+            mock_load.assert_not_called()
+
+    def test_foreign_owner_is_not_unpickled(self):
+        self.load()
+        with patch('dynamic_alias.snapshot.os.getuid', return_value=os.getuid() + 1), \
+             patch('dynamic_alias.snapshot.pickle.load') as mock_load:
+            self.assertFalse(self.load().from_snapshot)
+            mock_load.assert_not_called()
+
+    def test_version_change_invalidates(self):
+        self.load()
+        with patch('dynamic_alias.snapshot.VERSION', '999.0'):
+            self.assertFalse(self.load().from_snapshot)
+
+    def test_second_load_uses_snapshot(self):
+        first = self.load()
+        self.assertFalse(first.from_snapshot)
+        self.assertTrue(os.path.exists(self.snapshot_file))
+
+        with patch('dynamic_alias.config.yaml.load_all') as mock_parse:
+            second = self.load()
+            mock_parse.assert_not_called()
+        self.assertTrue(second.from_snapshot)
+        self.assertEqual(second.commands, first.commands)
+        self.assertEqual(second.dicts, first.dicts)
+        self.assertEqual(list(second.dynamic_dicts), list(first.dynamic_dicts))
+        self.assertEqual(second.global_config, first.global_config)
+
+    def test_edit_invalidates(self):
+        self.load()
+        with open(self.config_file, 'a') as f:
+            f.write("\n---\ntype: command\nname: Added\nalias: added\ncommand: echo added\n")
+        loader = self.load()
+        self.assertFalse(loader.from_snapshot)
+        self.assertIn('added', [c.alias for c in loader.commands])
+
+    def test_touch_without_change_keeps_snapshot(self):
+        self.load()
+        stat = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertTrue(self.load().from_snapshot)
+
+    def test_env_var_change_invalidates(self):
+        with open(self.config_file, 'a') as f:
+            f.write("\n---\ntype: dict\nname: env_dict\ndata:\n  - home: $${env.DYA_SNAPSHOT_TEST}\n")
+        with patch.dict(os.environ, {'DYA_SNAPSHOT_TEST': 'one'}):
+            self.load()
+            self.assertTrue(self.load().from_snapshot)
+        with patch.dict(os.environ, {'DYA_SNAPSHOT_TEST': 'two'}):
+            loader = self.load()
+            self.assertFalse(loader.from_snapshot)
+            self.assertEqual(loader.dicts['env_dict'].data, [{'home': 'two'}])
+
+    def test_corrupt_snapshot_is_ignored(self):
+        os.makedirs(os.path.dirname(self.snapshot_file))
+        with open(self.snapshot_file, 'wb') as f:
+            f.write(b'not a pickle')
+        loader = self.load()
+        self.assertFalse(loader.from_snapshot)
+        self.assertTrue(self.load().from_snapshot)
+
+    def test_other_config_file_misses(self):
+        self.load()
+        other = os.path.join(self.tmp_dir, "other.yaml")
+        shutil.copy(self.config_file, other)
+        loader = ConfigLoader(other)
+        loader.load(self.snapshot_file)
+        self.assertFalse(loader.from_snapshot)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""
+Shell Co-process Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import subprocess
+import tempfile
+import time
+import sys
+from unittest.mock import MagicMock
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.coprocess import ShellCoprocess, TERM_FDS
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.models import DynamicDictConfig
+
+@unittest.skipUnless(os.name == 'posix', "co-process requires /bin/sh")
+class TestShellCoprocess(unittest.TestCase):
+    def setUp(self):
+        self.coprocess = ShellCoprocess()
+
+    def tearDown(self):
+        self.coprocess.close()
+
+    def test_capture_output_and_status(self):
+        result = self.coprocess.run("echo out; echo err >&2; exit 3")
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout, "out\n")
+        self.assertEqual(result.stderr, "err\n")
+
+    def test_output_without_trailing_newline(self):
+        result = self.coprocess.run("printf 'no newline'")
+        self.assertEqual(result.stdout, "no newline")
+
+    def test_state_does_not_leak(self):
+        self.coprocess.run("cd / && FOO=leak")
+        result = self.coprocess.run("pwd; echo ${FOO:-clean}")
+        self.assertEqual(result.stdout, f"{os.getcwd()}\nclean\n")
+
+    def test_process_is_reused(self):
+        self.coprocess.run("true")
+        pid = self.coprocess.proc.pid
+        self.coprocess.run("true")
+        self.assertEqual(self.coprocess.proc.pid, pid)
+
+    def test_env_is_reimported(self):
+        # Rule 3.8: environment is (re)imported before every execution
+        self.coprocess.run("true")
+        os.environ['DYA_COPROCESS_TEST'] = 'value with spaces'
+        try:
+            result = self.coprocess.run("echo $DYA_COPROCESS_TEST")
+        finally:
+            del os.environ['DYA_COPROCESS_TEST']
+        self.assertEqual(result.stdout, "value with spaces\n")
+
+    def test_timeout_restarts(self):
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.coprocess.run("sleep 5", timeout=0.2)
+        self.assertEqual(self.coprocess.run("echo again").stdout, "again\n")
+
+    def test_crash_restarts(self):
+        self.coprocess.run("true")
+        self.coprocess.proc.kill()
+        self.coprocess.proc.wait()
+        self.assertEqual(self.coprocess.run("echo revived").stdout, "revived\n")
+
+    def test_unterminated_quote_fails_alone(self):
+        result = self.coprocess.run('echo "unterminated', timeout=5)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertEqual(self.coprocess.run("echo next").stdout, "next\n")
+
+    def test_unterminated_heredoc_does_not_hang(self):
+        result = self.coprocess.run("cat <<EOF\nbody", timeout=5)
+        self.assertEqual(result.stdout.strip(), "body")
+        self.assertEqual(self.coprocess.run("echo next").stdout, "next\n")
+
+    def test_closing_paren_reports_error(self):
+        self.coprocess.run("true")
+        pid = self.coprocess.proc.pid
+        result = self.coprocess.run("echo )", timeout=5)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn(")", result.stderr)
+        self.assertEqual(self.coprocess.proc.pid, pid)
+
+    def test_terminal_fds_are_not_inherited(self):
+        result = self.coprocess.run("ls /proc/self/fd 2>/dev/null || echo skip")
+        if result.stdout.strip() == "skip":
+            self.skipTest("no /proc")
+        fds = {int(fd) for fd in result.stdout.split()}
+        self.assertFalse(fds & set(TERM_FDS))
+        self.assertFalse({fd for fd in fds if fd > 9})
+
+    def test_dynamic_source_uses_coprocess(self):
+        config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        loader = ConfigLoader(config_file)
+        loader.load()
+        resolver = DataResolver(loader, MagicMock())
+        resolver.coprocess = self.coprocess
+
+        data = resolver._execute_dynamic_source(loader.dynamic_dicts['dynamic_nodes'])
+        self.assertEqual(data[0]['name'], 'node-1')
+        self.assertTrue(self.coprocess.is_alive())
+
+    def test_foreground_does_not_wait_for_background_fetch(self):
+        config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        loader = ConfigLoader(config_file)
+        loader.load()
+        slow = loader.dynamic_dicts['dynamic_nodes']
+        loader.dynamic_dicts['dynamic_nodes'] = DynamicDictConfig(
+            slow.name, "sleep 2; " + slow.command, slow.mapping, timeout=10)
+        cache = MagicMock()
+        cache.get.return_value = None
+        resolver = DataResolver(loader, cache)
+        resolver.coprocess = self.coprocess
+        try:
+            future = resolver.resolve_in_background('dynamic_nodes')
+            time.sleep(0.2)
+            start = time.monotonic()
+            self.assertEqual(self.coprocess.run("echo hi").stdout, "hi\n")
+            self.assertLess(time.monotonic() - start, 1.0)
+            self.assertEqual(future.result(timeout=10)[0]['name'], 'node-1')
+        finally:
+            resolver.shutdown()
+
+class TestCoprocessConfig(unittest.TestCase):
+    def test_shell_coprocess_option(self):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml') as tmp:
+            tmp.write("""config:
+  shell-coprocess: true
+""")
+            tmp_path = tmp.name
+
+        try:
+            loader = ConfigLoader(tmp_path)
+            loader.load()
+            self.assertTrue(loader.global_config.shell_coprocess)
+        finally:
+            os.remove(tmp_path)
+
+    def test_shell_imports_without_fcntl(self):
+        # Windows has no fcntl; the co-process is opt-in and POSIX only
+        src = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src'))
+        code = f"import sys; sys.modules['fcntl'] = None; sys.path.insert(0, {src!r}); import dynamic_alias.shell"
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_shell_coprocess_default_off(self):
+        loader = ConfigLoader(os.path.join(os.path.dirname(__file__), "dya.yaml"))
+        loader.load()
+        self.assertFalse(loader.global_config.shell_coprocess)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Daemon Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import shutil
+import tempfile
+import threading
+import sys
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.daemon import DyaDaemon
+from dynamic_alias.client import request, run_client, socket_path, runtime_dir, filter_env, daemon_enabled, DAEMON_ENV
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.tmp_dir, "dya.yaml")
+        shutil.copy(os.path.join(os.path.dirname(__file__), "dya.yaml"), self.config_file)
+        self.cache_file = os.path.join(self.tmp_dir, "dya.json")
+        self.socket_file = os.path.join(self.tmp_dir, "dya.sock")
+        self.daemon = DyaDaemon(self.config_file, self.cache_file, self.socket_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def start(self):
+        thread = threading.Thread(target=self.daemon.serve, daemon=True)
+        thread.start()
+        for _ in range(200):
+            if os.path.exists(self.socket_file):
+                break
+            threading.Event().wait(0.01)
+        return thread
+
+    def test_resolves_command_without_running_it(self):
+        response = self.daemon.resolve(['simple'])
+        self.assertEqual(response['command'], 'echo simple')
+        self.assertEqual(response['argv'], ['echo', 'simple'])
+        self.assertEqual(response['timeout'], 0)
+        self.assertIn("Running: echo simple", response['output'])
+
+    def test_dict_variables_and_timeout(self):
+        self.assertEqual(self.daemon.resolve(['consume', 'dev'])['command'], 'echo dev.internal')
+        self.assertEqual(self.daemon.resolve(['timeout'])['timeout'], 10)
+
+    def test_output_only_responses(self):
+        response = self.daemon.resolve(['nope'])
+        self.assertNotIn('command', response)
+        self.assertIn("Error: Command not found.", response['output'])
+
+        response = self.daemon.resolve(['strict', 'extra'])
+        self.assertNotIn('command', response)
+        self.assertIn("Strict mode enabled", response['output'])
+
+        self.assertIn("HELPER", self.daemon.resolve(['simple', '-h'])['output'])
+
+    def test_colors_follow_client_terminal(self):
+        self.assertNotIn('\033[', self.daemon.resolve(['simple'], tty=False)['output'])
+        self.assertIn('\033[', self.daemon.resolve(['simple'], tty=True)['output'])
+
+    def test_config_edit_is_picked_up(self):
+        with open(self.config_file, 'a') as f:
+            f.write("\n---\ntype: command\nname: Added\nalias: added\ncommand: echo added\n")
+        st = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+        with patch.dict(os.environ):
+            response = self.daemon.handle({'op': 'resolve', 'argv': ['added'], 'env': dict(os.environ), 'cwd': os.getcwd()})
+        self.assertEqual(response['command'], 'echo added')
+
+    def test_client_environment_is_applied(self):
+        with open(self.config_file, 'a') as f:
+            f.write("\n---\ntype: dict\nname: homes\ndata:\n  - name: h\n    path: $${env.DYA_DAEMON_TEST}\n"
+                    "---\ntype: command\nname: Home\nalias: home $${homes.name}\ncommand: echo $${homes.path}\n")
+        daemon = DyaDaemon(self.config_file, self.cache_file, self.socket_file)
+        cwd = os.getcwd()
+        try:
+            with patch.dict(os.environ):
+                env = dict(os.environ, DYA_DAEMON_TEST='/one')
+                self.assertEqual(daemon.handle({'op': 'resolve', 'argv': ['home', 'h'], 'env': env, 'cwd': cwd})['command'], 'echo /one')
+                env['DYA_DAEMON_TEST'] = '/two'
+                self.assertEqual(daemon.handle({'op': 'resolve', 'argv': ['home', 'h'], 'env': env, 'cwd': cwd})['command'], 'echo /two')
+        finally:
+            os.chdir(cwd)
+
+    def test_serves_over_socket_until_stopped(self):
+        thread = self.start()
+        response = request(self.socket_file, {'op': 'resolve', 'argv': ['simple'], 'env': dict(os.environ), 'cwd': os.getcwd()})
+        self.assertEqual(response['command'], 'echo simple')
+        self.assertEqual(request(self.socket_file, {'op': 'unknown'})['status'], 'fallback')
+
+        self.assertEqual(request(self.socket_file, {'op': 'stop'}), {'status': 'ok'})
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_file))
+
+    def test_idle_shutdown(self):
+        self.daemon.loader.global_config.daemon_idle_timeout = 0.1
+        thread = self.start()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_file))
+
+    def test_client_falls_back_without_daemon(self):
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.tmp_dir}):
+            self.assertIsNone(run_client(['simple'], self.config_file, self.cache_file, spawn=False))
+
+    def test_client_prints_output_only_responses(self):
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.tmp_dir}):
+            path = socket_path(self.config_file, self.cache_file)
+            self.daemon.socket_file = path
+            self.socket_file = path
+            thread = self.start()
+            with patch('sys.stdout') as mock_stdout:
+                mock_stdout.isatty.return_value = False
+                self.assertEqual(run_client(['nope'], self.config_file, self.cache_file, spawn=False), 0)
+            self.assertIn("Error: Command not found.", str(mock_stdout.write.call_args))
+            request(path, {'op': 'stop'})
+            thread.join(5)
+
+    def test_socket_path_per_config(self):
+        self.assertEqual(socket_path(self.config_file, self.cache_file), socket_path(self.config_file, self.cache_file))
+        self.assertNotEqual(socket_path(self.config_file, self.cache_file), socket_path(self.config_file + "x", self.cache_file))
+
+    def test_runtime_dir_is_private(self):
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.tmp_dir}):
+            path = runtime_dir()
+            self.assertEqual(os.path.dirname(socket_path(self.config_file, self.cache_file)), path)
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o700)
+
+            os.chmod(path, 0o777)
+            with self.assertRaises(PermissionError):
+                runtime_dir()
+            self.assertIsNone(run_client(['simple'], self.config_file, self.cache_file, spawn=False))
+
+    def test_runtime_dir_of_another_user_is_rejected(self):
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': self.tmp_dir}):
+            runtime_dir()
+            with patch('dynamic_alias.client.os.getuid', return_value=os.getuid() + 1):
+                with self.assertRaises(PermissionError):
+                    runtime_dir()
+
+    def test_client_refuses_daemon_of_another_user(self):
+        thread = self.start()
+        with patch('dynamic_alias.client.peer_uid', return_value=os.getuid() + 1):
+            self.assertIsNone(request(self.socket_file, {'op': 'env'}))
+        request(self.socket_file, {'op': 'stop'})
+        thread.join(5)
+
+    def test_refuses_to_start_over_foreign_socket(self):
+        with patch('dynamic_alias.daemon.os.unlink', side_effect=PermissionError("not yours")), \
+             patch('dynamic_alias.daemon.socket.socket') as mock_socket, patch('sys.stdout'):
+            self.daemon.serve()
+        mock_socket.assert_not_called()
+
+    def test_client_sends_only_needed_environment(self):
+        with open(self.config_file, 'a') as f:
+            f.write("\n---\nconfig:\n  daemon-env: [AWS_*]\n"
+                    "---\ntype: dict\nname: homes\ndata:\n  - name: h\n    path: $${env.DYA_DAEMON_TEST}\n")
+        daemon = DyaDaemon(self.config_file, self.cache_file, self.socket_file)
+        names = daemon.handle({'op': 'env'})['env']
+        self.assertEqual(names, ['DYA_DAEMON_TEST', 'AWS_*'])
+
+        env = {'PATH': '/bin', 'LC_ALL': 'C', 'DYA_DAEMON_TEST': '/one', 'AWS_PROFILE': 'prod', 'SECRET_TOKEN': 'x'}
+        self.assertEqual(filter_env(env, names), {'PATH': '/bin', 'LC_ALL': 'C', 'DYA_DAEMON_TEST': '/one', 'AWS_PROFILE': 'prod'})
+
+    def test_enabled_by_env(self):
+        with patch.dict(os.environ, {DAEMON_ENV: '1'}):
+            self.assertTrue(daemon_enabled())
+        with patch.dict(os.environ, {DAEMON_ENV: '0'}):
+            self.assertFalse(daemon_enabled())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+"""
+Direct Exec Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.config import ConfigLoader
+
+class TestDirectExec(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.resolver = DataResolver(self.loader, MagicMock())
+
+    def test_build_argv_plain_command(self):
+        executor = CommandExecutor(self.resolver, direct_exec=True)
+        self.assertEqual(executor.build_argv("echo simple extra"), ["echo", "simple", "extra"])
+
+    def test_build_argv_requires_shell(self):
+        executor = CommandExecutor(self.resolver, direct_exec=True)
+        self.assertIsNone(executor.build_argv("echo a | grep a"))
+        self.assertIsNone(executor.build_argv("echo $HOME"))
+        self.assertIsNone(executor.build_argv("echo 'quoted arg'"))
+        self.assertIsNone(executor.build_argv("FOO=bar echo a"))
+        self.assertIsNone(executor.build_argv("cd /tmp"))
+        self.assertIsNone(executor.build_argv("no-such-binary-for-dya-tests arg"))
+
+    @patch('dynamic_alias.executor.print_formatted_text')
+    @patch('subprocess.run')
+    def test_execute_uses_argv(self, mock_run, mock_print):
+        executor = CommandExecutor(self.resolver, direct_exec=True)
+        chain, vars, is_help, remaining = executor.find_command(["simple"])
+        executor.execute(chain, vars, remaining)
+        args, kwargs = mock_run.call_args
+        self.assertEqual(args[0], ["echo", "simple"])
+        self.assertNotIn('shell', kwargs)
+
+    @patch('dynamic_alias.executor.print_formatted_text')
+    @patch('dynamic_alias.executor.os.execvp')
+    @patch('subprocess.run')
+    def test_one_shot_replaces_process(self, mock_run, mock_execvp, mock_print):
+        executor = CommandExecutor(self.resolver, direct_exec=True, replace_process=True)
+        chain, vars, is_help, remaining = executor.find_command(["simple"])
+        executor.execute(chain, vars, remaining)
+        mock_execvp.assert_called_once_with("echo", ["echo", "simple"])
+        self.resolver.cache.save.assert_called()
+
+    @patch('dynamic_alias.executor.print_formatted_text')
+    @patch('dynamic_alias.executor.os.execvp')
+    @patch('subprocess.run')
+    def test_one_shot_timeout_keeps_supervisor(self, mock_run, mock_execvp, mock_print):
+        # 'timeout' command has timeout: 10, so it must run under subprocess supervision
+        executor = CommandExecutor(self.resolver, direct_exec=True, replace_process=True)
+        chain, vars, is_help, remaining = executor.find_command(["timeout"])
+        executor.execute(chain, vars, remaining)
+        mock_execvp.assert_not_called()
+        args, kwargs = mock_run.call_args
+        self.assertEqual(args[0], ["sleep", "1"])
+        self.assertEqual(kwargs.get('timeout'), 10)
+
+if __name__ == '__main__':
+    unittest.main()
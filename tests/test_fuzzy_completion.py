@@ -0,0 +1,108 @@
+"""
+Fuzzy Completion Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import tempfile
+import sys
+from unittest.mock import MagicMock
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.completer import DynamicAliasCompleter
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.index import ValueIndex, fuzzy_score
+
+class MockDocument:
+    def __init__(self, text):
+        self.text_before_cursor = text
+
+class TestFuzzyCompletion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        cache = MagicMock()
+        cache.get.return_value = None
+        cache.get_history.return_value = []
+        self.resolver = DataResolver(self.loader, cache)
+        self.resolver.resolved_data = {
+            'dynamic_nodes': [
+                {'name': 'stg-payments-api-1'},
+                {'name': 'prod-payments-api-7'},
+                {'name': 'Prod-Billing'},
+                {'name': 'payments'},
+            ]
+        }
+        self.executor = CommandExecutor(self.resolver)
+        self.completer = DynamicAliasCompleter(self.resolver, self.executor)
+        self.loader.global_config.completion_fuzzy = True
+
+    def get_completions(self, text):
+        return [c.text for c in self.completer.get_completions(MockDocument(text), None)]
+
+    def test_disabled_by_default(self):
+        self.loader.global_config.completion_fuzzy = False
+        self.assertEqual(self.get_completions("dyn pay"), ['payments'])
+
+    def test_subsequence_match(self):
+        self.assertEqual(self.get_completions("dyn pay7"), ['prod-payments-api-7'])
+
+    def test_prefix_ranked_before_substring(self):
+        res = self.get_completions("dyn pay")
+        self.assertEqual(res[0], 'payments')
+        self.assertEqual(set(res[1:]), {'stg-payments-api-1', 'prod-payments-api-7'})
+
+    def test_case_insensitive(self):
+        self.assertEqual(self.get_completions("dyn BILL"), ['Prod-Billing'])
+
+    def test_narrowing_keeps_fuzzy_matches(self):
+        self.get_completions("dyn p")
+        self.assertEqual(self.get_completions("dyn papi7"), ['prod-payments-api-7'])
+
+    def test_score_order(self):
+        self.assertGreater(fuzzy_score('payments', 'pay'), fuzzy_score('stg-payments', 'pay'))
+        self.assertGreater(fuzzy_score('stg-payments', 'pay'), fuzzy_score('stg-xpayments', 'pay'))
+        self.assertGreater(fuzzy_score('xpayments', 'pay'), fuzzy_score('p-a-y', 'pay'))
+        self.assertEqual(fuzzy_score('payments', 'zz'), 0.0)
+
+    def test_budget_exhausted_is_reported(self):
+        index = ValueIndex([{'name': f'node-{i}'} for i in range(20000)], 'name')
+        rows, matches, complete = index.fuzzy('n', 5, 0)
+        self.assertFalse(complete)
+        self.assertLessEqual(len(rows), 5)
+
+        rows, matches, complete = index.fuzzy('node-19999', 5, 5)
+        self.assertTrue(complete)
+        self.assertEqual(rows, [19999])
+
+    def test_fuzzy_config(self):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml') as tmp:
+            tmp.write("""config:
+  completion-fuzzy: true
+  completion-fuzzy-budget: 50
+""")
+            tmp_path = tmp.name
+
+        try:
+            loader = ConfigLoader(tmp_path)
+            loader.load()
+            self.assertTrue(loader.global_config.completion_fuzzy)
+            self.assertEqual(loader.global_config.completion_fuzzy_budget, 50)
+        finally:
+            os.remove(tmp_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -107,6 +107,14 @@ class TestHistoryIntegration(unittest.TestCase):
         # Most recent should be present
         self.assertIn(f"shift_test_{self.history_limit + 1}", history)
     
+    def test_history_keeps_repeats(self):
+        """Test: Rule 1.2.20 - a repeated command is appended again, not deduplicated"""
+        self.history_adapter.store_string("repeat_test")
+        self.history_adapter.store_string("repeat_test")
+        
+        history = self.cache.get_history()
+        self.assertEqual(history[-2:], ["repeat_test", "repeat_test"])
+    
     def test_history_persists_across_sessions(self):
         """Test: History persists in tests/dya.json across cache reloads"""
         # Add a unique command
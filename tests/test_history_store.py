@@ -0,0 +1,188 @@
+"""
+History Store Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import json
+import time
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.history import HistoryStore, history_path, format_entry
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.shell import CacheHistory
+from dynamic_alias.main import main as dya_main
+
+class TestHistoryStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "dya.json")
+        self.path = history_path(self.cache_path)
+        self.store = HistoryStore(self.path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_path_next_to_cache(self):
+        self.assertEqual(self.path, os.path.join(self.temp_dir.name, "dya.history"))
+
+    def test_dedupe_with_counts_and_timestamps(self):
+        self.store.add("pg prod", now=100)
+        self.store.add("ssh web", now=200)
+        self.store.add("pg prod", now=300)
+        self.assertEqual(self.store.commands(), ["pg prod", "ssh web"])
+        entry = self.store.entry("pg prod")
+        self.assertEqual((entry.count, entry.first, entry.last), (2, 100, 300))
+
+    def test_retain_drops_least_recent(self):
+        self.store.retain = 3
+        for i, command in enumerate(["a", "b", "c", "a", "d"]):
+            self.store.add(command, now=i)
+        self.assertEqual(self.store.commands(), ["d", "a", "c"])
+
+    def test_substring_and_prefix_search(self):
+        for i, command in enumerate(["k get pods", "pg prod", "K logs api", "ssh prod-db", "pg staging"]):
+            self.store.add(command, now=i)
+        self.assertEqual([e.command for e in self.store.search("prod")], ["ssh prod-db", "pg prod"])
+        self.assertEqual([e.command for e in self.store.search("k ")], ["K logs api", "k get pods"])
+        self.assertEqual([e.command for e in self.store.search("pg", prefix=True)], ["pg staging", "pg prod"])
+        self.assertEqual([e.command for e in self.store.search("g", limit=2)], ["pg staging", "K logs api"])
+        self.assertEqual([e.command for e in self.store.search("", limit=1)], ["pg staging"])
+        self.assertEqual(self.store.search("nothing"), [])
+
+        # Index follows new insertions
+        self.store.add("pg prod", now=10)
+        self.assertEqual(self.store.search("pg", prefix=True)[0].command, "pg prod")
+
+    def test_persisted_and_merged_between_shells(self):
+        other = HistoryStore(self.path)
+        self.store.add("first", now=1)
+        other.add("second", now=2)
+        self.store.add("third", now=3)
+
+        reloaded = HistoryStore(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.commands(), ["third", "second", "first"])
+
+    def test_add_appends_one_line(self):
+        self.store.add("first", now=1)
+        inode = os.stat(self.path).st_ino
+        self.store.add("second", now=2)
+        self.store.add("first", now=3)
+        self.assertEqual(os.stat(self.path).st_ino, inode)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 3)
+
+        reloaded = HistoryStore(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.commands(), ["first", "second"])
+        self.assertEqual(reloaded.entry("first"), self.store.entry("first"))
+
+    def test_log_is_compacted(self):
+        with patch('dynamic_alias.history.COMPACT_SLACK', 5):
+            for i in range(20):
+                self.store.add("same", now=i)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertLessEqual(len(f.readlines()), 8)
+        reloaded = HistoryStore(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.entry("same").count, 20)
+
+    def test_format_1_file_is_imported(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"format": 1, "entries": [["old", 3, 1, 2], ["older", 1, 1, 1]]}, f)
+        self.store.load()
+        self.assertEqual(self.store.commands(), ["older", "old"])
+        self.store.add("new", now=5)
+
+        reloaded = HistoryStore(self.path)
+        reloaded.load()
+        self.assertEqual(reloaded.commands(), ["new", "older", "old"])
+        self.assertEqual(reloaded.entry("old").count, 3)
+
+    def test_seed_only_into_empty_store(self):
+        self.store.seed(["old", "older", "old"])
+        self.assertEqual(self.store.commands(), ["old", "older"])
+        self.store.seed(["ignored"])
+        self.assertIsNone(self.store.entry("ignored"))
+
+    def test_large_history_search(self):
+        store = HistoryStore(self.path, retain=200000)
+        store._entries = {f"cmd-{i} arg-{i % 97}": [1, i, i] for i in range(100000)}
+        store._version += 1
+        start = time.perf_counter()
+        results = store.search("arg-42", limit=20)
+        self.assertEqual(len(results), 20)
+        self.assertEqual(results[0].command, "cmd-99952 arg-42")
+        self.assertEqual(len(store.search("cmd-1234", prefix=True, limit=0)), 11)
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+    def test_cache_history_backed_by_store(self):
+        cache = CacheManager(self.cache_path, enabled=True)
+        cache.cache['_history'] = ["legacy one", "legacy two"]
+        history = CacheHistory(cache, 5, self.store)
+        self.assertEqual(list(history.load_history_strings()), ["legacy two", "legacy one"])
+
+        history.store_string("new")
+        history.store_string("legacy one")
+        # The cache's recent window keeps repeats (Rule 1.2.20), the store dedupes
+        self.assertEqual(cache.get_history(), ["legacy one", "legacy two", "new", "legacy one"])
+        self.assertEqual(self.store.commands(), ["legacy one", "new", "legacy two"])
+        self.assertEqual(self.store.entry("legacy one").count, 2)
+
+    def test_history_flag(self):
+        self.store.add("pg prod", now=0)
+        self.store.add("pg staging", now=0)
+        self.store.add("ssh prod", now=0)
+        config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        argv = ['dya', '--dya-config', config_file, '--dya-cache', self.cache_path, '--dya-history', '^pg']
+        with patch.object(sys, 'argv', argv), patch('builtins.print') as mock_print:
+            dya_main()
+        printed = [c.args[0] for c in mock_print.call_args_list]
+        self.assertEqual(printed, [format_entry(self.store.entry("pg staging")), format_entry(self.store.entry("pg prod"))])
+        self.assertTrue(printed[0].endswith("-                 pg staging"))
+
+    def run_history_flag(self, *args):
+        config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        argv = ['dya', '--dya-config', config_file, '--dya-cache', self.cache_path, '--dya-history', *args]
+        with patch.object(sys, 'argv', argv), patch('builtins.print') as mock_print:
+            dya_main()
+        return [c.args[0] for c in mock_print.call_args_list]
+
+    def test_history_flag_takes_one_argument(self):
+        self.store.add("pg prod", now=0)
+        self.store.add("-n flag", now=0)
+        self.assertEqual(self.run_history_flag("pg prod"), [format_entry(self.store.entry("pg prod"))])
+        self.assertEqual(self.run_history_flag("--", "-n"), [format_entry(self.store.entry("-n flag"))])
+
+        # A second word is not run as a command
+        with patch('dynamic_alias.executor.CommandExecutor.execute') as mock_execute:
+            with self.assertRaises(SystemExit) as cm:
+                self.run_history_flag("pg", "prod")
+        self.assertEqual(cm.exception.code, 1)
+        mock_execute.assert_not_called()
+
+    def test_add_while_loading(self):
+        other = HistoryStore(self.path)
+        for i in range(50):
+            other.add(f"seed-{i}", now=i)
+        loader = threading.Thread(target=lambda: [self.store.load() for _ in range(20)])
+        loader.start()
+        for i in range(20):
+            self.store.add(f"new-{i}", now=100 + i)
+        loader.join()
+        self.assertEqual(self.store.commands()[:20], [f"new-{i}" for i in reversed(range(20))])
+        self.assertEqual(len(self.store), 70)
+
+if __name__ == '__main__':
+    unittest.main()
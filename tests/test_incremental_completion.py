@@ -0,0 +1,90 @@
+"""
+Incremental Completion Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.completer import DynamicAliasCompleter
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+
+class MockDocument:
+    def __init__(self, text):
+        self.text_before_cursor = text
+
+class TestIncrementalCompletion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        loader = ConfigLoader(self.config_file)
+        loader.load()
+        cache = MagicMock()
+        cache.get.return_value = None
+        self.resolver = DataResolver(loader, cache)
+        self.resolver.resolved_data = {
+            'static_envs': [
+                {'name': 'dev', 'url': 'dev.internal'},
+                {'name': 'prod', 'url': 'prod.internal'}
+            ],
+            'dynamic_nodes': [
+                {'name': 'node-1', 'ip': '10.0.0.1'},
+                {'name': 'node-2', 'ip': '10.0.0.2'},
+                {'name': 'other', 'ip': '10.0.0.3'}
+            ],
+        }
+        self.executor = CommandExecutor(self.resolver)
+        self.completer = DynamicAliasCompleter(self.resolver, self.executor)
+
+    def get_completions(self, completer, text):
+        return [c.text for c in completer.get_completions(MockDocument(text), None)]
+
+    def test_typing_matches_fresh_results(self):
+        for text in ["c", "co", "com", "complex val ", "complex val --", "complex val --o", "dyn ", "dyn n", "dyn node-", "dyn node-2"]:
+            fresh = DynamicAliasCompleter(self.resolver, self.executor)
+            self.assertEqual(self.get_completions(self.completer, text), self.get_completions(fresh, text), text)
+
+    def test_tree_walk_reused_within_token(self):
+        self.get_completions(self.completer, "dyn ")
+        with patch.object(self.completer, '_walk', wraps=self.completer._walk) as mock_walk:
+            self.assertEqual(self.get_completions(self.completer, "dyn n"), ["node-1", "node-2"])
+            self.assertEqual(self.get_completions(self.completer, "dyn node-1"), ["node-1"])
+            mock_walk.assert_not_called()
+
+    def test_refine_filters_previous_candidates(self):
+        self.get_completions(self.completer, "dyn ")
+        with patch.object(self.completer, '_candidates', wraps=self.completer._candidates) as mock_candidates:
+            self.assertEqual(self.get_completions(self.completer, "dyn no"), ["node-1", "node-2"])
+            mock_candidates.assert_not_called()
+
+            # Backspacing past the previous prefix recomputes
+            self.assertEqual(self.get_completions(self.completer, "dyn o"), ["other"])
+            mock_candidates.assert_called_once()
+
+    def test_new_word_walks_again(self):
+        self.get_completions(self.completer, "complex val")
+        with patch.object(self.completer, '_walk', wraps=self.completer._walk) as mock_walk:
+            res = self.get_completions(self.completer, "complex val ")
+            mock_walk.assert_called_once()
+        self.assertIn("sub1", res)
+
+    def test_quoted_token_uses_full_split(self):
+        self.get_completions(self.completer, "complex 'a")
+        res = self.get_completions(self.completer, "complex 'a b' ")
+        self.assertIn("--flag", res)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,212 @@
+"""
+Background Jobs Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import time
+import signal
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.jobs import JobManager
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.shell import InteractiveShell
+from dynamic_alias.journal import Journal, read_records
+
+def wait_done(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.done and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job.done
+
+class TestJobManager(unittest.TestCase):
+    def setUp(self):
+        self.jobs = JobManager()
+
+    def tearDown(self):
+        self.jobs.shutdown()
+
+    def test_output_is_captured(self):
+        job = self.jobs.start("echo out; echo err >&2")
+        self.assertTrue(wait_done(job))
+        self.assertEqual(job.status(), "Done")
+        self.assertEqual(job.read_from(0)[0], b"out\nerr\n")
+
+    def test_direct_argv_and_exit_status(self):
+        job = self.jobs.start("sh -c 'exit 3'", ['sh', '-c', 'exit 3'])
+        self.assertTrue(wait_done(job))
+        self.assertEqual(job.status(), "Exit 3")
+
+    def test_jobs_overlap(self):
+        start = time.monotonic()
+        first = self.jobs.start("sleep 0.5")
+        second = self.jobs.start("sleep 0.5")
+        self.assertEqual([j.id for j in self.jobs.running()], [first.id, second.id])
+        self.assertTrue(wait_done(first) and wait_done(second))
+        self.assertLess(time.monotonic() - start, 0.95)
+
+    def test_kill_and_timeout(self):
+        job = self.jobs.start("sleep 5")
+        self.assertTrue(self.jobs.kill(job))
+        self.assertTrue(wait_done(job))
+        self.assertEqual(job.status(), "Killed (SIGTERM)")
+        self.assertFalse(self.jobs.kill(job))
+
+        job = self.jobs.start("sleep 5", timeout=1)
+        self.assertTrue(wait_done(job, 4))
+        self.assertEqual(job.status(), "Timed out")
+
+    def test_done_notification(self):
+        notified = threading.Event()
+        self.jobs.on_done = lambda job: notified.set()
+        job = self.jobs.start("true")
+        self.assertTrue(notified.wait(5))
+
+        self.assertEqual(self.jobs.finished_unreported(), [job])
+        self.assertEqual(self.jobs.finished_unreported(), [])
+        # Reported jobs keep their output until fg or clear
+        self.assertIs(self.jobs.get(job.id), job)
+        self.assertEqual(self.jobs.clear(), [job])
+        self.assertIsNone(self.jobs.get(job.id))
+
+    def test_output_tail_is_bounded(self):
+        with patch('dynamic_alias.jobs.MAX_OUTPUT_BYTES', 10):
+            job = self.jobs.start("printf 0123456789abcdef")
+            self.assertTrue(wait_done(job))
+        data, position = job.read_from(0)
+        self.assertEqual(data, b"6789abcdef")
+        self.assertEqual(position, 16)
+        self.assertEqual(job.read_from(14), (b"ef", 16))
+
+    def test_follow_streams_until_exit(self):
+        job = self.jobs.start("echo one; sleep 0.2; echo two")
+        written = []
+        self.jobs.follow(job, written.append)
+        self.assertTrue(job.done)
+        self.assertEqual(b"".join(written), b"one\ntwo\n")
+
+class TestShellJobs(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        loader = ConfigLoader(self.config_file)
+        loader.load()
+        cache = CacheManager(os.path.join(self.temp_dir.name, "dya.json"), enabled=True)
+        self.resolver = DataResolver(loader, cache)
+        self.executor = CommandExecutor(self.resolver, direct_exec=True)
+        self.shell = InteractiveShell(self.resolver, self.executor)
+
+    def tearDown(self):
+        self.shell.jobs.shutdown()
+        self.temp_dir.cleanup()
+
+    def run_shell(self, *lines):
+        with patch('dynamic_alias.shell.PromptSession') as mock_session, \
+             patch('dynamic_alias.executor.print_formatted_text'), \
+             patch('builtins.print') as mock_print:
+            mock_session.return_value.prompt.side_effect = list(lines) + [EOFError()]
+            self.shell._loop()
+        return [" ".join(map(str, c.args)) for c in mock_print.call_args_list]
+
+    def test_ampersand_runs_in_background(self):
+        started = []
+        start = self.shell.jobs.start
+        with patch.object(self.executor, 'execute') as mock_execute, \
+             patch.object(self.shell.jobs, 'start', side_effect=lambda *a, **kw: started.append(start(*a, **kw)) or started[-1]):
+            output = self.run_shell("simple &")
+            mock_execute.assert_not_called()
+
+        job = started[0]
+        self.assertEqual(job.command, "echo simple")
+        self.assertIn(f"[1] {job.pid}", output)
+        self.assertTrue(wait_done(job))
+        self.assertEqual(job.read_from(0)[0], b"simple\n")
+
+    def test_finished_jobs_are_announced_at_next_prompt(self):
+        self.assertTrue(wait_done(self.shell.jobs.start("echo simple")))
+        output = self.run_shell("", "")
+        self.assertEqual(len([line for line in output if line.startswith("[1]  Done") and line.endswith("echo simple")]), 1)
+
+        # Still there for fg, which shows the output and then forgets the job
+        written = []
+        with patch.object(self.shell.jobs, 'follow', side_effect=lambda j, write: write(j.read_from(0)[0])), \
+             patch('sys.stdout') as mock_stdout, patch('builtins.print'):
+            mock_stdout.buffer.write.side_effect = written.append
+            self.assertTrue(self.shell._builtin(['fg', '1']))
+        self.assertEqual(written, [b"simple\n"])
+        self.assertIsNone(self.shell.jobs.get(1))
+
+    def test_jobs_are_journaled(self):
+        path = os.path.join(self.temp_dir.name, "dya.journal")
+        self.executor.journal = Journal(path, 1024 * 1024)
+        self.run_shell("simple &")
+        deadline = time.monotonic() + 5
+        while not read_records(path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        records = read_records(path)
+        self.assertEqual([(r['alias'], r['exit'], r['timeout'], r['rss']) for r in records], [('simple', 0, False, None)])
+        self.assertIsNotNone(records[0]['wall'])
+
+    def test_jobs_clear(self):
+        self.assertTrue(wait_done(self.shell.jobs.start("echo simple")))
+        running = self.shell.jobs.start("sleep 5")
+        with patch('builtins.print'):
+            self.assertTrue(self.shell._builtin(['jobs', '-c']))
+        self.assertEqual(self.shell.jobs.list(), [running])
+
+    def test_aliases_shadow_builtins(self):
+        with open(self.config_file) as f:
+            config = f.read()
+        config_file = os.path.join(self.temp_dir.name, "dya.yaml")
+        with open(config_file, 'w') as f:
+            f.write(config + "\n---\ntype: command\nname: Jobs\nalias: jobs\ncommand: echo mine\n")
+        loader = ConfigLoader(config_file)
+        loader.load()
+        self.resolver.config = loader
+        with patch.object(self.executor, 'execute') as mock_execute, \
+             patch.object(self.shell, '_builtin') as mock_builtin:
+            self.run_shell("jobs")
+        mock_builtin.assert_not_called()
+        self.assertEqual(mock_execute.call_args[0][0][0].alias, "jobs")
+
+    def test_fg_and_kill_builtins(self):
+        job = self.shell.jobs.start("sleep 5")
+        with patch('builtins.print') as mock_print:
+            self.assertTrue(self.shell._builtin(['jobs']))
+            self.assertIn("Running", str(mock_print.call_args))
+            self.assertTrue(self.shell._builtin(['kill', '-KILL', f'%{job.id}']))
+        self.assertTrue(wait_done(job))
+        self.assertEqual(job.returncode, -signal.SIGKILL)
+
+        job = self.shell.jobs.start("echo shown")
+        written = []
+        with patch.object(self.shell.jobs, 'follow', side_effect=lambda j, write: written.append(j)), \
+             patch('builtins.print'):
+            self.assertTrue(self.shell._builtin(['fg']))
+        self.assertEqual(written, [job])
+
+        with patch('builtins.print') as mock_print:
+            self.shell._builtin(['fg', '99'])
+            mock_print.assert_called_with("fg: no such job")
+            self.shell._builtin(['kill', '-NOPE'])
+            mock_print.assert_called_with("Usage: kill [-SIGNAL] [job]")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+"""
+Execution Journal Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+from unittest.mock import MagicMock, patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.journal import Journal, Measurement, journal_path, read_records, summarize, percentile, format_report
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.main import main as dya_main
+from dynamic_alias.client import run_command
+from dynamic_alias.daemon import DyaDaemon
+from dynamic_alias.batch import BatchRunner
+
+CONFIG_FILE = os.path.join(os.path.dirname(__file__), "dya.yaml")
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tmp_dir, "dya.json")
+        self.path = journal_path(self.cache_file)
+        self.journal = Journal(self.path, 1024 * 1024)
+
+        self.loader = ConfigLoader(CONFIG_FILE)
+        self.loader.load()
+        self.resolver = DataResolver(self.loader, MagicMock())
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def executor(self, **kwargs):
+        executor = CommandExecutor(self.resolver, **kwargs)
+        executor.journal = self.journal
+        return executor
+
+    def run_alias(self, executor, args):
+        chain, variables, is_help, remaining = executor.find_command(args)
+        with patch('builtins.print'), patch('dynamic_alias.executor.print_formatted_text'):
+            executor.execute(chain, variables, remaining)
+
+    def test_path_next_to_cache(self):
+        self.assertEqual(self.path, os.path.join(self.tmp_dir, "dya.journal"))
+
+    def test_measured_run(self):
+        self.run_alias(self.executor(direct_exec=True), ["complex", "value"])
+        [record] = read_records(self.path)
+        self.assertEqual(record['alias'], "complex ${arg1}")
+        self.assertEqual(record['exit'], 0)
+        self.assertFalse(record['timeout'])
+        self.assertGreater(record['wall'], 0)
+        self.assertIsNotNone(record['cpu'])
+        # The rendered command is only stored as a hash
+        self.assertNotIn("value", json.dumps(record))
+        self.assertEqual(len(record['hash']), 8)
+
+    def test_subcommand_path_and_exit_code(self):
+        with patch('dynamic_alias.executor.subprocess.run', return_value=subprocess.CompletedProcess([], 3)):
+            self.run_alias(self.executor(), ["complex", "value", "sub1", "deep"])
+        [record] = read_records(self.path)
+        self.assertEqual(record['alias'], "complex ${arg1} sub1 deep")
+        self.assertEqual(record['exit'], 3)
+
+    def test_timeout_recorded(self):
+        with patch('dynamic_alias.executor.subprocess.run', side_effect=subprocess.TimeoutExpired("sleep 1", 10)):
+            self.run_alias(self.executor(), ["timeout"])
+        [record] = read_records(self.path)
+        self.assertTrue(record['timeout'])
+        self.assertIsNone(record['exit'])
+
+    @patch('dynamic_alias.executor.os.execvp', side_effect=SystemExit(0))
+    def test_exec_replaced_run_is_untimed(self, mock_execvp):
+        # exec never returns
+        with self.assertRaises(SystemExit):
+            self.run_alias(self.executor(direct_exec=True, replace_process=True), ["simple"])
+        mock_execvp.assert_called_once()
+        # Recorded once, before exec
+        [record] = read_records(self.path)
+        self.assertEqual(record['alias'], "simple")
+        self.assertIsNone(record['wall'])
+
+    @patch('dynamic_alias.executor.os.execvp')
+    def test_journal_timing_runs_instead_of_exec(self, mock_execvp):
+        self.loader.global_config.journal_timing = True
+        self.run_alias(self.executor(direct_exec=True, replace_process=True), ["simple"])
+        mock_execvp.assert_not_called()
+        [record] = read_records(self.path)
+        self.assertEqual(record['exit'], 0)
+        self.assertGreater(record['wall'], 0)
+
+    def test_client_run_is_recorded(self):
+        journal = {'path': self.path, 'size': 1024 * 1024, 'alias': "complex ${arg1}", 'timing': True}
+        with patch('dynamic_alias.client.os.execvp') as mock_execvp:
+            self.assertEqual(run_command("sh -c 'exit 3'", ['sh', '-c', 'exit 3'], 0, journal), 3)
+        mock_execvp.assert_not_called()
+        [record] = read_records(self.path)
+        self.assertEqual((record['alias'], record['exit']), ("complex ${arg1}", 3))
+        self.assertGreater(record['wall'], 0)
+
+        # Without journal-timing the client execs: counted, untimed
+        journal['timing'] = False
+        with patch('dynamic_alias.client.os.execvp', side_effect=SystemExit(0)):
+            with self.assertRaises(SystemExit):
+                run_command("echo simple", ['echo', 'simple'], 0, journal)
+        self.assertIsNone(read_records(self.path)[-1]['wall'])
+
+    def test_daemon_response_carries_journal(self):
+        daemon = DyaDaemon(CONFIG_FILE, self.cache_file, os.path.join(self.tmp_dir, "d.sock"))
+        response = daemon.resolve(['complex', 'value'])
+        self.assertEqual(response['journal'], {'path': self.path, 'size': 1024 * 1024,
+                                               'alias': "complex ${arg1}", 'timing': False})
+
+    def test_batch_runs_are_recorded(self):
+        runner = BatchRunner(self.executor(direct_exec=True), output=MagicMock())
+        self.assertEqual(runner.run(["simple", "complex value", "nope"]), 1)
+        self.assertEqual([r['alias'] for r in read_records(self.path)], ["simple", "complex ${arg1}"])
+
+    def test_no_journal_by_default(self):
+        executor = CommandExecutor(self.resolver)
+        with patch('dynamic_alias.executor.subprocess.run'):
+            self.run_alias(executor, ["timeout"])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_rotation(self):
+        journal = Journal(self.path, 200)
+        for i in range(6):
+            journal.record(f"alias{i}", "cmd")
+        self.assertTrue(os.path.exists(self.path + ".1"))
+        self.assertLess(os.path.getsize(self.path), 400)
+        aliases = [r['alias'] for r in read_records(self.path)]
+        # Oldest first, and the newest entries are never lost
+        self.assertEqual(aliases, sorted(aliases))
+        self.assertEqual(aliases[-1], "alias5")
+
+    def test_damaged_lines_skipped(self):
+        self.journal.record("ok", "cmd")
+        with open(self.path, 'a') as f:
+            f.write('{"alias": "tru\n[]\n')
+        self.assertEqual([r['alias'] for r in read_records(self.path)], ["ok"])
+
+    def test_measurement_children_usage(self):
+        with Measurement() as m:
+            subprocess.run([sys.executable, "-c", "sum(range(200000))"])
+        self.assertGreater(m.wall, 0)
+        self.assertGreater(m.cpu, 0)
+
+        with Measurement(children=False) as m:
+            pass
+        self.assertIsNone(m.cpu)
+
+    def test_percentiles_and_summary(self):
+        self.assertEqual(percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 90), 9)
+        self.assertEqual(percentile([1, 2, 3, 4, 5, 6, 7, 8, 9, 10], 50), 5)
+        self.assertEqual(percentile([4], 99), 4)
+
+        records = [{'alias': 'slow', 'wall': w, 'exit': 0, 'timeout': False, 'cpu': 0.1, 'rss': 2048} for w in (1, 2, 3)]
+        records += [
+            {'alias': 'slow', 'wall': None, 'exit': None, 'timeout': False, 'cpu': None, 'rss': None},
+            {'alias': 'flaky', 'wall': 0.1, 'exit': 1, 'timeout': False, 'cpu': None, 'rss': None},
+            {'alias': 'flaky', 'wall': 10, 'exit': None, 'timeout': True, 'cpu': None, 'rss': None},
+            {'alias': 'flaky', 'wall': 0.1, 'exit': 0, 'timeout': False, 'cpu': None, 'rss': None},
+        ]
+        summaries = {s['alias']: s for s in summarize(records)}
+        slow, flaky = summaries['slow'], summaries['flaky']
+        self.assertEqual((slow['runs'], slow['timed'], slow['failures']), (4, 3, 0))
+        self.assertEqual((slow['p50'], slow['p90'], slow['max']), (2, 3, 3))
+        self.assertEqual((slow['rss'], round(slow['cpu'], 6)), (2048, 0.1))
+        self.assertEqual((flaky['failures'], flaky['timeouts']), (2, 1))
+
+        report = format_report(records).splitlines()
+        self.assertEqual(report[0], "7 runs of 2 aliases")
+        slowest = report[report.index("Slowest (by p90 wall time)") + 2:report.index("Most failures") - 1]
+        self.assertEqual([line.split()[0] for line in slowest], ["flaky", "slow"])
+        failing = report[report.index("Most failures") + 2:]
+        self.assertEqual(failing[0].split(), ["flaky", "3", "2", "1", "67%"])
+
+        self.assertEqual(format_report([]), "No runs recorded yet.")
+
+    def test_report_flag(self):
+        self.journal.record("simple", "echo simple")
+        argv = ['dya', '--dya-cache', self.cache_file, '--dya-report']
+        with patch.object(sys, 'argv', argv), patch('builtins.print') as mock_print:
+            dya_main()
+        self.assertEqual(mock_print.call_args.args[0], format_report(read_records(self.path)))
+
+    def test_journal_size_config(self):
+        self.assertEqual(self.loader.global_config.journal_size, 1024)
+        self.loader._apply_global_config({'journal-size': 0})
+        self.assertEqual(self.loader.global_config.journal_size, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Non-blocking Completion Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import threading
+from unittest.mock import MagicMock, patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.completer import DynamicAliasCompleter
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+
+class MockDocument:
+    def __init__(self, text):
+        self.text_before_cursor = text
+
+class TestNonBlockingCompletion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.cache = MagicMock()
+        self.cache.get.return_value = None
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.executor = CommandExecutor(self.resolver)
+        self.completer = DynamicAliasCompleter(self.resolver, self.executor, non_blocking=True)
+
+    def tearDown(self):
+        self.resolver.shutdown()
+
+    def get_completions(self, text):
+        return list(self.completer.get_completions(MockDocument(text), None))
+
+    def test_uncached_source_yields_placeholder(self):
+        release = threading.Event()
+        ready = threading.Event()
+        notified = []
+
+        def slow_source(dd):
+            release.wait(5)
+            return [{'name': 'node-9'}]
+
+        def on_ready(source, text):
+            notified.append((source, text))
+            ready.set()
+
+        self.completer.on_source_ready = on_ready
+        with patch.object(self.resolver, '_execute_dynamic_source', side_effect=slow_source):
+            res = self.get_completions("dyn ")
+            self.assertEqual([c.text for c in res], [''])
+            self.assertIn("loading dynamic_nodes", str(res[0].display))
+
+            release.set()
+            self.assertTrue(ready.wait(5))
+
+        self.assertEqual(notified, [('dynamic_nodes', "dyn ")])
+        self.assertEqual([c.text for c in self.get_completions("dyn ")], ['node-9'])
+
+    def test_walk_past_uncached_source_does_not_run_it_inline(self):
+        release = threading.Event()
+        calls = []
+
+        def slow_source(dd):
+            calls.append(threading.current_thread())
+            release.wait(5)
+            return [{'name': 'node-1'}]
+
+        with patch.object(self.resolver, '_execute_dynamic_source', side_effect=slow_source):
+            self.assertEqual(self.get_completions("dyn node-1 "), [])
+            release.set()
+            self.resolver.shutdown()
+        self.assertNotIn(threading.current_thread(), calls)
+
+    def test_static_dict_is_not_deferred(self):
+        res = [c.text for c in self.get_completions("consume ")]
+        self.assertIn("dev", res)
+        self.assertIn("prod", res)
+
+    def test_background_requests_are_shared(self):
+        release = threading.Event()
+
+        def slow_source(dd):
+            release.wait(5)
+            return [{'name': 'node-1'}]
+
+        with patch.object(self.resolver, '_execute_dynamic_source', side_effect=slow_source) as mock_exec:
+            first = self.resolver.resolve_in_background('dynamic_nodes')
+            second = self.resolver.resolve_in_background('dynamic_nodes')
+            self.assertIs(first, second)
+            release.set()
+            # Foreground resolution waits for the in-flight fetch instead of running it again
+            self.assertEqual(self.resolver.resolve_one('dynamic_nodes'), [{'name': 'node-1'}])
+            self.assertEqual(mock_exec.call_count, 1)
+
+    def test_lookahead_warms_next_source(self):
+        with patch.object(self.resolver, '_execute_dynamic_source', return_value=[{'name': 'node-1'}]) as mock_exec, \
+             patch.object(self.resolver, 'resolve_in_background', wraps=self.resolver.resolve_in_background) as mock_bg:
+            self.assertEqual([c.text for c in self.get_completions("dy")], ['dyn'])
+            mock_bg.assert_called_once_with('dynamic_nodes')
+            future = self.resolver._pending.get('dynamic_nodes')
+            if future is not None:
+                future.result(5)
+            mock_exec.assert_called_once()
+
+        # Data is warm by the time the token is reached: no placeholder
+        self.assertEqual([c.text for c in self.get_completions("dyn ")], ['node-1'])
+
+    def test_lookahead_skips_empty_prompt_and_static_sources(self):
+        with patch.object(self.resolver, 'resolve_in_background') as mock_bg:
+            self.get_completions("")
+            self.get_completions("co")
+            mock_bg.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+Offline Mode and Refresh Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import json
+import tempfile
+import threading
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.shell import InteractiveShell
+from dynamic_alias.main import main as dya_main
+
+class TestOfflineRefresh(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "dya.json")
+        with open(self.cache_path, 'w') as f:
+            # Long expired entry
+            json.dump({'dynamic_nodes': {'timestamp': 0, 'data': [{'name': 'old', 'ip': '10.9.9.9'}]}}, f)
+
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.cache = CacheManager(self.cache_path, enabled=True)
+        self.cache.load()
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.executor = CommandExecutor(self.resolver)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_offline_serves_expired_cache(self):
+        self.resolver.offline = True
+        with patch.object(self.resolver, '_execute_dynamic_source') as mock_exec:
+            self.assertTrue(self.resolver.is_resolved('dynamic_nodes'))
+            self.assertEqual(self.resolver.resolve_one('dynamic_nodes'), [{'name': 'old', 'ip': '10.9.9.9'}])
+            # Never cached: empty, still without running anything
+            self.assertEqual(self.resolver.resolve_one('cached_items'), [])
+            self.resolver.resolve_all()
+            mock_exec.assert_not_called()
+
+    def test_online_refetches_expired_cache(self):
+        with patch.object(self.resolver, '_execute_dynamic_source', return_value=[{'name': 'new'}]) as mock_exec:
+            self.assertEqual(self.resolver.resolve_one('dynamic_nodes'), [{'name': 'new'}])
+            mock_exec.assert_called_once()
+
+    def test_refresh_runs_sources_concurrently(self):
+        # Both fetches must be in flight at once to pass the barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fetch(dd):
+            barrier.wait()
+            return [{'name': f'{dd.name}-fresh'}]
+
+        self.resolver.resolve_one('dynamic_nodes')
+        version = self.resolver.version
+        with patch.object(self.resolver, '_execute_dynamic_source', side_effect=fetch):
+            counts = self.resolver.refresh(['dynamic_nodes', 'cached_items', 'static_envs', 'dynamic_nodes'])
+
+        self.assertEqual(counts, {'dynamic_nodes': 1, 'cached_items': 1})
+        self.assertGreater(self.resolver.version, version)
+        self.assertEqual(self.resolver.resolve_one('dynamic_nodes'), [{'name': 'dynamic_nodes-fresh'}])
+        with open(self.cache_path) as f:
+            self.assertEqual(json.load(f)['cached_items']['data'], [{'name': 'cached_items-fresh'}])
+
+    def test_failed_refresh_keeps_cached_data(self):
+        self.resolver.offline = True
+        self.resolver.resolve_one('dynamic_nodes')
+        self.resolver.offline = False
+        with patch.object(self.resolver, '_run_dynamic_source', return_value=None), \
+             patch('builtins.print'), patch('dynamic_alias.executor.print_formatted_text') as mock_print:
+            self.assertEqual(self.resolver.refresh(['dynamic_nodes']), {'dynamic_nodes': None})
+            self.assertFalse(self.executor.refresh_sources(['dynamic_nodes']))
+        self.assertIn("Failed", str(mock_print.call_args_list))
+        self.assertEqual(self.resolver.resolve_one('dynamic_nodes'), [{'name': 'old', 'ip': '10.9.9.9'}])
+        with open(self.cache_path) as f:
+            self.assertEqual(json.load(f)['dynamic_nodes']['data'], [{'name': 'old', 'ip': '10.9.9.9'}])
+
+    def test_failed_source_serves_expired_data_uncached(self):
+        with patch('dynamic_alias.resolver.subprocess.run') as mock_run, patch('builtins.print'):
+            mock_run.return_value.returncode = 1
+            self.assertEqual(self.resolver.resolve_one('dynamic_nodes'), [{'name': 'old', 'ip': '10.9.9.9'}])
+        # Still expired, so the next use runs the source again
+        self.assertIsNone(self.cache.get('dynamic_nodes', ttl=self.loader.dynamic_dicts['dynamic_nodes'].cache_ttl))
+
+    def test_refresh_sources_reports(self):
+        with patch.object(self.resolver, '_execute_dynamic_source', return_value=[{'name': 'a'}]) as mock_exec, \
+             patch('builtins.print') as mock_print:
+            self.assertFalse(self.executor.refresh_sources(['nope']))
+            mock_exec.assert_not_called()
+            self.assertIn("Unknown dynamic dict: nope", str(mock_print.call_args_list))
+
+            self.assertTrue(self.executor.refresh_sources([]))
+            self.assertEqual(mock_exec.call_count, len(self.loader.dynamic_dicts))
+
+    def test_shell_builtins(self):
+        shell = InteractiveShell(self.resolver, self.executor)
+        with patch('dynamic_alias.shell.print_formatted_text'):
+            self.assertTrue(shell._builtin(['offline', 'on']))
+            self.assertTrue(self.resolver.offline)
+            with patch.object(self.executor, 'refresh_sources') as mock_refresh, patch('builtins.print'):
+                self.assertTrue(shell._builtin(['refresh', 'dynamic_nodes']))
+                mock_refresh.assert_not_called()
+                self.assertTrue(shell._builtin(['offline', 'off']))
+                self.assertFalse(self.resolver.offline)
+                self.assertTrue(shell._builtin(['refresh', 'dynamic_nodes']))
+                mock_refresh.assert_called_once_with(['dynamic_nodes'])
+        self.assertFalse(shell._builtin(['simple']))
+
+    def run_main(self, *args):
+        argv = ['dya', '--dya-config', self.config_file, '--dya-cache', self.cache_path, *args]
+        with patch.object(sys, 'argv', argv), patch.dict(os.environ, {'DYA_DAEMON': '0'}):
+            try:
+                dya_main()
+            except SystemExit as e:
+                return e.code
+        return None
+
+    def test_offline_flag(self):
+        with patch('dynamic_alias.resolver.DataResolver._execute_dynamic_source') as mock_exec, \
+             patch('dynamic_alias.executor.CommandExecutor.execute', return_value=0) as mock_execute:
+            self.run_main('--dya-offline', 'dyn', 'old')
+            mock_exec.assert_not_called()
+            self.assertEqual(mock_execute.call_args[0][1]['dynamic_nodes']['ip'], '10.9.9.9')
+
+    def test_refresh_flag(self):
+        with patch('dynamic_alias.resolver.DataResolver._execute_dynamic_source', return_value=[{'name': 'x'}]) as mock_exec, \
+             patch('builtins.print'):
+            self.assertEqual(self.run_main('--dya-refresh', 'dynamic_nodes'), 0)
+            mock_exec.assert_called_once()
+            self.assertEqual(self.run_main('--dya-refresh', 'nope'), 1)
+            self.assertEqual(self.run_main('--dya-offline', '--dya-refresh', 'dynamic_nodes'), 1)
+            mock_exec.assert_called_once()
+
+    def test_refresh_flag_takes_one_argument(self):
+        with patch('dynamic_alias.resolver.DataResolver._execute_dynamic_source', return_value=[{'name': 'x'}]) as mock_exec, \
+             patch('builtins.print') as mock_print:
+            self.assertEqual(self.run_main('--dya-refresh', 'dynamic_nodes,cached_items'), 0)
+            self.assertEqual(mock_exec.call_count, 2)
+            # Not greedy: a following word isn't taken as another source
+            self.assertEqual(self.run_main('--dya-refresh', 'dynamic_nodes', 'simple'), 1)
+            self.assertEqual(mock_exec.call_count, 2)
+        self.assertIn("takes one argument", str(mock_print.call_args))
+
+if __name__ == '__main__':
+    unittest.main()
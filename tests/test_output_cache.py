@@ -0,0 +1,169 @@
+"""
+Output Cache Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import io
+import os
+import sys
+import json
+import tempfile
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.daemon import DyaDaemon
+from dynamic_alias.main import main as dya_main
+
+CONFIG = """
+---
+type: command
+name: Query
+alias: query ${name}
+command: echo ${name} $$; echo warn >&2
+output-cache-ttl: 60
+---
+type: command
+name: Failing
+alias: failing
+command: echo $$; exit 3
+output-cache-ttl: 60
+---
+type: command
+name: Plain
+alias: plain
+command: echo plain
+"""
+
+class TestOutputCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_file = os.path.join(self.temp_dir.name, "dya.yaml")
+        self.cache_path = os.path.join(self.temp_dir.name, "dya.json")
+        with open(self.config_file, 'w') as f:
+            f.write(CONFIG)
+
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.cache = CacheManager(self.cache_path, enabled=True)
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.executor = CommandExecutor(self.resolver, direct_exec=True)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_alias(self, *args):
+        chain, variables, _, remaining = self.executor.find_command(list(args))
+        with patch('sys.stdout', new_callable=io.StringIO) as out, \
+             patch('sys.stderr', new_callable=io.StringIO) as err, \
+             patch('dynamic_alias.executor.print_formatted_text') as mock_print:
+            self.exit_code = self.executor.execute(chain, variables, remaining)
+        # Drop the separator printed under the 'Running:' header
+        return out.getvalue().split("-" * 30 + "\n", 1)[1], err.getvalue(), str(mock_print.call_args_list)
+
+    def test_parsed_from_config(self):
+        self.assertEqual(self.loader.commands[0].output_cache_ttl, 60)
+        self.assertEqual(self.loader.commands[2].output_cache_ttl, 0)
+
+    def test_result_is_replayed_within_ttl(self):
+        out, err, _ = self.run_alias('query', 'a')
+        # $$ is the shell's pid, different on every real run
+        out_again, err_again, notes = self.run_alias('query', 'a')
+        self.assertTrue(out.startswith("a "))
+        self.assertEqual(out_again, out)
+        self.assertEqual(err_again, "warn\n")
+        self.assertIn("cached output", notes)
+        self.assertEqual(self.exit_code, 0)
+
+        with open(self.cache_path) as f:
+            stored = list(json.load(f)['_output'].values())
+        self.assertEqual(stored[0]['exit_code'], 0)
+
+    def test_failures_are_not_cached(self):
+        out, _, _ = self.run_alias('failing')
+        self.assertEqual(self.exit_code, 3)
+        out_again, _, notes = self.run_alias('failing')
+        self.assertNotEqual(out_again, out)
+        self.assertNotIn("cached output", notes)
+        self.assertEqual(self.exit_code, 3)
+        self.assertNotIn('_output', self.cache.cache)
+
+    def test_exit_code_is_the_process_exit_status(self):
+        argv = ['dya', '--dya-config', self.config_file, '--dya-cache', self.cache_path, 'failing']
+        with patch.object(sys, 'argv', argv), patch('sys.stdout', new_callable=io.StringIO), \
+             patch('dynamic_alias.executor.print_formatted_text'):
+            with self.assertRaises(SystemExit) as raised:
+                dya_main()
+        self.assertEqual(raised.exception.code, 3)
+
+    def test_replayed_exit_code_is_returned(self):
+        # Entries stored by older versions may hold a failure
+        self.run_alias('query', 'a')
+        for entry in self.cache.cache['_output'].values():
+            entry['exit_code'] = 2
+        self.run_alias('query', 'a')
+        self.assertEqual(self.exit_code, 2)
+
+    def test_rendered_command_is_the_key(self):
+        out_a, _, _ = self.run_alias('query', 'a')
+        out_b, _, notes = self.run_alias('query', 'b')
+        self.assertTrue(out_b.startswith("b "))
+        self.assertNotIn("cached output", notes)
+
+    def test_expired_and_bypassed(self):
+        out, _, _ = self.run_alias('query', 'a')
+        self.executor.use_output_cache = False
+        out_fresh, _, notes = self.run_alias('query', 'a')
+        self.assertNotEqual(out_fresh, out)
+        self.assertNotIn("cached output", notes)
+
+        # The bypassing run still refreshed the stored result
+        self.executor.use_output_cache = True
+        self.assertEqual(self.run_alias('query', 'a')[0], out_fresh)
+
+        for entry in self.cache.cache['_output'].values():
+            entry['timestamp'] -= 120
+        self.assertNotIn("cached output", self.run_alias('query', 'a')[2])
+
+    def test_commands_without_ttl_are_not_captured(self):
+        with patch('subprocess.run') as mock_run, patch('dynamic_alias.executor.print_formatted_text'), patch('builtins.print'):
+            chain, variables, _, remaining = self.executor.find_command(['plain'])
+            self.executor.execute(chain, variables, remaining)
+            mock_run.assert_called_once()
+        self.assertNotIn('_output', self.cache.cache)
+
+    def test_size_cap_evicts_oldest(self):
+        self.cache.set_output('old', 'x' * 60, '', 0, 100)
+        self.cache.cache['_output']['old']['timestamp'] -= 10
+        self.cache.set_output('new', 'y' * 60, '', 0, 100)
+        self.assertEqual(list(self.cache.cache['_output']), ['new'])
+
+        # Larger than the whole cap: not stored at all
+        self.cache.set_output('huge', 'z' * 200, '', 0, 100)
+        self.assertNotIn('huge', self.cache.cache['_output'])
+        self.assertIsNone(self.cache.get_output('huge', 60))
+        self.assertEqual(self.cache.get_output('new', 60)['stdout'], 'y' * 60)
+
+    def test_daemon_leaves_cached_commands_to_client(self):
+        daemon = DyaDaemon(self.config_file, self.cache_path, os.path.join(self.temp_dir.name, "d.sock"))
+        self.assertEqual(daemon.resolve(['query', 'a']), {'status': 'fallback'})
+        self.assertEqual(daemon.resolve(['plain'])['command'], 'echo plain')
+
+    def test_output_cache_size_config(self):
+        with open(self.config_file, 'a') as f:
+            f.write("---\nconfig:\n  output-cache-size: 16\n")
+        loader = ConfigLoader(self.config_file)
+        loader.load()
+        self.assertEqual(loader.global_config.output_cache_size, 16)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Startup Prefetch Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import tempfile
+import sys
+from unittest.mock import MagicMock, patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.shell import InteractiveShell
+from dynamic_alias.prefetch import rank_sources, command_sources
+
+class TestPrefetch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.cache = MagicMock()
+        self.cache.get.return_value = None
+        self.cache.get_history.return_value = []
+        self.cache.get_usage.return_value = {}
+        self.resolver = DataResolver(self.loader, self.cache)
+
+    def tearDown(self):
+        self.resolver.shutdown()
+
+    def rank(self, history, usage=None, limit=3, now=1000):
+        return rank_sources(self.loader.commands, self.loader.dynamic_dicts, history, usage or {}, limit, now=now)
+
+    def test_command_sources(self):
+        dyn = next(c for c in self.loader.commands if c.alias.startswith('dyn'))
+        self.assertEqual(command_sources(dyn), {'dynamic_nodes'})
+
+    def test_ranking_keeps_subtrees_unbuilt(self):
+        self.rank(["simple", "dyn node-1"])
+        self.assertTrue(all(c.sub.pending() is not None for c in self.loader.commands))
+        self.assertTrue(all(c.args.pending() is not None for c in self.loader.commands))
+
+    def test_sources_same_before_and_after_build(self):
+        for cmd in self.loader.commands:
+            unbuilt = command_sources(cmd)
+            list(cmd.sub), list(cmd.args)
+            self.assertEqual(command_sources(cmd), unbuilt)
+
+    def test_history_drives_ranking(self):
+        self.assertEqual(self.rank(["simple", "dyn node-1"]), ['dynamic_nodes'])
+        # Static dicts are never prefetched
+        self.assertEqual(self.rank(["consume dev"]), [])
+        self.assertEqual(self.rank([]), [])
+
+    def test_usage_stats_rank_and_decay(self):
+        usage = {'cached_items': {'count': 3, 'last': 1000}, 'dynamic_nodes': {'count': 2, 'last': 1000}}
+        self.assertEqual(self.rank([], usage), ['cached_items', 'dynamic_nodes'])
+
+        # Old usage fades behind recent usage
+        usage['cached_items']['last'] = 1000 - 30 * 24 * 3600
+        self.assertEqual(self.rank([], usage), ['dynamic_nodes', 'cached_items'])
+        self.assertEqual(self.rank([], usage, limit=1), ['dynamic_nodes'])
+        self.assertEqual(self.rank(["dyn node-1"], usage, limit=0), [])
+
+    def test_shell_prefetches_ranked_sources(self):
+        self.cache.get_history.return_value = ["dyn node-1"]
+        shell = InteractiveShell(self.resolver, CommandExecutor(self.resolver))
+        with patch.object(self.resolver, 'prefetch') as mock_prefetch:
+            shell._prefetch()
+        mock_prefetch.assert_called_once_with(['dynamic_nodes'], 1, 10)
+
+    def test_prefetch_skips_cached_sources(self):
+        self.cache.get_history.return_value = ["dyn node-1"]
+        self.cache.get.return_value = [{'name': 'node-1'}]
+        shell = InteractiveShell(self.resolver, CommandExecutor(self.resolver))
+        with patch.object(self.resolver, 'prefetch') as mock_prefetch:
+            shell._prefetch()
+        mock_prefetch.assert_not_called()
+
+    def test_prefetch_warms_resolver(self):
+        with patch.object(self.resolver, '_execute_dynamic_source', return_value=[{'name': 'node-1'}]) as mock_exec:
+            futures = self.resolver.prefetch(['dynamic_nodes', 'static_envs'], concurrency=1, nice=0)
+            self.assertEqual(len(futures), 1)
+            futures[0].result(5)
+            # Already warm: no second fetch
+            self.assertEqual(self.resolver.resolve_one('dynamic_nodes'), [{'name': 'node-1'}])
+            mock_exec.assert_called_once()
+
+    def test_execution_records_usage(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = CacheManager(os.path.join(tmp, 'cache.json'), True)
+            resolver = DataResolver(self.loader, cache)
+            resolver.record_usage({'dynamic_nodes': {'name': 'node-1'}, 'static_envs': {'name': 'dev'}})
+            resolver.record_usage({'dynamic_nodes': {'name': 'node-2'}})
+            usage = cache.get_usage()
+            self.assertEqual(list(usage), ['dynamic_nodes'])
+            self.assertEqual(usage['dynamic_nodes']['count'], 2)
+
+    def test_prefetch_config(self):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml') as tmp:
+            tmp.write("""config:
+  prefetch-max: 5
+  prefetch-concurrency: 2
+  prefetch-nice: 0
+""")
+            tmp_path = tmp.name
+
+        try:
+            loader = ConfigLoader(tmp_path)
+            loader.load()
+            self.assertEqual(loader.global_config.prefetch_max, 5)
+            self.assertEqual(loader.global_config.prefetch_concurrency, 2)
+            self.assertEqual(loader.global_config.prefetch_nice, 0)
+        finally:
+            os.remove(tmp_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+Ranked Completion Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import tempfile
+import sys
+from unittest.mock import MagicMock
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.completer import DynamicAliasCompleter
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias.index import ValueIndex
+
+class MockDocument:
+    def __init__(self, text):
+        self.text_before_cursor = text
+
+class TestRankedCompletion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.cache = MagicMock()
+        self.cache.get.return_value = None
+        self.cache.get_history.return_value = []
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.resolver.resolved_data = {
+            'dynamic_nodes': [{'name': f'node-{i}', 'ip': f'10.0.0.{i}'} for i in range(50)]
+        }
+        self.executor = CommandExecutor(self.resolver)
+        self.completer = DynamicAliasCompleter(self.resolver, self.executor)
+
+    def get_completions(self, text):
+        return list(self.completer.get_completions(MockDocument(text), None))
+
+    def test_results_are_capped_with_sentinel(self):
+        self.loader.global_config.completion_limit = 10
+        res = self.get_completions("dyn ")
+        self.assertEqual(len(res), 11)
+        self.assertEqual(res[-1].text, '')
+        self.assertIn("+40 more", str(res[-1].display))
+
+    def test_unbounded_limit(self):
+        self.loader.global_config.completion_limit = 0
+        res = self.get_completions("dyn ")
+        self.assertEqual(len(res), 50)
+
+    def test_no_sentinel_under_limit(self):
+        res = self.get_completions("dyn node-4")
+        self.assertEqual([c.text for c in res], ['node-4'] + [f'node-{i}' for i in range(40, 50)])
+
+    def test_exact_match_ranked_first(self):
+        self.resolver.resolved_data['dynamic_nodes'] = [{'name': 'node-10'}, {'name': 'node-1'}]
+        res = self.get_completions("dyn node-1")
+        self.assertEqual([c.text for c in res], ['node-1', 'node-10'])
+
+    def test_recently_used_ranked_next(self):
+        self.cache.get_history.return_value = ["dyn node-30", "dyn node-7"]
+        res = [c.text for c in self.get_completions("dyn ")]
+        self.assertEqual(res[:3], ['node-7', 'node-30', 'node-0'])
+
+    def test_display_meta_from_other_fields(self):
+        res = self.get_completions("dyn node-3")
+        self.assertEqual(res[0].text, 'node-3')
+        self.assertEqual(res[0].display_meta, 'ip=10.0.0.3')
+
+    def test_index_rebuilt_on_refresh(self):
+        first = self.resolver.value_index('dynamic_nodes', 'name')
+        self.assertIs(self.resolver.value_index('dynamic_nodes', 'name'), first)
+        self.resolver._store('dynamic_nodes', [{'name': 'fresh'}])
+        self.assertEqual(self.resolver.value_index('dynamic_nodes', 'name').values, ['fresh'])
+
+    def test_value_index_prefix_rows(self):
+        index = ValueIndex([{'name': 'b'}, {'name': 'ab'}, {'name': 'abc'}, {'name': 'a'}], 'name')
+        self.assertEqual(sorted(index.prefix_rows('ab')), [1, 2])
+        self.assertEqual(index.prefix_rows('z'), [])
+
+    def test_completion_limit_config(self):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml') as tmp:
+            tmp.write("""config:
+  completion-limit: 25
+""")
+            tmp_path = tmp.name
+
+        try:
+            loader = ConfigLoader(tmp_path)
+            loader.load()
+            self.assertEqual(loader.global_config.completion_limit, 25)
+        finally:
+            os.remove(tmp_path)
+
+if __name__ == '__main__':
+    unittest.main()
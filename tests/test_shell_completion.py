@@ -0,0 +1,136 @@
+"""
+Shell Completion Endpoint Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.complete import complete, completion_script, words_to_text, request_refresh, refresh, run_complete
+from dynamic_alias.completer import CompletionEngine
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+
+class TestShellCompletion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.tmp_dir, "dya.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_cache(self, entries):
+        with open(self.cache_file, 'w') as f:
+            json.dump(entries, f)
+
+    def engine(self):
+        loader = ConfigLoader(self.config_file)
+        loader.load()
+        cache = CacheManager(self.cache_file, True)
+        cache.load()
+        resolver = DataResolver(loader, cache)
+        return CompletionEngine(resolver, CommandExecutor(resolver), cache_only=True)
+
+    def test_words_to_text(self):
+        self.assertEqual(words_to_text([]), '')
+        self.assertEqual(words_to_text(['co']), 'co')
+        self.assertEqual(words_to_text(['dyn', '']), 'dyn ')
+        self.assertEqual(words_to_text(['complex', 'a b', '--f']), "complex 'a b' --f")
+
+    def test_static_candidates(self):
+        self.assertEqual(complete(self.engine(), ['co']), [('consume', ''), ('complex', '')])
+        self.assertEqual(complete(self.engine(), ['consume', '']), [('dev', 'url=dev.internal'), ('prod', 'url=prod.internal')])
+
+    def test_expired_cache_is_served_and_marked_stale(self):
+        self.write_cache({'dynamic_nodes': {'timestamp': 0, 'data': [{'name': 'node-7', 'ip': '10.0.0.7'}]}})
+        engine = self.engine()
+        with patch.object(engine.resolver, '_execute_dynamic_source') as mock_exec:
+            self.assertEqual(complete(engine, ['dyn', '']), [('node-7', 'ip=10.0.0.7')])
+            mock_exec.assert_not_called()
+        self.assertEqual(engine.stale_sources, {'dynamic_nodes'})
+
+    def test_fresh_cache_is_not_stale(self):
+        self.write_cache({'dynamic_nodes': {'timestamp': int(time.time()), 'data': [{'name': 'node-7'}]}})
+        engine = self.engine()
+        self.assertEqual(complete(engine, ['dyn', 'no']), [('node-7', '')])
+        self.assertEqual(engine.stale_sources, set())
+
+    def test_walk_past_uncached_source_does_not_run_it(self):
+        engine = self.engine()
+        with patch.object(engine.resolver, '_execute_dynamic_source') as mock_exec:
+            self.assertEqual(complete(engine, ['dyn', 'node-1', '']), [])
+            mock_exec.assert_not_called()
+        self.assertEqual(engine.stale_sources, {'dynamic_nodes'})
+
+    def test_uncached_source_yields_nothing(self):
+        engine = self.engine()
+        with patch.object(engine.resolver, '_execute_dynamic_source') as mock_exec:
+            self.assertEqual(complete(engine, ['dyn', '']), [])
+            mock_exec.assert_not_called()
+        self.assertEqual(engine.stale_sources, {'dynamic_nodes'})
+
+    def test_refresh_requested_once(self):
+        with patch('dynamic_alias.complete.spawn_detached') as mock_spawn:
+            request_refresh(self.config_file, self.cache_file, ['dynamic_nodes'])
+            request_refresh(self.config_file, self.cache_file, ['dynamic_nodes'])
+            mock_spawn.assert_called_once_with('dynamic_alias.complete', self.config_file, self.cache_file, 'dynamic_nodes')
+
+            # A lock left by a crashed refresh is taken over once it's old
+            lock = self.cache_file + '.refresh'
+            os.utime(lock, (0, 0))
+            request_refresh(self.config_file, self.cache_file, ['dynamic_nodes'])
+            self.assertEqual(mock_spawn.call_count, 2)
+
+    def test_run_complete_triggers_refresh(self):
+        with patch('dynamic_alias.complete.request_refresh') as mock_refresh, patch('sys.stdout'):
+            self.assertEqual(run_complete(['--', 'dyn', ''], self.config_file, self.cache_file), 0)
+            mock_refresh.assert_called_once_with(self.config_file, self.cache_file, ['dynamic_nodes'])
+
+    def test_refresh_process_fills_cache(self):
+        open(self.cache_file + '.refresh', 'w').close()
+        refresh(self.config_file, self.cache_file, ['dynamic_nodes'])
+        self.assertFalse(os.path.exists(self.cache_file + '.refresh'))
+        self.assertEqual(complete(self.engine(), ['dyn', '']), [('node-1', 'ip=10.0.0.1'), ('node-2', 'ip=10.0.0.2')])
+
+    def test_completion_scripts(self):
+        for shell in ('bash', 'zsh', 'fish'):
+            script = completion_script(shell)
+            self.assertIn('__complete', script)
+        self.assertIn('complete -o default -F _dya_complete dya', completion_script('bash'))
+        self.assertIsNone(completion_script('tcsh'))
+
+    def test_completion_refresh_config(self):
+        with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.yaml') as tmp:
+            tmp.write("""config:
+  completion-refresh: false
+""")
+            tmp_path = tmp.name
+
+        try:
+            loader = ConfigLoader(tmp_path)
+            loader.load()
+            self.assertFalse(loader.global_config.completion_refresh)
+        finally:
+            os.remove(tmp_path)
+
+if __name__ == '__main__':
+    unittest.main()
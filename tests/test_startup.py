@@ -0,0 +1,116 @@
+"""
+Startup Time Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import re
+import sys
+import shutil
+import tempfile
+import importlib
+import subprocess
+from unittest.mock import MagicMock, patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias import constants
+from dynamic_alias.executor import HTML, _render_markup, escape_markup
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Cumulative import time of dynamic_alias.main in one-shot mode, in microseconds.
+# Generous on purpose: a regression back to importing prompt_toolkit costs far more.
+IMPORT_BUDGET_US = 250_000
+HEAVY_MODULES = ('prompt_toolkit', 'yaml', 'concurrent.futures', 'asyncio')
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_one_shot(self, *args):
+        # Real interpreter, outside of the prompt_toolkit mocks in conftest.py
+        return subprocess.run(
+            [sys.executable, '-X', 'importtime', os.path.join(ROOT_DIR, 'dya_dev.py'),
+             '--dya-config', os.path.join(ROOT_DIR, 'tests', 'dya.yaml'),
+             '--dya-cache', os.path.join(self.tmp_dir, 'dya.json'), *args],
+            capture_output=True, text=True, cwd=ROOT_DIR, timeout=60
+        )
+
+    def imported(self, stderr):
+        return {m.group(2).strip(): int(m.group(1)) for m in re.finditer(r'^import time:\s+\d+ \|\s+(\d+) \|(.*)$', stderr, re.MULTILINE)}
+
+    def test_one_shot_import_budget(self):
+        # First run parses the YAML and writes the config snapshot
+        self.assertEqual(self.run_one_shot('simple').returncode, 0)
+
+        result = self.run_one_shot('simple')
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("simple", result.stdout)
+
+        imported = self.imported(result.stderr)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported, f"{module} imported on the one-shot path")
+        self.assertLess(imported['dynamic_alias.main'], IMPORT_BUDGET_US)
+
+    def test_shell_completion_skips_prompt_toolkit(self):
+        self.assertEqual(self.run_one_shot('simple').returncode, 0)
+
+        result = self.run_one_shot('__complete', '--', 'co')
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("consume", result.stdout)
+
+        imported = self.imported(result.stderr)
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported, f"{module} imported by shell completion")
+
+    def test_build_info_preferred_over_pyproject(self):
+        build_info = MagicMock(CUSTOM_SHORTCUT='xyz', CUSTOM_NAME='Built Name')
+        try:
+            with patch.dict(sys.modules, {'dynamic_alias._build_info': build_info}):
+                importlib.reload(constants)
+                self.assertEqual(constants.CUSTOM_SHORTCUT, 'xyz')
+                self.assertEqual(constants.CUSTOM_NAME, 'Built Name')
+        finally:
+            importlib.reload(constants)
+
+    def test_installed_without_build_info_uses_metadata(self):
+        from importlib import metadata
+        dist = MagicMock(version='9.9.9', entry_points=[
+            metadata.EntryPoint(name='xyz', value='dynamic_alias.main:main', group='console_scripts')])
+        with open(os.path.join(self.tmp_dir, "pyproject.toml"), "w", encoding="utf-8") as f:
+            f.write('[custom-build]\nname = "Custom Name"\nshortcut = "ignored"\n')
+        checkout = constants._checkout_pyproject()
+        exists = os.path.exists
+        cwd = os.getcwd()
+        try:
+            os.chdir(self.tmp_dir)
+            with patch.dict(sys.modules, {'dynamic_alias._build_info': None}), \
+                 patch('os.path.exists', side_effect=lambda path: path != checkout and exists(path)), \
+                 patch('importlib.metadata.distribution', return_value=dist):
+                importlib.reload(constants)
+                self.assertEqual(constants.CUSTOM_SHORTCUT, 'xyz')
+                self.assertEqual(constants.VERSION, '9.9.9')
+                self.assertEqual(constants.CUSTOM_NAME, 'Custom Name')
+        finally:
+            os.chdir(cwd)
+            importlib.reload(constants)
+
+    def test_user_text_in_markup_is_not_read_as_tags(self):
+        message = HTML(f"<b>Running:</b> {escape_markup('echo <red>x</red> && cat <in')}")
+        self.assertEqual(_render_markup(message, False), "Running: echo <red>x</red> && cat <in")
+        self.assertNotIn("\033[31m", _render_markup(message, True))
+
+    def test_markup_without_prompt_toolkit(self):
+        self.assertEqual(_render_markup("<b><green>Running:</green></b> a &lt; b", False), "Running: a < b")
+        self.assertEqual(_render_markup("<b>x</b>", True), "\033[0m\033[1mx\033[0m")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Tracing Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import subprocess
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias import tracing
+from dynamic_alias.main import main as dya_main
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+CONFIG_FILE = os.path.join(ROOT_DIR, 'tests', 'dya.yaml')
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.trace_file = os.path.join(self.tmp_dir, 'trace.json')
+        self.cache_file = os.path.join(self.tmp_dir, 'dya.json')
+
+    def tearDown(self):
+        tracing.finish()
+        shutil.rmtree(self.tmp_dir)
+
+    def events(self):
+        with open(self.trace_file) as f:
+            return json.load(f)['traceEvents']
+
+    def spans(self):
+        return [e['name'] for e in self.events() if e['ph'] == 'X']
+
+    def test_disabled_span_is_shared_noop(self):
+        self.assertFalse(tracing.enabled())
+        self.assertIs(tracing.span('a'), tracing.span('b', source='x'))
+        with tracing.span('a'):
+            pass
+        tracing.finish()
+        self.assertFalse(os.path.exists(self.trace_file))
+
+    def test_spans_written_as_chrome_trace(self):
+        tracing.start(self.trace_file)
+        with tracing.span('outer'):
+            with tracing.span('inner', source='nodes'):
+                pass
+        worker = threading.Thread(target=lambda: tracing.span('background').__enter__().__exit__(None, None, None), name='dya-worker')
+        worker.start()
+        worker.join()
+        tracing.instant('exec')
+        tracing.finish()
+        self.assertFalse(tracing.enabled())
+
+        events = self.events()
+        by_name = {e['name']: e for e in events if e['ph'] in ('X', 'i')}
+        self.assertEqual(set(by_name), {'total', 'outer', 'inner', 'background', 'exec'})
+        outer, inner = by_name['outer'], by_name['inner']
+        self.assertEqual(inner['args'], {'source': 'nodes'})
+        self.assertLessEqual(outer['ts'], inner['ts'])
+        self.assertGreaterEqual(outer['ts'] + outer['dur'], inner['ts'] + inner['dur'])
+        self.assertNotEqual(by_name['background']['tid'], outer['tid'])
+        thread_names = {e['args']['name'] for e in events if e['name'] == 'thread_name'}
+        self.assertIn('dya-worker', thread_names)
+
+    def test_event_cap(self):
+        tracer = tracing.start(self.trace_file)
+        with patch.object(tracing, 'MAX_EVENTS', 2):
+            for _ in range(5):
+                with tracing.span('loop'):
+                    pass
+        self.assertEqual(len(tracer.events), 2)
+        tracing.finish()
+        with open(self.trace_file) as f:
+            self.assertEqual(json.load(f)['otherData']['dropped_events'], 3)
+
+    def test_python_profilers_from_env(self):
+        with patch.dict(os.environ, {tracing.PROFILE_ENV: self.trace_file, tracing.PROFILE_PYTHON_ENV: 'cprofile, tracemalloc'}):
+            tracer = tracing.start_from_env()
+        self.assertEqual(tracer.profilers, ('cprofile', 'tracemalloc'))
+        tracing.finish()
+        self.assertTrue(os.path.exists(self.trace_file + '.prof'))
+        with open(self.trace_file + '.mem.txt') as f:
+            self.assertTrue(f.readline().startswith('current='))
+
+    def test_profile_flag_traces_phases(self):
+        argv = ['dya', '--dya-config', CONFIG_FILE, '--dya-cache', self.cache_file,
+                '--dya-profile', self.trace_file, 'dyn', 'node-1']
+        with patch.object(sys, 'argv', argv), \
+             patch('dynamic_alias.resolver.DataResolver._run_dynamic_source', return_value=[{'name': 'node-1', 'ip': '10.0.0.1'}]), \
+             patch('dynamic_alias.executor.os.execvp') as mock_execvp, \
+             patch('dynamic_alias.executor.subprocess.run', return_value=subprocess.CompletedProcess([], 0)), \
+             patch('builtins.print'):
+            dya_main()
+        mock_execvp.assert_called_once()
+        # Written right before exec
+        self.assertFalse(tracing.enabled())
+
+        spans = self.spans()
+        for name in ('total', 'import', 'config.load', 'match', 'resolve', 'source.fetch', 'cache.save'):
+            self.assertIn(name, spans)
+        self.assertEqual(self.events()[-1]['name'], 'exec')
+
+    def test_execute_span_without_exec(self):
+        argv = ['dya', '--dya-config', CONFIG_FILE, '--dya-cache', self.cache_file,
+                '--dya-profile', self.trace_file, 'timeout']
+        with patch.object(sys, 'argv', argv), \
+             patch('dynamic_alias.executor.subprocess.run', return_value=subprocess.CompletedProcess([], 0)), \
+             patch('builtins.print'):
+            dya_main()
+        tracing.finish()
+        self.assertIn('execute', self.spans())
+
+    def test_exec_replace_writes_trace_first(self):
+        # Real process: exec replaces the interpreter, so atexit never runs
+        env = dict(os.environ, **{tracing.PROFILE_ENV: self.trace_file})
+        result = subprocess.run(
+            [sys.executable, os.path.join(ROOT_DIR, 'dya_dev.py'), '--dya-config', CONFIG_FILE,
+             '--dya-cache', self.cache_file, 'simple'],
+            capture_output=True, text=True, cwd=ROOT_DIR, env=env, timeout=60
+        )
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("simple", result.stdout)
+        events = self.events()
+        self.assertEqual(events[-1]['name'], 'exec')
+        self.assertIn('config.load', self.spans())
+
+if __name__ == '__main__':
+    unittest.main()
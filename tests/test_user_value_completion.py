@@ -0,0 +1,129 @@
+"""
+User Variable Value Completion Tests
+Test Rules:
+    @system_rules.txt
+    @global-test-rules.md
+"""
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Mocks are centralized in conftest.py
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'src')))
+
+from dynamic_alias.completer import DynamicAliasCompleter
+from dynamic_alias.config import ConfigLoader
+from dynamic_alias.cache import CacheManager
+from dynamic_alias.resolver import DataResolver
+from dynamic_alias.executor import CommandExecutor
+from dynamic_alias import frecency
+
+class MockDocument:
+    def __init__(self, text):
+        self.text_before_cursor = text
+
+class TestUserValueCompletion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config_file = os.path.join(os.path.dirname(__file__), "dya.yaml")
+        assert os.path.exists(cls.config_file)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.loader = ConfigLoader(self.config_file)
+        self.loader.load()
+        self.cache = CacheManager(os.path.join(self.temp_dir.name, "dya.json"), enabled=True)
+        self.resolver = DataResolver(self.loader, self.cache)
+        self.executor = CommandExecutor(self.resolver)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def run_alias(self, *args):
+        chain, variables, _, remaining = self.executor.find_command(list(args))
+        with patch('dynamic_alias.executor.print_formatted_text'), patch('builtins.print'):
+            self.executor.prepare(chain, variables, remaining)
+
+    def get_completions(self, text):
+        completer = DynamicAliasCompleter(self.resolver, self.executor)
+        return list(completer.get_completions(MockDocument(text), None))
+
+    def test_past_values_are_offered(self):
+        self.run_alias('complex', 'alpha')
+        self.run_alias('complex', 'beta')
+        self.run_alias('complex', 'beta')
+
+        res = self.get_completions("complex ")
+        self.assertEqual([c.text for c in res], ['beta', 'alpha'])
+        self.assertEqual(res[0].display_meta, "recent ${arg1}")
+        self.assertEqual([c.text for c in self.get_completions("complex a")], ['alpha'])
+        # Still no placeholder (Rule 4.20)
+        self.assertNotIn("${arg1}", [c.text for c in res])
+
+    def test_new_use_reorders_memoized_menu(self):
+        completer = DynamicAliasCompleter(self.resolver, self.executor)
+        self.run_alias('complex', 'alpha')
+        self.assertEqual([c.text for c in completer.get_completions(MockDocument("complex "), None)], ['alpha'])
+
+        # Same keystrokes, same history: only the frecency store changed
+        self.run_alias('complex', 'beta')
+        self.run_alias('complex', 'beta')
+        self.assertEqual([c.text for c in completer.get_completions(MockDocument("complex "), None)], ['beta', 'alpha'])
+
+    def test_value_past_the_cap_shows_on_next_keystroke(self):
+        self.run_alias('complex', 'abz')
+        for i in range(10):
+            # Used twice: ranked ahead of abz, which falls past the cap
+            self.run_alias('complex', f'a{i:02d}')
+            self.run_alias('complex', f'a{i:02d}')
+        completer = DynamicAliasCompleter(self.resolver, self.executor)
+        res = [c.text for c in completer.get_completions(MockDocument("complex a"), None)]
+        self.assertEqual(len(res), 10)
+        self.assertNotIn('abz', res)
+        self.assertEqual([c.text for c in completer.get_completions(MockDocument("complex ab"), None)], ['abz'])
+
+    def test_arg_values_are_scoped_to_their_arg(self):
+        self.run_alias('complex', 'x', '--opt', 'fast')
+        self.assertEqual([c.text for c in self.get_completions("complex x --opt ")], ['fast'])
+        self.assertEqual([c.text for c in self.get_completions("complex ")], ['x'])
+
+    def test_values_are_quoted(self):
+        self.run_alias('complex', 'two words')
+        self.assertEqual([c.text for c in self.get_completions("complex ")], ["'two words'"])
+
+    def test_frecency_decays(self):
+        store = {}
+        frecency.record(store, 'k', 'old', now=0)
+        frecency.record(store, 'k', 'old', now=0)
+        frecency.record(store, 'k', 'old', now=0)
+        frecency.record(store, 'k', 'new', now=frecency.HALF_LIFE * 3)
+        # 3 uses three half-lives ago (0.375) rank below 1 use now
+        self.assertEqual(frecency.ranked(store, 'k', frecency.HALF_LIFE * 3), ['new', 'old'])
+        self.assertEqual(frecency.ranked(store, 'missing', 0), [])
+
+    def test_store_is_bounded(self):
+        store = {}
+        for i in range(frecency.MAX_VALUES + 5):
+            frecency.record(store, 'k', f'v{i}', now=i)
+        frecency.record(store, 'k', 'x' * (frecency.MAX_VALUE_LENGTH + 1), now=100)
+        self.assertEqual(len(store['k']['values']), frecency.MAX_VALUES)
+        self.assertNotIn('v0', store['k']['values'])
+
+        for i in range(frecency.MAX_KEYS + 5):
+            frecency.record(store, f'key{i}', 'v', now=1000 + i)
+        self.assertEqual(len(store), frecency.MAX_KEYS)
+        self.assertNotIn('k', store)
+
+    def test_persisted_with_cache(self):
+        self.run_alias('complex', 'kept')
+        self.cache.save()
+        cache = CacheManager(self.cache.cache_file, enabled=True)
+        cache.load()
+        self.assertEqual(cache.get_values("complex ${arg1}\0arg1"), ['kept'])
+
+if __name__ == '__main__':
+    unittest.main()